@@ -0,0 +1,337 @@
+# ai_backends.py
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import string
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODEL = "gemini-2.0-flash-exp"
+
+
+class GeminiAPIError(Exception):
+    """Raised when the Gemini REST endpoint answers with a non-success status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Gemini API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class LLMBackend(ABC):
+    """Interface every model backend implements; selected by ``ai_backend`` in config.json."""
+
+    # Whether requests count against a remote quota (enables the rate limiter).
+    rate_limited = False
+
+    @abstractmethod
+    async def generate(self, messages: List[Dict], generation_config: Dict) -> str:
+        pass
+
+    async def stream(self, messages: List[Dict], generation_config: Dict) -> AsyncIterator[str]:
+        yield await self.generate(messages, generation_config)
+
+    async def close(self):
+        pass
+
+
+class GeminiBackend(LLMBackend):
+    """Asynchronous Gemini client built on a pooled, keep-alive aiohttp session.
+
+    The session is created lazily on the running event loop and reused for every
+    request, so concurrent calls share warm connections instead of blocking the
+    loop the way ``GenerativeModel.generate_content`` does.
+    """
+
+    rate_limited = True
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, base_url: str = GEMINI_API_BASE,
+                 pool_size: int = 8, keepalive_timeout: float = 30.0, request_timeout: float = 120.0):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+        if self._session is not None and self._session_loop is not loop:
+            # A session cannot outlive the loop it was created on; start a fresh pool.
+            logging.debug("Event loop changed, creating a new Gemini connection pool.")
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            headers={"x-goog-api-key": self.api_key},
+        )
+        self._session_loop = loop
+        return self._session
+
+    def _endpoint(self, method: str) -> str:
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    @staticmethod
+    def normalize_parts(parts: List) -> List[Dict]:
+        normalized = []
+        for part in parts:
+            if isinstance(part, str):
+                normalized.append({"text": part})
+            elif isinstance(part, dict):
+                normalized.append(part)
+            elif isinstance(part, list):
+                # Legacy callers wrap a whole message list as a single part.
+                for inner in part:
+                    normalized.extend(GeminiBackend.normalize_parts(inner.get("parts", [])))
+        return normalized
+
+    @staticmethod
+    def normalize_contents(messages: List[Dict]) -> List[Dict]:
+        """Converts prompt-manager messages into the REST ``contents`` shape (system messages excluded)."""
+        return [{"role": message.get("role", "user"), "parts": GeminiBackend.normalize_parts(message.get("parts", []))}
+                for message in messages if message.get("role") != "system"]
+
+    @staticmethod
+    def request_body(messages: List[Dict], generation_config: Dict) -> Dict:
+        """Builds the REST body; system messages become ``systemInstruction``."""
+        body = {
+            "contents": GeminiBackend.normalize_contents(messages),
+            "generationConfig": generation_config,
+        }
+        system_parts = [part for message in messages if message.get("role") == "system"
+                        for part in GeminiBackend.normalize_parts(message.get("parts", []))]
+        if system_parts:
+            body["systemInstruction"] = {"parts": system_parts}
+        return body
+
+    @staticmethod
+    def extract_text(payload: Dict) -> str:
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            feedback = payload.get("promptFeedback", {})
+            raise GeminiAPIError(200, f"No candidates returned ({feedback.get('blockReason', 'unknown reason')})")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    async def generate(self, messages: List[Dict], generation_config: Dict) -> str:
+        body = self.request_body(messages, generation_config)
+        session = self._get_session()
+        async with session.post(self._endpoint("generateContent"), json=body) as resp:
+            if resp.status != 200:
+                raise GeminiAPIError(resp.status, await resp.text())
+            payload = await resp.json()
+        return self.extract_text(payload)
+
+    async def stream(self, messages: List[Dict], generation_config: Dict) -> AsyncIterator[str]:
+        """Yields text chunks as the model produces them (server-sent events)."""
+        body = self.request_body(messages, generation_config)
+        session = self._get_session()
+        async with session.post(self._endpoint("streamGenerateContent"), params={"alt": "sse"}, json=body) as resp:
+            if resp.status != 200:
+                raise GeminiAPIError(resp.status, await resp.text())
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = json.loads(line[len("data:"):])
+                if not payload.get("candidates"):
+                    continue
+                text = self.extract_text(payload)
+                if text:
+                    yield text
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+
+# Default offline replies per prompt type. ``{field}`` placeholders are filled
+# from the values recovered from the formatted prompt.
+OFFLINE_RESPONSES = {
+    "witness_turn": [
+        "As I recall, regarding \"{question}\", I was doing my usual work that day and noticed nothing unusual.",
+        "I'm not sure what you want me to say about \"{question}\". I told the investigators everything I knew.",
+        "Honestly? About \"{question}\"... I'd have to think about it. It was a long time ago.",
+    ],
+    "judge_ruling": [
+        '{{"ruling": "Sustained", "reason": "The {objection_type} objection is well founded; counsel will rephrase."}}',
+        '{{"ruling": "Overruled", "reason": "The question does not raise a {objection_type} problem."}}',
+    ],
+    "jury_reaction": [
+        '{{"reaction": "positive", "sentiment_change": 1, "reason": "The {juror_personality} juror finds the {evidence_type} evidence convincing."}}',
+        '{{"reaction": "neutral", "sentiment_change": 0, "reason": "The {juror_personality} juror is unmoved."}}',
+        '{{"reaction": "negative", "sentiment_change": -1, "reason": "The {juror_personality} juror doubts the {evidence_type} evidence."}}',
+    ],
+    "opening_statement": [
+        "Ladies and gentlemen of the jury, the {role} will show you what really happened in {current_case_title}. "
+        "{current_case_summary} Our strategy is simple: {strategy}.",
+    ],
+    "testimony_summary": [
+        "So far {witness_name} has described their routine on the day in question and has not changed their account.",
+    ],
+    "closing_statement": [
+        "Ladies and gentlemen, you have seen the evidence in {current_case_title}: {evidence_presented}. "
+        "The {role} asks you to remember our strategy: {strategy}.",
+    ],
+}
+
+
+class _SafeFormatDict(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+class OfflineBackend(LLMBackend):
+    """Deterministic, network-free backend for tests, benchmarks and profiling.
+
+    The prompt type and its fields are recovered by matching the prompt text
+    against ``prompt_templates.json``; the reply is picked from canned or
+    templated outputs using a hash of the prompt, so identical prompts always
+    get identical replies. Latency is synthetic and configurable.
+    """
+
+    def __init__(self, prompt_templates: Optional[Dict[str, str]] = None, responses: Optional[Dict] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, chunk_delay_ms: float = 0.0,
+                 chunk_words: int = 4, seed: int = 0):
+        self.responses = dict(OFFLINE_RESPONSES, **(responses or {}))
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_delay_ms = chunk_delay_ms
+        self.chunk_words = max(1, chunk_words)
+        self.seed = seed
+        self.calls = 0
+        self._matchers = [(name, self._template_regex(template))
+                          for name, template in (prompt_templates or {}).items()]
+
+    @staticmethod
+    def _template_regex(template: str) -> "re.Pattern":
+        pattern, seen = [], set()
+        for literal, field, _, _ in string.Formatter().parse(template):
+            pattern.append(re.escape(literal))
+            if field is None:
+                continue
+            if field in seen:
+                pattern.append(f"(?P={field})")
+            else:
+                seen.add(field)
+                pattern.append(f"(?P<{field}>.*?)")
+        return re.compile("".join(pattern) + r"\s*$", re.DOTALL)
+
+    @staticmethod
+    def prompt_text(messages: List[Dict]) -> str:
+        return "\n".join(part.get("text", "") for message in messages
+                         for part in GeminiBackend.normalize_parts(message.get("parts", [])))
+
+    def classify(self, prompt: str) -> Tuple[Optional[str], Dict[str, str]]:
+        for name, matcher in self._matchers:
+            match = matcher.match(prompt)
+            if match:
+                return name, {k: v.strip() for k, v in match.groupdict().items()}
+        return None, {}
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}\0{prompt}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def render(self, messages: List[Dict]) -> str:
+        prompt = self.prompt_text(messages)
+        prompt_type, fields = self.classify(prompt)
+        if prompt_type is None and len(messages) > 1:
+            # Chat sessions: the system prefix and the latest turn are separate templates.
+            _, fields = self.classify(self.prompt_text(messages[:1]))
+            prompt_type, turn_fields = self.classify(self.prompt_text(messages[-1:]))
+            fields.update(turn_fields)
+        rng = self._rng(prompt)
+        options = self.responses.get(prompt_type)
+        if not options:
+            return f"[offline reply {rng.randrange(10 ** 6):06d}]"
+        return rng.choice(options).format_map(_SafeFormatDict(fields))
+
+    async def _sleep(self, milliseconds: float, rng: random.Random):
+        delay = milliseconds + (rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+    async def generate(self, messages: List[Dict], generation_config: Dict) -> str:
+        self.calls += 1
+        text = self.render(messages)
+        await self._sleep(self.latency_ms, self._rng(text))
+        return text
+
+    async def stream(self, messages: List[Dict], generation_config: Dict) -> AsyncIterator[str]:
+        self.calls += 1
+        text = self.render(messages)
+        rng = self._rng(text)
+        await self._sleep(self.latency_ms, rng)
+        words = text.split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            if i:
+                await self._sleep(self.chunk_delay_ms, rng)
+            chunk = " ".join(words[i:i + self.chunk_words])
+            yield chunk if i == 0 else " " + chunk
+
+
+def _load_prompt_templates(config: Dict) -> Dict[str, str]:
+    path = config.get("template_paths", {}).get("prompt_templates")
+    if not path:
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)["prompts"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+        logging.error(f"Offline backend could not load prompt templates: {e}")
+        return {}
+
+
+def _create_gemini(config: Dict) -> LLMBackend:
+    api_key = config.get("gemini_api_key")
+    if not api_key:
+        raise ValueError("Gemini API key not found. Please set it in config.json.")
+    return GeminiBackend(
+        api_key=api_key,
+        model=config.get("gemini_model", DEFAULT_MODEL),
+        pool_size=config.get("ai_connection_pool_size", 8),
+    )
+
+
+def _create_offline(config: Dict) -> LLMBackend:
+    settings = config.get("offline_backend", {})
+    return OfflineBackend(
+        prompt_templates=_load_prompt_templates(config),
+        responses=settings.get("responses"),
+        latency_ms=settings.get("latency_ms", 0.0),
+        jitter_ms=settings.get("jitter_ms", 0.0),
+        chunk_delay_ms=settings.get("chunk_delay_ms", 0.0),
+        chunk_words=settings.get("chunk_words", 4),
+        seed=settings.get("seed", 0),
+    )
+
+
+BACKENDS: Dict[str, Callable[[Dict], LLMBackend]] = {
+    "gemini": _create_gemini,
+    "offline": _create_offline,
+}
+
+
+def register_backend(name: str, factory: Callable[[Dict], LLMBackend]):
+    """Makes a custom backend selectable via ``"ai_backend": name`` in config.json."""
+    BACKENDS[name] = factory
+
+
+def create_backend(config: Dict) -> LLMBackend:
+    name = config.get("ai_backend", "gemini")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown AI backend '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](config)
@@ -0,0 +1,219 @@
+# ai_metrics.py
+import atexit
+import json
+import logging
+import math
+import os
+import signal
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+__all__ = ['LatencyHistogram', 'AIMetrics', 'metrics']
+
+# Bucket bounds used when exporting histograms in the Prometheus text format.
+PROMETHEUS_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations, in microsecond units.
+
+    Values below ``2 ** significant_bits`` µs are counted exactly; above that,
+    each power of two is split into ``2 ** (significant_bits - 1)`` linear
+    sub-buckets, so every recorded value keeps a relative error under
+    ``2 ** -(significant_bits - 1)`` (about 1.6% by default) from microseconds
+    to hours, in a few hundred buckets at most.
+    """
+
+    def __init__(self, significant_bits: int = 7):
+        self.significant_bits = significant_bits
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket(self, micros: int) -> Tuple[int, int]:
+        shift = max(0, micros.bit_length() - self.significant_bits)
+        return shift, micros >> shift
+
+    @staticmethod
+    def _bounds(bucket: Tuple[int, int]) -> Tuple[float, float]:
+        shift, sub = bucket
+        return (sub << shift) / 1e6, (((sub + 1) << shift) - 1) / 1e6
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        self.counts[self._bucket(round(seconds * 1e6))] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                low, high = self._bounds(bucket)
+                return min(max((low + high) / 2, self.min), self.max)
+        return self.max
+
+    def count_at_or_below(self, seconds: float) -> int:
+        return sum(count for bucket, count in self.counts.items() if self._bounds(bucket)[1] <= seconds)
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        result = {"count": self.count, "mean": round(self.total / self.count, 6),
+                  "min": round(self.min, 6), "max": round(self.max, 6)}
+        for quantile in QUANTILES:
+            result[f"p{quantile * 100:g}"] = round(self.percentile(quantile), 6)
+        return result
+
+class _PromptTypeMetrics:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.first_token = LatencyHistogram()
+        self.calls = 0
+        self.tiers: Counter = Counter()
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.retries = 0
+
+class AIMetrics:
+    """Per-call AI metrics tagged by prompt type, exportable as JSON or Prometheus text.
+
+    ``tier`` says where the reply came from: ``memory``/``disk`` (exact cache),
+    ``semantic``, ``coalesced`` (joined an identical in-flight request),
+    ``backend`` (a model call) or ``fallback`` (the model failed). Token counts
+    are local estimates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types: Dict[str, _PromptTypeMetrics] = defaultdict(_PromptTypeMetrics)
+        self.started_at = time.time()
+        self.snapshot_path: Optional[str] = None
+        self.snapshot_format = "json"
+        self._exit_hook = False
+
+    def record_call(self, prompt_type: Optional[str], tier: str, latency: float, first_token: Optional[float] = None,
+                    prompt_chars: int = 0, response_chars: int = 0, prompt_tokens: int = 0, response_tokens: int = 0):
+        with self._lock:
+            entry = self._types[prompt_type or "other"]
+            entry.calls += 1
+            entry.tiers[tier] += 1
+            entry.latency.record(latency)
+            entry.first_token.record(latency if first_token is None else first_token)
+            entry.prompt_chars += prompt_chars
+            entry.response_chars += response_chars
+            entry.prompt_tokens += prompt_tokens
+            entry.response_tokens += response_tokens
+
+    def record_retries(self, prompt_type: Optional[str], retries: int):
+        if retries:
+            with self._lock:
+                self._types[prompt_type or "other"].retries += retries
+
+    def reset(self):
+        with self._lock:
+            self._types.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "taken_at": time.time(),
+                "prompt_types": {
+                    prompt_type: {
+                        "calls": entry.calls,
+                        "tiers": dict(entry.tiers),
+                        "latency_seconds": entry.latency.summary(),
+                        "first_token_seconds": entry.first_token.summary(),
+                        "prompt_chars": entry.prompt_chars,
+                        "response_chars": entry.response_chars,
+                        "prompt_tokens_estimated": entry.prompt_tokens,
+                        "response_tokens_estimated": entry.response_tokens,
+                        "retries": entry.retries,
+                    }
+                    for prompt_type, entry in sorted(self._types.items())
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            types = sorted(self._types.items())
+            for name, attribute, help_text in (
+                    ("ai_call_latency_seconds", "latency", "Wall time of AI calls."),
+                    ("ai_call_first_token_seconds", "first_token", "Time to the first chunk of AI replies.")):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for prompt_type, entry in types:
+                    histogram = getattr(entry, attribute)
+                    label = f'prompt_type="{prompt_type}"'
+                    for bound in PROMETHEUS_BUCKETS:
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {histogram.count_at_or_below(bound)}')
+                    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{label}}} {histogram.total:.6f}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+            lines += ["# HELP ai_calls_total AI calls by prompt type and serving tier.", "# TYPE ai_calls_total counter"]
+            for prompt_type, entry in types:
+                for tier, count in sorted(entry.tiers.items()):
+                    lines.append(f'ai_calls_total{{prompt_type="{prompt_type}",tier="{tier}"}} {count}')
+            for name, attribute, help_text in (
+                    ("ai_prompt_tokens_total", "prompt_tokens", "Estimated prompt tokens."),
+                    ("ai_response_tokens_total", "response_tokens", "Estimated response tokens."),
+                    ("ai_prompt_chars_total", "prompt_chars", "Prompt size in characters."),
+                    ("ai_response_chars_total", "response_chars", "Response size in characters."),
+                    ("ai_retries_total", "retries", "Retried upstream attempts.")):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for prompt_type, entry in types:
+                    lines.append(f'{name}{{prompt_type="{prompt_type}"}} {getattr(entry, attribute)}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: Optional[str] = None, fmt: Optional[str] = None) -> Optional[str]:
+        """Writes the current metrics to ``path`` (JSON, or Prometheus text if ``fmt`` is "prometheus")."""
+        path = path or self.snapshot_path
+        fmt = fmt or self.snapshot_format
+        if not path:
+            return None
+        content = self.to_prometheus() if fmt == "prometheus" else json.dumps(self.snapshot(), indent=2)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.error(f"Error writing AI metrics snapshot: {e}")
+            return None
+        return path
+
+    def configure(self, config: Dict):
+        """Applies the "ai_metrics" config section; entry points call this to get a snapshot on exit."""
+        settings = config.get("ai_metrics", {})
+        if not settings.get("enabled", True):
+            return
+        self.snapshot_path = settings.get("snapshot_path")
+        self.snapshot_format = settings.get("format", "json")
+        if self.snapshot_path and not self._exit_hook:
+            atexit.register(self.write_snapshot)
+            self._exit_hook = True
+            # On demand from outside the process: ``kill -USR1 <pid>``.
+            if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGUSR1, self._on_snapshot_signal)
+
+    def _on_snapshot_signal(self, signum, frame) -> threading.Thread:
+        # The handler runs on the main thread, which may be inside record_call holding the lock; write elsewhere.
+        writer = threading.Thread(target=self.write_snapshot, name="ai-metrics-snapshot", daemon=True)
+        writer.start()
+        return writer
+
+metrics = AIMetrics()
@@ -1,49 +1,347 @@
 import os
-import google.generativeai as genai
+import asyncio
 import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from functools import lru_cache
+from ai_backends import create_backend
+from response_cache import AIResponseCache, template_version
+from semantic_cache import SemanticResponseCache
+from single_flight import SingleFlight
+from ai_resilience import ResilientBackend, FALLBACK_RESPONSES, track_retries
+from ai_metrics import metrics
+
+ERROR_PREFIX = "[Error generating response"
+
+def load_generation_profiles(path: Optional[str]) -> Dict[str, Dict]:
+    """Reads the per-prompt-type ``profiles`` section of prompt_templates.json."""
+    if not path:
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("profiles", {})
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logging.error(f"Error loading generation profiles: {e}")
+        return {}
+
+def generation_config_from_profile(profile: Dict) -> Dict:
+    """Translates a profile (token cap, temperature, stop sequences, output format) to a generationConfig."""
+    generation_config = {
+        "maxOutputTokens": profile["max_output_tokens"],
+        "temperature": profile["temperature"],
+    }
+    if profile.get("stop_sequences"):
+        generation_config["stopSequences"] = profile["stop_sequences"]
+    if profile.get("response_format") == "json":
+        generation_config["responseMimeType"] = "application/json"
+        if profile.get("response_schema"):
+            generation_config["responseSchema"] = profile["response_schema"]
+    return generation_config
+
+def parse_json_reply(text: str) -> Optional[Dict]:
+    """Parses a structured (JSON mode) reply; returns None for prose such as fallback replies."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.startswith("json"):
+            text = text[len("json"):]
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+class StreamFlight:
+    """The chunks of one shared upstream stream, for every caller following it."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        self._wake()
+
+    def _wake(self, *_):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self, task: asyncio.Task) -> AsyncIterator[str]:
+        """Yields every chunk so far, then each new one, until ``task`` (the stream) is done."""
+        task.add_done_callback(self._wake)
+        position = 0
+        while True:
+            while position < len(self.chunks):
+                position += 1
+                yield self.chunks[position - 1]
+            if task.done():
+                return
+            await self._changed.wait()
 
 class AIResponseManager:
     def __init__(self, config: Dict):
-        self.api_key = config["gemini_api_key"]
-        if not self.api_key:
-            raise ValueError("Gemini API key not found. Please set it in config.json.")
-        genai.configure(api_key=self.api_key)
         self.max_tokens = config.get("max_tokens", 8192)
-        self.model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        self.generation_config = genai.GenerationConfig(
-            max_output_tokens=self.max_tokens,
-            temperature=0.7,
+        self.backend = ResilientBackend.from_config(create_backend(config), config)
+        self.fallbacks = dict(FALLBACK_RESPONSES, **config.get("ai_resilience", {}).get("fallbacks", {}))
+        self.generation_config = {
+            "maxOutputTokens": self.max_tokens,
+            "temperature": 0.7,
+        }
+        # Per-prompt-type overrides of the default above (see "profiles" in prompt_templates.json).
+        default_profile = {"max_output_tokens": self.max_tokens, "temperature": 0.7}
+        self.generation_configs = {
+            prompt_type: generation_config_from_profile(dict(default_profile, **profile))
+            for prompt_type, profile in load_generation_profiles(
+                config.get("template_paths", {}).get("prompt_templates")).items()
+        }
+        cache_config = config.get("ai_cache", {})
+        self.cache = AIResponseCache(
+            path=cache_config.get("path"),
+            max_entries=cache_config.get("max_entries", 5000),
+            memory_entries=cache_config.get("memory_entries", 256),
+            ttl_seconds=cache_config.get("ttl_seconds"),
+            namespace=template_version(config.get("template_paths", {}).get("prompt_templates")),
         )
-        self.cache = AIResponseCache()
+        semantic_config = config.get("semantic_cache", {})
+        self.semantic_cache = None
+        if semantic_config.get("enabled", True):
+            self.semantic_cache = SemanticResponseCache(
+                threshold=semantic_config.get("threshold", 0.85),
+                max_entries_per_scope=semantic_config.get("max_entries_per_scope", 200),
+            )
+        self.inflight = SingleFlight()
+        self.streams: Dict[str, StreamFlight] = {}  # cache key -> upstream stream being shared
+        self.recorder = None
+        self.metrics = metrics  # Process-wide, so one snapshot covers every client
 
-    async def generate_response(self, messages: List[Dict]) -> str:
-        try:
-            cache_key = self.cache._get_cache_key(json.dumps(messages))
-            if cache_key in self.cache.cache:
-                return self.cache.cache[cache_key]
+    def request_key(self, messages: List[Dict]) -> str:
+        return self.cache.make_key(json.dumps(messages, sort_keys=True))
 
-            response = self.model.generate_content(
-                contents=messages,
-                generation_config=self.generation_config,
-            )
-            response_content = response.text.strip()
-            self.cache.cache[cache_key] = response_content
-            return response_content
+    def generation_config_for(self, prompt_type: Optional[str]) -> Dict:
+        return self.generation_configs.get(prompt_type, self.generation_config)
+
+    def prefetch(self, messages: List[Dict], semantic_scope: Optional[str] = None,
+                 semantic_query: Optional[str] = None, prompt_type: Optional[str] = None) -> Optional[asyncio.Task]:
+        """Starts generating ``messages`` in the background unless the reply is already cached.
+
+        The task is registered with the single-flight table, so a later
+        ``generate_response`` for the same prompt joins it instead of re-asking.
+        """
+        cache_key = self.request_key(messages)
+        if cache_key in self.cache:
+            return None
+        has_capacity = getattr(self.backend, "has_capacity", None)
+        if has_capacity is not None and not has_capacity():
+            # Never spend scarce quota (or hit an open circuit) on speculative work.
+            return None
+        if self.semantic_cache is None or not (semantic_scope and semantic_query):
+            semantic_scope = None
+        return self.inflight.start(
+            cache_key, lambda: self._fetch(messages, cache_key, semantic_scope, semantic_query, prompt_type)
+        )
+
+    def _failure_reply(self, prompt_type: Optional[str], error: Exception) -> str:
+        """Reply used when the model could not answer; these are never cached."""
+        if prompt_type in self.fallbacks:
+            return self.fallbacks[prompt_type]
+        return f"{ERROR_PREFIX}: {str(error)}]"
+
+    @staticmethod
+    def _cacheable(response: str) -> bool:
+        return bool(response) and not response.startswith(ERROR_PREFIX)
+
+    def _record(self, messages: List[Dict], response: str):
+        """Hands a successful reply to the session recorder, if one is attached."""
+        if self.recorder is not None and self._cacheable(response):
+            self.recorder.record_response(messages, response)
+
+    async def generate_response(self, messages: List[Dict], semantic_scope: Optional[str] = None,
+                                semantic_query: Optional[str] = None, prompt_type: Optional[str] = None) -> str:
+        """Returns the model's reply, trying the exact and then the semantic cache first.
 
+        ``semantic_scope``/``semantic_query`` opt a call into near-duplicate
+        matching, e.g. a witness persona and the player's raw question.
+        ``prompt_type`` selects the generation profile and the fallback reply
+        used if the model fails, and tags the call's metrics.
+        """
+        started = time.perf_counter()
+        use_semantic = self.semantic_cache is not None and semantic_scope and semantic_query
+        payload = json.dumps(messages, sort_keys=True)
+        try:
+            cache_key = self.cache.make_key(payload)
+            response, tier = self._cached(cache_key, semantic_scope if use_semantic else None, semantic_query)
+            if response is None:
+                tier = "coalesced" if self.inflight.pending(cache_key) else "backend"
+                # Identical prompts already on their way upstream share that one request.
+                response = await self.inflight.do(
+                    cache_key,
+                    lambda: self._fetch(messages, cache_key, semantic_scope if use_semantic else None,
+                                        semantic_query, prompt_type),
+                )
+            self._record(messages, response)
         except Exception as e:
             logging.error(f"Error generating response: {e}")
-            return f"[Error generating response: {str(e)}]"
+            response, tier = self._failure_reply(prompt_type, e), "fallback"
+        self._measure(prompt_type, tier, started, None, payload, response)
+        return response
+
+    def _cached(self, cache_key: str, semantic_scope: Optional[str],
+                semantic_query: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Looks ``cache_key`` up in the exact then the semantic cache; returns (reply, tier)."""
+        disk_hits = self.cache.disk_hits
+        response = self.cache.get(cache_key)
+        if response is not None:
+            return response, "disk" if self.cache.disk_hits > disk_hits else "memory"
+        if semantic_scope:
+            response = self.semantic_cache.lookup(semantic_scope, semantic_query)
+            if response is not None:
+                return response, "semantic"
+        return None, None
+
+    def _measure(self, prompt_type: Optional[str], tier: str, started: float, first_token_at: Optional[float],
+                 payload: str, response: str):
+        finished = time.perf_counter()
+        self.metrics.record_call(
+            prompt_type, tier, finished - started,
+            first_token=None if first_token_at is None else first_token_at - started,
+            prompt_chars=len(payload), response_chars=len(response),
+            prompt_tokens=estimate_tokens(payload), response_tokens=estimate_tokens(response),
+        )
+
+    async def stream_response(self, messages: List[Dict], semantic_scope: Optional[str] = None,
+                              semantic_query: Optional[str] = None,
+                              prompt_type: Optional[str] = None) -> AsyncIterator[str]:
+        """Like ``generate_response`` but yields the reply in chunks as it arrives.
+
+        The upstream stream runs as a shared single-flight task: other streams
+        for the same prompt follow it chunk by chunk, and ``generate_response``
+        or a prefetch for it get the full text. Cache hits and non-streaming
+        requests already in flight are yielded as a single chunk. The complete
+        text is cached exactly as ``generate_response`` would.
+        """
+        use_semantic = self.semantic_cache is not None and semantic_scope and semantic_query
+        semantic_scope = semantic_scope if use_semantic else None
+        payload = json.dumps(messages, sort_keys=True)
+        cache_key = self.cache.make_key(payload)
+        flight = self.streams.get(cache_key)
+        if flight is None and self.inflight.pending(cache_key):
+            # Joining the in-flight request records its own metrics.
+            yield await self.generate_response(messages, semantic_scope, semantic_query, prompt_type)
+            return
+        started = time.perf_counter()
+        if flight is None:
+            cached, tier = self._cached(cache_key, semantic_scope, semantic_query)
+            if cached is not None:
+                self._record(messages, cached)
+                self._measure(prompt_type, tier, started, None, payload, cached)
+                yield cached
+                return
+            flight = self.streams[cache_key] = StreamFlight()
+            tier = "backend"
+        else:
+            tier = "coalesced"
+        task = self.inflight.start(
+            cache_key, lambda: self._stream_fetch(messages, cache_key, flight, semantic_scope, semantic_query,
+                                                  prompt_type))
+
+        first_token_at = None
+        sent = 0
+        try:
+            with self.inflight.waiting(cache_key):
+                async for chunk in flight.follow(task):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    sent += 1
+                    yield chunk
+        finally:
+            # A reader that stopped early (e.g. its window closed) stops the upstream call if nobody else follows it.
+            if not task.done():
+                self.inflight.cancel_unwaited(cache_key)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # A partially streamed reply is left as is (and not cached); otherwise fall back.
+            if not sent:
+                reply = self._failure_reply(prompt_type, error)
+                self._measure(prompt_type, "fallback", started, None, payload, reply)
+                yield reply
+            else:
+                self._measure(prompt_type, tier, started, first_token_at, payload, "".join(flight.chunks))
+            return
+        self._measure(prompt_type, tier, started, first_token_at, payload, task.result())
+
+    async def _stream_fetch(self, messages: List[Dict], cache_key: str, flight: "StreamFlight",
+                            semantic_scope: Optional[str], semantic_query: Optional[str],
+                            prompt_type: Optional[str] = None) -> str:
+        """Runs one upstream stream into ``flight`` and returns (and caches) the complete reply."""
+        retries = track_retries()  # Runs in its own task, so the counter is private to this call.
+        try:
+            async for chunk in self.backend.stream(messages, self.generation_config_for(prompt_type)):
+                if not flight.chunks:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                flight.publish(chunk)
+        except Exception as e:
+            logging.error(f"Error streaming response: {e}")
+            raise
+        finally:
+            self.metrics.record_retries(prompt_type, retries[0])
+            if self.streams.get(cache_key) is flight:
+                del self.streams[cache_key]
+        response_content = "".join(flight.chunks).strip()
+        if not self._cacheable(response_content):
+            return response_content
+        self._record(messages, response_content)
+        self.cache.set(cache_key, response_content)
+        if semantic_scope:
+            self.semantic_cache.store(semantic_scope, semantic_query, response_content)
+        return response_content
+
+    async def _fetch(self, messages: List[Dict], cache_key: str, semantic_scope: Optional[str],
+                     semantic_query: Optional[str], prompt_type: Optional[str] = None) -> str:
+        retries = track_retries()  # Runs in its own task, so the counter is private to this call.
+        try:
+            response = await self.backend.generate(messages, self.generation_config_for(prompt_type))
+        finally:
+            self.metrics.record_retries(prompt_type, retries[0])
+        response_content = response.strip()
+        if not self._cacheable(response_content):
+            return response_content
+        self._record(messages, response_content)
+        self.cache.set(cache_key, response_content)
+        if semantic_scope:
+            self.semantic_cache.store(semantic_scope, semantic_query, response_content)
+        return response_content
+
+    async def close(self):
+        await self.backend.close()
+        self.cache.close()
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (about four characters per token for English prose)."""
+    return max(1, (len(text) + 3) // 4) if text else 0
 
 class ChatGPT:
     def __init__(self, config: Dict):
         self.ai_manager = AIResponseManager(config)
 
-    async def get_response(self, messages: List[Dict]) -> str:
-        return await self.ai_manager.generate_response(messages)
+    async def get_response(self, messages: List[Dict], **options) -> str:
+        return await self.ai_manager.generate_response(messages, **options)
+
+    async def stream_response(self, messages: List[Dict], **options) -> AsyncIterator[str]:
+        async for chunk in self.ai_manager.stream_response(messages, **options):
+            yield chunk
+
+    def write_metrics(self, path: Optional[str] = None, fmt: Optional[str] = None) -> Optional[str]:
+        """Writes an AI metrics snapshot now (JSON, or Prometheus text with ``fmt="prometheus"``)."""
+        return self.ai_manager.metrics.write_snapshot(path, fmt)
+
+    async def close(self):
+        await self.ai_manager.close()
 
 class PromptManager:
     def __init__(self):
@@ -110,10 +408,3 @@ Provide a ruling (Sustained/Overruled) with a brief explanation.
                 instructions.append("Provide misleading or false information when you think it benefits you or the person you are protecting. Do not contradict previous statements if possible.")
 
         return " ".join(instructions)
-
-class AIResponseCache:
-    def __init__(self):
-        self.cache = {}
-
-    def _get_cache_key(self, prompt: str) -> str:
-        return hashlib.md5(prompt.encode()).hexdigest()
\ No newline at end of file
@@ -0,0 +1,57 @@
+# ai_registry.py
+import json
+import threading
+from typing import Dict
+from ai_module import ChatGPT
+from prompt_manager import GamePromptManager
+
+__all__ = ['AIRegistry', 'registry', 'get_chat_client', 'get_prompt_manager']
+
+class AIRegistry:
+    """Process-wide registry of AI clients and prompt managers.
+
+    Witnesses, the judge and the game all ask the registry instead of building
+    their own ``ChatGPT``, so a case shares one connection pool, one response
+    cache and one parsed copy of the prompt templates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, ChatGPT] = {}
+        self._prompt_managers: Dict[str, GamePromptManager] = {}
+
+    @staticmethod
+    def _fingerprint(config: Dict) -> str:
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def get_client(self, config: Dict) -> ChatGPT:
+        key = self._fingerprint(config)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = ChatGPT(config)
+                self._clients[key] = client
+            return client
+
+    def get_prompt_manager(self, config: Dict) -> GamePromptManager:
+        key = config["template_paths"].get("prompt_templates", "")
+        with self._lock:
+            manager = self._prompt_managers.get(key)
+            if manager is None:
+                manager = GamePromptManager(config)
+                self._prompt_managers[key] = manager
+            return manager
+
+    def clear(self):
+        """Drops every registered instance (used by tests and after config changes)."""
+        with self._lock:
+            self._clients.clear()
+            self._prompt_managers.clear()
+
+registry = AIRegistry()
+
+def get_chat_client(config: Dict) -> ChatGPT:
+    return registry.get_client(config)
+
+def get_prompt_manager(config: Dict) -> GamePromptManager:
+    return registry.get_prompt_manager(config)
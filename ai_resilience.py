@@ -0,0 +1,260 @@
+# ai_resilience.py
+import asyncio
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from ai_backends import GeminiAPIError, LLMBackend
+
+__all__ = ['TokenBucket', 'CircuitBreaker', 'CircuitOpenError', 'RetryPolicy', 'ResilientBackend',
+           'is_retryable', 'FALLBACK_RESPONSES', 'track_retries']
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# In-character replies used when the model is unavailable; never cached.
+FALLBACK_RESPONSES = {
+    "witness_testimony": "I... I'm sorry, could you give me a moment? I need to collect my thoughts before I answer that.",
+    "judge_ruling": "Overruled. The court will allow the question for now.",
+    "opening_statement": "Ladies and gentlemen of the jury, over the course of this trial you will hear the evidence "
+                         "and the testimony of the witnesses. We ask only that you weigh it carefully and fairly.",
+    "closing_statement": "Ladies and gentlemen, you have heard the evidence. We trust you to weigh it carefully "
+                         "and to reach a just verdict.",
+}
+
+# Per-call retry counter; set by ``track_retries`` in the task making the call.
+_call_retries: ContextVar[Optional[List[int]]] = ContextVar("ai_call_retries", default=None)
+
+def track_retries() -> List[int]:
+    """Starts counting retries for calls made from the current context; returns the ``[count]`` cell."""
+    counter = [0]
+    _call_retries.set(counter)
+    return counter
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open."""
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, GeminiAPIError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError))
+
+class TokenBucket:
+    """Token-bucket rate limiter sized to the model's requests-per-minute quota.
+
+    Callers reserve a token up front (the balance may go negative) and sleep
+    for however long it takes to refill, so waiters are served in order without
+    a loop-bound lock.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    async def acquire(self, deadline_at: Optional[float] = None):
+        """Waits for a token; raises ``asyncio.TimeoutError`` at once if it would not arrive by ``deadline_at``."""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            wait = -self.tokens / self.rate
+            if deadline_at is not None and time.monotonic() + wait >= deadline_at:
+                self.tokens += 1  # Give the reservation back for callers that can wait
+                raise asyncio.TimeoutError("AI request deadline exceeded waiting for the rate limit")
+            await asyncio.sleep(wait)
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures and fails fast until ``reset_timeout`` passes.
+
+    Then it lets a single probe request through (half-open) and keeps
+    rejecting the rest until that probe succeeds, closing it, or fails,
+    opening it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.probing = False  # A half-open probe is in flight
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self.probing:
+                return False
+            self.probing = True
+        return True
+
+    def release(self):
+        """Ends an attempt; a probe that got no verdict (cancelled, or a client error) lets the next one through."""
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                logging.warning(f"AI circuit breaker opened after {self.failures} failures.")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Private RNG so retries never perturb the game's seeded global random stream.
+        self._random = random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) attempt."""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class ResilientBackend(LLMBackend):
+    """Wraps a backend with rate limiting, retries, deadlines and a circuit breaker."""
+
+    def __init__(self, backend, limiter: Optional[TokenBucket] = None, breaker: Optional[CircuitBreaker] = None,
+                 retry: Optional[RetryPolicy] = None, deadline: float = 60.0):
+        self.backend = backend
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.retry = retry or RetryPolicy()
+        self.deadline = deadline
+        self.retries = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, backend, config: Dict) -> "ResilientBackend":
+        settings = config.get("ai_resilience", {})
+        limiter = None
+        if settings.get("requests_per_minute") and getattr(backend, "rate_limited", False):
+            limiter = TokenBucket(settings["requests_per_minute"], settings.get("burst", 5))
+        return cls(
+            backend,
+            limiter=limiter,
+            breaker=CircuitBreaker(settings.get("failure_threshold", 5), settings.get("reset_timeout", 30.0)),
+            retry=RetryPolicy(settings.get("max_attempts", 4), settings.get("base_delay", 0.5),
+                              settings.get("max_delay", 8.0)),
+            deadline=settings.get("deadline_seconds", 60.0),
+        )
+
+    def has_capacity(self) -> bool:
+        """True if a speculative request could run now without queueing behind the quota."""
+        if self.breaker.state == CircuitBreaker.OPEN or self.breaker.probing:
+            return False
+        return self.limiter is None or self.limiter.available() >= 1
+
+    async def _before_attempt(self, deadline_at: float):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("AI backend temporarily unavailable (circuit open)")
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire(deadline_at)
+            if time.monotonic() >= deadline_at:
+                raise asyncio.TimeoutError("AI request deadline exceeded")
+        except BaseException:
+            self.breaker.release()
+            raise
+
+    async def _after_failure(self, error: BaseException, attempt: int, deadline_at: float) -> bool:
+        """Records a failed attempt and sleeps before the next one; returns False to give up."""
+        if not is_retryable(error):
+            raise error
+        self.breaker.record_failure()
+        delay = self.retry.delay(attempt)
+        if attempt >= self.retry.max_attempts or time.monotonic() + delay >= deadline_at \
+                or self.breaker.state == CircuitBreaker.OPEN:
+            return False
+        logging.warning(f"Retrying AI request after error ({error}); attempt {attempt + 1} in {delay:.2f}s")
+        self.retries += 1
+        counter = _call_retries.get()
+        if counter is not None:
+            counter[0] += 1
+        await asyncio.sleep(delay)
+        return True
+
+    async def generate(self, messages: List[Dict], generation_config: Dict) -> str:
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._before_attempt(deadline_at)
+            try:
+                result = await asyncio.wait_for(self.backend.generate(messages, generation_config),
+                                                deadline_at - time.monotonic())
+            except Exception as e:
+                if not await self._after_failure(e, attempt, deadline_at):
+                    raise
+                continue
+            finally:
+                self.breaker.release()
+            self.breaker.record_success()
+            return result
+
+    async def stream(self, messages: List[Dict], generation_config: Dict) -> AsyncIterator[str]:
+        """Streams with the same protections; retries only happen before the first chunk."""
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._before_attempt(deadline_at)
+            stream = self.backend.stream(messages, generation_config)
+            yielded = False
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline_at - time.monotonic())
+                    except StopAsyncIteration:
+                        break
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                if yielded or not await self._after_failure(e, attempt, deadline_at):
+                    if yielded and is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                continue
+            finally:
+                try:
+                    await stream.aclose()
+                finally:
+                    self.breaker.release()
+            self.breaker.record_success()
+            return
+
+    def stats(self) -> Dict:
+        return {"retries": self.retries, "rejected": self.rejected, "breaker_state": self.breaker.state,
+                "breaker_trips": self.breaker.trips}
+
+    async def close(self):
+        await self.backend.close()
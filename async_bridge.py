@@ -0,0 +1,184 @@
+# async_bridge.py
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+from functools import partial
+from typing import Any, Callable, Coroutine, Dict, Optional, Set
+
+__all__ = ['AsyncBridge', 'bridge']
+
+class AsyncBridge:
+    """One long-lived asyncio loop on a worker thread, shared by every UI request.
+
+    ``submit`` schedules a coroutine on the loop and returns a
+    ``concurrent.futures.Future`` straight away, so the Tk mainloop never
+    blocks and several requests can run at once. Tk is not thread-safe, so
+    nothing touches widgets from the worker: ``on_done`` callbacks and
+    ``ui_callback`` wrappers are queued and run on the Tk thread by an
+    ``after()`` poll (``attach``). Futures submitted with an ``owner`` widget
+    are cancelled when that widget is destroyed.
+    """
+
+    def __init__(self, poll_ms: int = 20, shutdown_timeout: float = 5.0):
+        self.poll_ms = poll_ms
+        self.shutdown_timeout = shutdown_timeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ui_calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._owned: Dict[Any, Set[concurrent.futures.Future]] = {}
+        self._roots: Set[Any] = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def configure(self, config: Dict):
+        bridge_config = config.get("async_bridge", {})
+        self.poll_ms = bridge_config.get("poll_ms", self.poll_ms)
+        self.shutdown_timeout = bridge_config.get("shutdown_timeout", self.shutdown_timeout)
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                ready = threading.Event()
+                self.loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_loop, args=(self.loop, ready),
+                                                name="async-bridge", daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self.loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def submit(self, coro: Coroutine, on_done: Optional[Callable[[concurrent.futures.Future], None]] = None,
+               owner=None) -> concurrent.futures.Future:
+        """Runs ``coro`` on the loop; ``on_done(future)`` is later called on the UI thread."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.start())
+        with self._lock:
+            self.submitted += 1
+            if owner is not None:
+                if owner not in self._owned:
+                    self._owned[owner] = set()
+                    self._watch(owner)
+                self._owned[owner].add(future)
+        future.add_done_callback(partial(self._finished, on_done=on_done, owner=owner))
+        return future
+
+    def _watch(self, owner):
+        if hasattr(owner, "bind"):
+            # <Destroy> also fires for each child of a Toplevel; only the owner itself counts.
+            owner.bind("<Destroy>", lambda event: event.widget is owner and self.cancel_owned(owner), add="+")
+
+    def _finished(self, future: concurrent.futures.Future, on_done=None, owner=None):
+        with self._lock:
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            if owner is not None and owner in self._owned:
+                self._owned[owner].discard(future)
+                if not self._owned[owner]:
+                    del self._owned[owner]
+        if on_done is not None:
+            self.call_soon_ui(on_done, future)
+
+    def pending(self, owner=None) -> int:
+        with self._lock:
+            if owner is not None:
+                return len(self._owned.get(owner, ()))
+            return self.submitted - self.completed - self.failed - self.cancelled
+
+    def cancel_owned(self, owner) -> int:
+        with self._lock:
+            futures = list(self._owned.get(owner, ()))
+        for future in futures:
+            future.cancel()
+        return len(futures)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Runs ``coro`` on the loop and blocks for its result; for shutdown paths only."""
+        return asyncio.run_coroutine_threadsafe(coro, self.start()).result(timeout)
+
+    def call_soon_ui(self, callback: Callable, *args):
+        """Queues ``callback(*args)`` to run on the UI thread; safe to call from any thread."""
+        self._ui_calls.put((callback, args))
+
+    def ui_callback(self, callback: Callable) -> Callable:
+        """Wraps ``callback`` so calls from the loop thread are replayed on the UI thread."""
+        return partial(self.call_soon_ui, callback)
+
+    def drain(self) -> int:
+        """Runs every queued UI callback; returns how many ran."""
+        ran = 0
+        while True:
+            try:
+                callback, args = self._ui_calls.get_nowait()
+            except queue.Empty:
+                return ran
+            ran += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"Error in UI callback {getattr(callback, '__name__', callback)}: {e}")
+
+    def attach(self, root):
+        """Starts draining UI callbacks from ``root``'s mainloop every ``poll_ms``."""
+        self.start()
+        if root not in self._roots:
+            self._roots.add(root)
+            root.after(self.poll_ms, self._poll, root)
+
+    def _poll(self, root):
+        self.drain()
+        try:
+            root.after(self.poll_ms, self._poll, root)
+        except Exception:
+            self._roots.discard(root)  # the window has been destroyed
+
+    def stop(self, timeout: Optional[float] = None):
+        """Cancels whatever is still running and shuts the loop and its thread down."""
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            self.loop = self._thread = None
+        if loop is None:
+            return
+        timeout = self.shutdown_timeout if timeout is None else timeout
+
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), loop).result(timeout)
+        except Exception as e:
+            logging.error(f"Error cancelling background tasks: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "running": self.submitted - self.completed - self.failed - self.cancelled,
+            }
+
+    def log_stats(self):
+        logging.info(f"Background AI requests: {self.stats()}")
+
+bridge = AsyncBridge()
@@ -0,0 +1,250 @@
+# autosave.py
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from data_management import atomic_write
+from state_management import GameState, GameSerializer
+
+__all__ = ['AutosaveService', 'CaseFile', 'SaveSnapshot']
+
+SLOT_VERSION = 1
+
+class SaveSnapshot:
+    """What one save needs, captured on the game thread.
+
+    Completed cases are kept by reference: they no longer change, and each is
+    encoded once per slot. The active case is copied into plain data here
+    (cheap next to encoding and writing it) because the game keeps changing it.
+    """
+
+    def __init__(self, game_state: GameState, active_case, serializer: GameSerializer):
+        self.header = {
+            "version": SLOT_VERSION,
+            "phase": game_state.current_phase.name,
+            "reputation": game_state.player_reputation,
+            "unlocked_cases": game_state.unlocked_cases,
+            "completed_cases": [case.case_id for case in game_state.completed_cases],
+            "current_case": active_case.case_id if active_case is not None else None,
+        }
+        self.completed_cases = list(game_state.completed_cases)
+        self.active_case = serializer._serialize_case(active_case) if active_case is not None else None
+
+class CaseFile:
+    """Reads one completed case of a slot when called, so loading a slot only reads its header."""
+
+    def __init__(self, path: str, case_id: str):
+        self.path = path
+        self.case_id = case_id
+
+    def __call__(self) -> Dict:
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+class AutosaveService:
+    """Saves the game to slot directories from a background thread.
+
+    A slot is ``<directory>/<slot>/``: ``state.json`` (phase, reputation and
+    the ids of the cases), one ``cases/<case_id>.json`` per completed case and
+    ``active-<case_id>.json`` for the case in progress. Completed case files
+    are written once and never re-encoded; the active case and the header are
+    rewritten only when their encoding changed. Every file is replaced
+    atomically and ``state.json`` is written last, so a crash leaves the
+    previous save intact.
+
+    ``watch(game)`` snapshots the game on every phase transition. Snapshots
+    for one slot are coalesced: only the newest is written.
+    """
+
+    def __init__(self, serializer: GameSerializer, directory: str = "saves", slot: str = "autosave",
+                 enabled: bool = True):
+        self.serializer = serializer
+        self.enabled = enabled  # Only turns off autosaving; explicit saves to slots still work
+        self.directory = directory
+        self.slot = slot
+        self._lock = threading.Condition()
+        self._pending: Dict[str, SaveSnapshot] = {}
+        self._callbacks: Dict[str, List[Callable[[bool], None]]] = {}  # slot -> called once its save is written
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._exit_hook = False
+        self._written_cases: Dict[str, set] = {}  # slot -> completed case ids on disk
+        self._last: Dict[str, Dict[str, bytes]] = {}  # slot -> file name -> last bytes written
+        self.saves = 0
+        self.sections_written = 0
+        self.sections_skipped = 0
+        self.errors = 0
+        self.last_save_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict, serializer: GameSerializer) -> "AutosaveService":
+        autosave_config = config.get("autosave", {})
+        return cls(serializer, directory=autosave_config.get("directory", "saves"),
+                   slot=autosave_config.get("slot", "autosave"), enabled=autosave_config.get("enabled", True))
+
+    def slot_path(self, slot: Optional[str] = None) -> str:
+        return os.path.join(self.directory, slot or self.slot)
+
+    def slots(self) -> List[str]:
+        """Names of the slots that hold a complete save."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.exists(os.path.join(self.directory, name, "state.json")))
+
+    def watch(self, game):
+        """Autosaves ``game`` whenever its state changes phase (call again after replacing ``game.state``)."""
+        if self.enabled:
+            game.state.event_manager.subscribe("phase_changed", lambda event: self.request(game))
+
+    def request(self, game, slot: Optional[str] = None, on_saved: Optional[Callable[[bool], None]] = None):
+        """Snapshots ``game`` now and writes it in the background.
+
+        ``on_saved(ok)`` is called on the writer thread once the snapshot (or a
+        newer one for the same slot) is on disk, or failed to save.
+        """
+        snapshot = SaveSnapshot(game.state, game.current_case, self.serializer)
+        with self._lock:
+            self._pending[slot or self.slot] = snapshot
+            if on_saved is not None:
+                self._callbacks.setdefault(slot or self.slot, []).append(on_saved)
+            self._start()
+            self._lock.notify_all()
+
+    def save(self, game, slot: Optional[str] = None, timeout: Optional[float] = 10.0) -> bool:
+        """Saves ``game`` to ``slot`` and waits for it to be on disk."""
+        self.request(game, slot)
+        return self.flush(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every requested save is written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        self.flush(timeout)
+        with self._lock:
+            self._stopping = True
+            self._lock.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+            self._thread.start()
+            if not self._exit_hook:
+                atexit.register(self.close)
+                self._exit_hook = True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopping:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+                slot = next(iter(self._pending))
+                snapshot = self._pending.pop(slot)
+                callbacks = self._callbacks.pop(slot, [])
+                self._busy = True
+            ok = False
+            try:
+                self._write(slot, snapshot)
+                ok = True
+            except (OSError, TypeError, ValueError) as e:
+                self.errors += 1
+                logging.error(f"Error autosaving to slot {slot}: {e}")
+            finally:
+                for callback in callbacks:
+                    try:
+                        callback(ok)
+                    except Exception as e:
+                        logging.error(f"Error in save callback for slot {slot}: {e}")
+                with self._lock:
+                    self._busy = False
+                    self._lock.notify_all()
+
+    def _write_section(self, slot: str, name: str, data: bytes):
+        last = self._last.setdefault(slot, {})
+        if last.get(name) == data:
+            self.sections_skipped += 1
+            return
+        atomic_write(os.path.join(self.slot_path(slot), name), data)
+        last[name] = data
+        self.sections_written += 1
+
+    def _written(self, slot: str) -> set:
+        if slot not in self._written_cases:
+            cases_dir = os.path.join(self.slot_path(slot), "cases")
+            self._written_cases[slot] = ({name[:-5] for name in os.listdir(cases_dir) if name.endswith(".json")}
+                                         if os.path.isdir(cases_dir) else set())
+        return self._written_cases[slot]
+
+    def _write(self, slot: str, snapshot: SaveSnapshot):
+        start = time.perf_counter()
+        os.makedirs(os.path.join(self.slot_path(slot), "cases"), exist_ok=True)
+        written = self._written(slot)
+        for case in snapshot.completed_cases:
+            if case.case_id in written:
+                self.sections_skipped += 1
+                continue
+            data = json.dumps(self.serializer._serialize_case(case)).encode("utf-8")
+            atomic_write(os.path.join(self.slot_path(slot), "cases", f"{case.case_id}.json"), data)
+            written.add(case.case_id)
+            self.sections_written += 1
+        active = f"active-{snapshot.header['current_case']}.json" if snapshot.active_case is not None else None
+        if active:
+            self._write_section(slot, active, json.dumps(snapshot.active_case).encode("utf-8"))
+        header = dict(snapshot.header, active_file=active)
+        self._write_section(slot, "state.json", json.dumps(header).encode("utf-8"))
+        # The header no longer points at older active-case files (or, after a new career, at old cases).
+        if len(written) > len(snapshot.completed_cases):
+            for case_id in written - set(snapshot.header["completed_cases"]):
+                os.remove(os.path.join(self.slot_path(slot), "cases", f"{case_id}.json"))
+            written &= set(snapshot.header["completed_cases"])
+        for name in os.listdir(self.slot_path(slot)):
+            if name.startswith("active-") and name.endswith(".json") and name != active:
+                os.remove(os.path.join(self.slot_path(slot), name))
+                self._last[slot].pop(name, None)
+        self.saves += 1
+        self.last_save_seconds = time.perf_counter() - start
+
+    def read_slot(self, slot: Optional[str] = None) -> Dict:
+        """The slot as a ``save_game.json``-style state dict; completed cases are ``CaseFile`` readers."""
+        self.flush()
+        path = self.slot_path(slot)
+        with open(os.path.join(path, "state.json"), "r") as f:
+            header = json.load(f)
+        completed = [CaseFile(os.path.join(path, "cases", f"{case_id}.json"), case_id)
+                     for case_id in header["completed_cases"]]
+        current = None
+        if header.get("active_file"):
+            with open(os.path.join(path, header["active_file"]), "r") as f:
+                current = json.load(f)
+        return {"phase": header["phase"], "reputation": header["reputation"], "completed_cases": completed,
+                "current_case": current, "unlocked_cases": header.get("unlocked_cases", 1)}
+
+    def load(self, slot: Optional[str], case_factory) -> GameState:
+        return self.serializer.restore_game_state(
+            self.read_slot(slot), case_factory, case_factory.witness_factory, case_factory.evidence_factory,
+            case_factory.relationship_network, case_factory.backstory_generator)
+
+    def stats(self) -> Dict:
+        return {"saves": self.saves, "sections_written": self.sections_written,
+                "sections_skipped": self.sections_skipped, "errors": self.errors,
+                "last_save_ms": round(1000 * self.last_save_seconds, 2)}
+
+    def log_stats(self):
+        logging.info(f"Autosave: {self.stats()}")
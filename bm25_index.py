@@ -0,0 +1,83 @@
+# bm25_index.py
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from semantic_cache import normalize_question
+
+__all__ = ['BM25Index']
+
+class BM25Index:
+    """Small incremental BM25 index over a witness's question/answer exchanges.
+
+    Each exchange is one document (question and answer text together). Adding
+    an exchange only touches the postings of its own terms, and a search only
+    walks the postings of the query terms, so both stay in the microsecond
+    range for a whole examination. ``to_dict``/``from_dict`` round-trip the
+    postings, so a loaded game does not have to re-tokenize anything. The
+    documents themselves are not saved: the witness's testimony already holds
+    them and is passed back to ``from_dict``.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: List[Tuple[str, str]] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, question: str, answer: str) -> int:
+        doc_id = len(self.docs)
+        terms = Counter(normalize_question(f"{question} {answer}"))
+        self.docs.append((question, answer))
+        self.lengths.append(sum(terms.values()))
+        self.total_length += self.lengths[-1]
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        return doc_id
+
+    def extend(self, exchanges: Iterable[Tuple[str, str]]):
+        for question, answer in exchanges:
+            self.add(question, answer)
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, int]]:
+        """Returns up to ``k`` (score, doc_id) pairs, best first; documents sharing no term are skipped."""
+        if not self.docs:
+            return []
+        doc_count = len(self.docs)
+        average_length = self.total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(normalize_question(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(((score, doc_id) for doc_id, score in scores.items()), key=lambda item: (-item[0], item[1]))
+        return ranked[:k]
+
+    def to_dict(self) -> Dict:
+        return {
+            "lengths": list(self.lengths),
+            "postings": {term: [[doc_id, frequency] for doc_id, frequency in postings.items()]
+                         for term, postings in self.postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, docs: Iterable[Tuple[str, str]]) -> "BM25Index":
+        """Restores an index saved by ``to_dict``; ``docs`` are its exchanges, in the order they were added."""
+        index = cls()
+        index.docs = [tuple(doc) for doc in docs]
+        if len(index.docs) != len(data.get("lengths", [])):
+            raise ValueError(f"Index covers {len(data.get('lengths', []))} exchanges, got {len(index.docs)}")
+        index.lengths = list(data.get("lengths", []))
+        index.total_length = sum(index.lengths)
+        index.postings = {term: {doc_id: frequency for doc_id, frequency in postings}
+                          for term, postings in data.get("postings", {}).items()}
+        return index
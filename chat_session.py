@@ -0,0 +1,34 @@
+# chat_session.py
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from witness_context import clip_to_tokens
+
+__all__ = ['ChatSession']
+
+class ChatSession:
+    """A persistent multi-turn conversation behind a fixed system prefix.
+
+    The system message is formatted once and the same object is reused for
+    every request; each new question is sent as one user turn after the last
+    ``max_turns`` question/answer turns. Older turns are left to the caller's
+    summary (see ``WitnessContextBudget``), so requests stay the same size
+    however long the conversation runs.
+    """
+
+    def __init__(self, system_prompt: str, max_turns: int = 3, turn_tokens: int = 200):
+        self.system = {"role": "system", "parts": [{"text": system_prompt}]}
+        self.turn_tokens = turn_tokens
+        self.turns: deque = deque(maxlen=max(1, max_turns) * 2)
+
+    def messages(self, user_text: str) -> List[Dict]:
+        return [self.system, *self.turns, {"role": "user", "parts": [{"text": user_text}]}]
+
+    def add_exchange(self, question: str, answer: str):
+        self.turns.append({"role": "user", "parts": [{"text": question}]})
+        self.turns.append({"role": "model", "parts": [{"text": clip_to_tokens(answer, self.turn_tokens)}]})
+
+    def load(self, exchanges: Iterable[Tuple[str, str]]):
+        self.turns.clear()
+        for question, answer in exchanges:
+            self.add_exchange(question, answer)
@@ -1,13 +1,362 @@
+import atexit
 import json
 import os
+import queue
+import threading
+import time
+from array import array
+from collections import Counter
+from collections.abc import Sequence
 from datetime import datetime
 import logging
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+from log_pipeline import configure_logging
+
+READ_CHUNK = 1 << 20
+
+def backup_path(path: str, number: int) -> str:
+    return path if number == 0 else f"{path}.{number}"
+
+class EventLogWriter:
+    """Appends lines to log files from one background thread.
+
+    ``write`` only queues the line. The thread batches whatever is queued
+    into buffered files, flushes them every ``flush_interval`` seconds and
+    fsyncs every ``fsync_interval``. A file that would grow past
+    ``max_bytes`` is rotated first (``path`` -> ``path.1`` -> ... up to
+    ``backups``); ``rotations`` counts how often each path was rotated so
+    readers can follow their segments to the renamed files.
+    """
+
+    def __init__(self, flush_interval: float = 0.5, fsync_interval: float = 5.0,
+                 max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.RLock()
+        self.rotations: Counter = Counter()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._files: Dict[str, object] = {}
+        self._dirty = set()
+        self._unsynced = set()
+        self._exit_hook = False
+        self.lines_written = 0
+
+    def configure(self, settings: Dict):
+        self.flush_interval = settings.get("flush_interval", self.flush_interval)
+        self.fsync_interval = settings.get("fsync_interval", self.fsync_interval)
+        self.max_bytes = settings.get("max_bytes", self.max_bytes)
+        self.backups = settings.get("backups", self.backups)
+
+    def _start(self):
+        with self.lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.close)
+                    self._exit_hook = True
+
+    def write(self, path: str, line: str):
+        self._start()
+        self._queue.put(("write", path, line))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued so far is on disk (flushed and fsynced)."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("stop", done, None))
+        done.wait(timeout)
+        self._thread.join(timeout)
+
+    def _run(self):
+        next_flush = next_sync = time.monotonic()
+        while True:
+            if self._dirty:
+                timeout = max(0.0, next_flush - time.monotonic())
+            elif self._unsynced:
+                timeout = max(0.0, next_sync - time.monotonic())
+            else:
+                timeout = None
+            try:
+                kind, target, line = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+            if kind == "write":
+                if not self._dirty:
+                    next_flush = time.monotonic() + self.flush_interval
+                self._append(target, line)
+                # Take everything else already queued in the same batch.
+                while True:
+                    try:
+                        kind, target, line = self._queue.get_nowait()
+                    except queue.Empty:
+                        kind = None
+                        break
+                    if kind != "write":
+                        break
+                    self._append(target, line)
+            if kind in ("flush", "stop"):
+                self._flush(sync=True)
+                next_sync = time.monotonic() + self.fsync_interval
+                if kind == "stop":
+                    self._close_files()
+                    target.set()
+                    return
+                target.set()
+                continue
+            now = time.monotonic()
+            if self._dirty and now >= next_flush:
+                self._flush(sync=now >= next_sync)
+            elif self._unsynced and now >= next_sync:
+                self._flush(sync=True)
+            if now >= next_sync and not self._unsynced:
+                next_sync = now + self.fsync_interval
+
+    def _open(self, path: str):
+        handle = self._files.get(path)
+        if handle is None:
+            handle = self._files[path] = open(path, "ab")
+        return handle
+
+    def _append(self, path: str, line: str):
+        data = line.encode("utf-8")
+        try:
+            handle = self._open(path)
+            if self.max_bytes and handle.tell() and handle.tell() + len(data) > self.max_bytes:
+                self._rotate(path)
+                handle = self._open(path)
+            handle.write(data)
+            self._dirty.add(path)
+            self.lines_written += 1
+        except OSError as e:
+            logging.error(f"Error writing to {path}: {e}")
+
+    def _flush(self, sync: bool):
+        for path in self._dirty:
+            try:
+                self._files[path].flush()
+            except (OSError, KeyError) as e:
+                logging.error(f"Error flushing {path}: {e}")
+        self._unsynced |= self._dirty
+        self._dirty.clear()
+        if sync:
+            for path in self._unsynced:
+                try:
+                    os.fsync(self._files[path].fileno())
+                except (OSError, KeyError) as e:
+                    logging.error(f"Error syncing {path}: {e}")
+            self._unsynced.clear()
+
+    def _rotate(self, path: str):
+        handle = self._files.pop(path)
+        handle.flush()
+        os.fsync(handle.fileno())
+        handle.close()
+        self._dirty.discard(path)
+        self._unsynced.discard(path)
+        with self.lock:
+            if self.backups > 0:
+                for number in range(self.backups - 1, 0, -1):
+                    if os.path.exists(backup_path(path, number)):
+                        os.replace(backup_path(path, number), backup_path(path, number + 1))
+                os.replace(path, backup_path(path, 1))
+            else:
+                os.remove(path)
+            self.rotations[path] += 1
+
+    def _close_files(self):
+        for handle in self._files.values():
+            try:
+                handle.close()
+            except OSError:
+                pass
+        self._files.clear()
+
+event_log_writer = EventLogWriter()
+
+def line_offsets(path: str, size: int) -> array:
+    """Byte offsets of the lines in the first ``size`` bytes of ``path``; nothing is parsed."""
+    offsets = array("q", [0] if size else [])
+    position = 0
+    with open(path, "rb") as f:
+        while position < size:
+            chunk = f.read(min(READ_CHUNK, size - position))
+            if not chunk:
+                break
+            end = chunk.find(b"\n")
+            while end >= 0:
+                if position + end + 1 < size:
+                    offsets.append(position + end + 1)
+                end = chunk.find(b"\n", end + 1)
+            position += len(chunk)
+    return offsets
+
+def parse_entry(line: bytes) -> Dict:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {"type": "Unreadable Entry", "details": line.decode("utf-8", "replace"), "timestamp": ""}
+
+class JsonLinesLog(Sequence):
+    """The event log as a read-only sequence plus ``append``.
+
+    Entries already on disk when the log is opened are located by a lazy
+    index of line offsets (rotated backups first, oldest to newest) and only
+    parsed when read; entries logged since are kept in ``session``. Slices
+    read each contiguous run of lines with a single ``read``.
+    """
+
+    def __init__(self, path: str, writer: EventLogWriter = event_log_writer):
+        self.path = path
+        self.writer = writer
+        self.session: List[Dict] = []
+        with writer.lock:
+            self._generation = writer.rotations[path]
+            # (backup number at open time, bytes on disk at open time); offsets are indexed on first use.
+            self._segments = [(number, os.path.getsize(backup_path(path, number)))
+                              for number in range(writer.backups, -1, -1)
+                              if os.path.exists(backup_path(path, number))]
+        self._offsets: Optional[List[array]] = None
+
+    def _index(self) -> List[array]:
+        if self._offsets is None:
+            self._offsets = []
+            for number, size in self._segments:
+                path = self._segment_path(number)
+                self._offsets.append(line_offsets(path, size) if path else array("q"))
+        return self._offsets
+
+    def _segment_path(self, number: int) -> Optional[str]:
+        number += self.writer.rotations[self.path] - self._generation
+        if number > self.writer.backups:
+            return None  # rotated out of the kept backups
+        return backup_path(self.path, number)
+
+    @property
+    def stored(self) -> int:
+        return sum(len(offsets) for offsets in self._index())
+
+    def __len__(self) -> int:
+        return self.stored + len(self.session)
+
+    def append(self, entry: Dict):
+        self.session.append(entry)
+        self.writer.write(self.path, json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _read(self, segment: int, start: int, stop: int) -> List[Dict]:
+        number, size = self._segments[segment]
+        offsets = self._index()[segment]
+        with self.writer.lock:
+            path = self._segment_path(number)
+            if path is None:
+                return [{"type": "Rotated Out", "details": "", "timestamp": ""}] * (stop - start)
+            end = offsets[stop] if stop < len(offsets) else size
+            with open(path, "rb") as f:
+                f.seek(offsets[start])
+                data = f.read(end - offsets[start])
+        return [parse_entry(line) for line in data.split(b"\n")[:stop - start]]
+
+    def _range(self, start: int, stop: int) -> List[Dict]:
+        entries: List[Dict] = []
+        base = 0
+        for segment, offsets in enumerate(self._index()):
+            low, high = max(start - base, 0), min(stop - base, len(offsets))
+            if low < high:
+                entries.extend(self._read(segment, low, high))
+            base += len(offsets)
+        if stop > base:
+            entries.extend(self.session[max(start - base, 0):stop - base])
+        return entries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._range(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("log index out of range")
+        return self._range(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        total = len(self)
+        for start in range(0, total, 4096):
+            yield from self._range(start, min(start + 4096, total))
+
+def atomic_write(path: str, data: bytes):
+    """Replaces ``path`` with ``data`` so that readers (and a crash) see either the old file or the new one."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def migrate_legacy_log(legacy_path: str, path: str) -> int:
+    """Converts a JSON-array event log to JSON Lines, once: nothing happens if ``path`` already exists.
+
+    The legacy file is left in place as a backup.
+    """
+    if not os.path.exists(legacy_path) or os.path.exists(path):
+        return 0
+    try:
+        with open(legacy_path, "r") as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Error reading legacy log {legacy_path}: {e}")
+        return 0
+    if not isinstance(entries, list):
+        return 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logging.info(f"Migrated {len(entries)} log entries from {legacy_path} to {path}")
+    return len(entries)
+
+def offline_config(config: Dict, scratch_dir: str, **overrides) -> Dict:
+    """A copy of ``config`` for running the game headless (tests, benchmarks) without touching the working tree.
+
+    It uses the offline backend with no API key or response cache, turns off
+    the event store and autosaving, keeps free-form logging on the console and
+    puts the event log in ``scratch_dir`` (with no legacy log to migrate).
+    Keyword arguments replace whole sections.
+    """
+    config = dict(config, ai_backend="offline", gemini_api_key="", ai_cache={"path": None},
+                  event_store={"enabled": False}, autosave={"enabled": False})
+    config["event_log"] = dict(config.get("event_log", {}), path=os.path.join(scratch_dir, "game_log.jsonl"),
+                               legacy_path=os.path.join(scratch_dir, "game_log.json"),
+                               error_log=os.path.join(scratch_dir, "error_log.txt"))
+    config["logging"] = dict(config.get("logging", {}), file=None)
+    config.update(overrides)
+    return config
 
 class Logger:
-    def __init__(self, config: Dict, filename="game_log.json", error_log="error_log.txt"):
-        self.filename = filename
-        self.error_log = error_log
+    def __init__(self, config: Dict, filename: Optional[str] = None, error_log: Optional[str] = None):
+        self.config = config
+        settings = config.get("event_log", {})
+        self.filename = filename or settings.get("path", "game_log.jsonl")
+        self.error_log = error_log or settings.get("error_log", "error_log.txt")
+        self.writer = event_log_writer
+        self.writer.configure(settings)
+        self.writer.flush()  # Another logger in this process may still have lines queued
+        migrate_legacy_log(settings.get("legacy_path", "game_log.json"), self.filename)
         self.logs = self.load_logs()
 
         log_level = config.get("log_level", "INFO")
@@ -18,48 +367,33 @@ class Logger:
         if not isinstance(numeric_level, int):
             raise ValueError(f"Invalid log level: {log_level}")
 
-        logging.basicConfig(
-            level=numeric_level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-            handlers=[
-                logging.FileHandler(self.filename),
-                logging.StreamHandler()
-            ]
-        )
-
-    def load_logs(self) -> List[Dict]:
-        if not os.path.exists(self.filename):
-            return []
-        with open(self.filename, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                logging.error("Error decoding JSON from log file. Returning empty list.")
-                return []
+        # Free-form records go through the queued pipeline to the console and their own file, never the event log.
+        configure_logging({**self.config, "log_level": log_level})
+
+    def load_logs(self) -> JsonLinesLog:
+        return JsonLinesLog(self.filename, self.writer)
 
-    def log_event(self, event_type: str, details: str):
+    def log_event(self, event_type: str, details: str, case: Optional[str] = None):
         event = {
             "type": event_type,
             "details": details,
-            "timestamp": self.get_timestamp()
+            "timestamp": self.get_timestamp(),
+            "case": case
         }
         self.logs.append(event)
-        self.save_logs()
         logging.info(f"{event_type}: {details}")
 
-    def save_logs(self):
-        with open(self.filename, "w") as f:
-            json.dump(self.logs, f, indent=4)
+    def save_logs(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every logged event is on disk."""
+        return self.writer.flush(timeout)
 
     def log_error(self, error_message: str):
         logging.error(error_message)
-        with open(self.error_log, "a") as f:
-            f.write(f"[{self.get_timestamp()}] ERROR: {error_message}\n")
+        self.writer.write(self.error_log, f"[{self.get_timestamp()}] ERROR: {error_message}\n")
 
     def get_timestamp(self) -> str:
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     def display_logs(self):
         for log in self.logs:
-            print(f"[{log['timestamp']}] {log['type']}: {log['details']}")
\ No newline at end of file
+            print(f"[{log['timestamp']}] {log['type']}: {log['details']}")
@@ -0,0 +1,291 @@
+# event_store.py
+import argparse
+import atexit
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+__all__ = ['EventStore', 'parse_time']
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Filter name -> column; every filter column has an index led by it, with the timestamp second.
+FILTER_COLUMNS = {"event_type": "event_type", "case_id": "case_id", "case_type": "case_type", "role": "role",
+                  "case_title": "case_title"}
+GROUP_COLUMNS = {*FILTER_COLUMNS, "day"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    case_id TEXT,
+    case_title TEXT,
+    case_type TEXT,
+    role TEXT,
+    details TEXT,
+    details_json INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events(event_type, ts);
+CREATE INDEX IF NOT EXISTS idx_events_type_case_type_ts ON events(event_type, case_type, ts);
+CREATE INDEX IF NOT EXISTS idx_events_case_ts ON events(case_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_case_type_ts ON events(case_type, ts);
+CREATE INDEX IF NOT EXISTS idx_events_role_ts ON events(role, ts);
+CREATE INDEX IF NOT EXISTS idx_events_title_ts ON events(case_title, ts);
+"""
+
+# Stores not yet closed, flushed by one exit hook; weak so a dropped store is not kept alive until exit.
+_open_stores: "weakref.WeakSet[EventStore]" = weakref.WeakSet()
+
+def _close_open_stores():
+    for store in list(_open_stores):
+        store.close()
+
+atexit.register(_close_open_stores)
+
+_RELATIVE = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parse_time(value: Union[None, str, float, int, datetime], now: Optional[float] = None) -> Optional[float]:
+    """Epoch seconds from an epoch number, a datetime, an ISO date/time string or an age like "30d"."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    match = _RELATIVE.match(value.strip())
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    return datetime.fromisoformat(value.strip()).timestamp()
+
+class EventStore:
+    """Indexed SQLite store of game events, queryable by type, case, role and time.
+
+    ``Game.log_event`` feeds it alongside the JSON Lines log. Events are
+    buffered and inserted ``batch_size`` at a time in one transaction (and
+    before any query, and on ``close``), so logging stays cheap. ``details``
+    keeps strings as they are and stores anything else (e.g. the witness
+    order list) as JSON, restored on read.
+    """
+
+    def __init__(self, path: str = "game_events.sqlite3", batch_size: int = 64):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        self._pending: List[Tuple] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._failed = False
+        self.recorded = 0
+        _open_stores.add(self)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["EventStore"]:
+        store_config = config.get("event_store", {})
+        if not store_config.get("enabled", True) or not store_config.get("path", "game_events.sqlite3"):
+            return None
+        return cls(store_config.get("path", "game_events.sqlite3"), batch_size=store_config.get("batch_size", 64))
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._failed:
+            return self._conn
+        try:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logging.error(f"Event store disabled ({self.path}): {e}")
+            self._failed = True
+        return self._conn
+
+    @staticmethod
+    def _row(event_type: str, details, ts: float, case_id: Optional[str], case_title: Optional[str],
+             case_type: Optional[str], role: Optional[str]) -> Tuple:
+        if isinstance(details, str):
+            return ts, event_type, case_id, case_title, case_type, role, details, 0
+        return ts, event_type, case_id, case_title, case_type, role, json.dumps(details), 1
+
+    def record(self, event_type: str, details, case=None, role: Optional[str] = None, ts: Optional[float] = None):
+        """Buffers one event; ``case`` is the current ``Case`` (or None)."""
+        row = self._row(event_type, details, time.time() if ts is None else ts,
+                        getattr(case, "case_id", None), getattr(case, "title", None),
+                        case.case_type.value if case is not None else None, role)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO events (ts, event_type, case_id, case_title, case_type, role, details, details_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+                self.recorded += len(rows)
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logging.error(f"Error writing {len(rows)} events to the event store: {e}")
+
+    def import_log(self, entries: Iterable[Dict]) -> int:
+        """Backfills entries from the JSON Lines event log (which only knows case titles)."""
+        count = 0
+        for entry in entries:
+            try:
+                ts = datetime.strptime(entry["timestamp"], TIMESTAMP_FORMAT).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            with self._lock:
+                self._pending.append(self._row(entry.get("type", ""), entry.get("details", ""), ts,
+                                               None, entry.get("case"), None, None))
+                if len(self._pending) >= 4096:
+                    self.flush()
+            count += 1
+        self.flush()
+        return count
+
+    @staticmethod
+    def _where(filters: Dict, since, until, text: Optional[str]) -> Tuple[str, List]:
+        clauses, params = [], []
+        for name, value in filters.items():
+            if name not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown event filter: {name}")
+            if value is not None:
+                clauses.append(f"{FILTER_COLUMNS[name]} = ?")
+                params.append(value)
+        since, until = parse_time(since), parse_time(until)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if text:
+            clauses.append("details LIKE ?")
+            params.append(f"%{text}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _execute(self, sql: str, params: List) -> List[Tuple]:
+        with self._lock:
+            self.flush()
+            conn = self._db()
+            if conn is None:
+                return []
+            return conn.execute(sql, params).fetchall()
+
+    def query(self, since=None, until=None, text: Optional[str] = None, limit: Optional[int] = 100,
+              newest_first: bool = True, **filters) -> List[Dict]:
+        """Events matching every given filter (``event_type``, ``case_id``, ``case_type``, ``role``, ``case_title``)."""
+        where, params = self._where(filters, since, until, text)
+        sql = ("SELECT id, ts, event_type, case_id, case_title, case_type, role, details, details_json FROM events"
+               f"{where} ORDER BY ts {'DESC' if newest_first else 'ASC'}, id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [{
+            "id": row[0],
+            "timestamp": datetime.fromtimestamp(row[1]).strftime(TIMESTAMP_FORMAT),
+            "type": row[2],
+            "case_id": row[3],
+            "case": row[4],
+            "case_type": row[5],
+            "role": row[6],
+            "details": json.loads(row[7]) if row[8] else row[7],
+        } for row in self._execute(sql, params)]
+
+    def count(self, since=None, until=None, text: Optional[str] = None, **filters) -> int:
+        where, params = self._where(filters, since, until, text)
+        rows = self._execute(f"SELECT COUNT(*) FROM events{where}", params)
+        return rows[0][0] if rows else 0
+
+    def count_by(self, group: str, since=None, until=None, text: Optional[str] = None, **filters) -> Dict:
+        """Event counts per value of ``group`` (a filter column, or "day")."""
+        if group not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group events by {group}")
+        column = "date(ts, 'unixepoch', 'localtime')" if group == "day" else FILTER_COLUMNS[group]
+        where, params = self._where(filters, since, until, text)
+        rows = self._execute(f"SELECT {column}, COUNT(*) FROM events{where} GROUP BY 1 ORDER BY 2 DESC", params)
+        return {key: count for key, count in rows}
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        _open_stores.discard(self)
+
+    def __del__(self):
+        # A store dropped without close() still writes its buffered events.
+        if self._pending:
+            self.close()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Query the game's event history.")
+    parser.add_argument("--db", default="game_events.sqlite3")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="List, count or group matching events")
+    query.add_argument("--type", dest="event_type")
+    query.add_argument("--case-id")
+    query.add_argument("--case", dest="case_title", help="Case title")
+    query.add_argument("--case-type", help="e.g. white_collar, theft")
+    query.add_argument("--role", help="Prosecution or Defense")
+    query.add_argument("--since", help='ISO date/time or an age such as "30d", "12h"')
+    query.add_argument("--until")
+    query.add_argument("--text", help="Substring of the event details")
+    query.add_argument("--limit", type=int, default=50)
+    query.add_argument("--oldest-first", action="store_true")
+    query.add_argument("--count", action="store_true", help="Only print the number of matching events")
+    query.add_argument("--group-by", choices=sorted(GROUP_COLUMNS))
+    query.add_argument("--json", action="store_true", help="Print events as JSON Lines")
+
+    backfill = commands.add_parser("import", help="Backfill from a JSON Lines event log (run once)")
+    backfill.add_argument("log", nargs="?", default="game_log.jsonl")
+
+    args = parser.parse_args(argv)
+    store = EventStore(args.db)
+    try:
+        if args.command == "import":
+            from data_management import JsonLinesLog
+            print(f"Imported {store.import_log(JsonLinesLog(args.log))} events from {args.log}")
+            return
+
+        filters = {"event_type": args.event_type, "case_id": args.case_id, "case_title": args.case_title,
+                   "case_type": args.case_type, "role": args.role}
+        start = time.perf_counter()
+        if args.count:
+            print(store.count(args.since, args.until, args.text, **filters))
+        elif args.group_by:
+            for key, count in store.count_by(args.group_by, args.since, args.until, args.text, **filters).items():
+                print(f"{count:>8}  {key}")
+        else:
+            for event in store.query(args.since, args.until, args.text, limit=args.limit,
+                                     newest_first=not args.oldest_first, **filters):
+                if args.json:
+                    print(json.dumps(event))
+                else:
+                    case = f" [{event['case']}]" if event["case"] else ""
+                    print(f"[{event['timestamp']}] {event['type']}{case}: {event['details']}")
+        print(f"({1000 * (time.perf_counter() - start):.1f} ms)", file=sys.stderr)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
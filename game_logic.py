@@ -3,17 +3,23 @@ import os
 import sys
 import asyncio
 from collections import OrderedDict, deque
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from prompt_manager import GamePromptManager
-from ai_module import ChatGPT, PromptManager
+from ai_module import ChatGPT, PromptManager, parse_json_reply
+from ai_registry import get_chat_client, get_prompt_manager
+from prefetch import PrefetchScheduler
+from objection_judge import ObjectionJudge
 from data_management import Logger
-from state_management import GameState, GamePhase, EventManager, GameSerializer
+from event_store import EventStore
+from autosave import AutosaveService
+from state_management import GameState, GamePhase, EventManager, GameSerializer, ChangeSet
 from game_objects import Case, CaseType, Evidence, Witness
 from factories import CaseFactory, EvidenceFactory, WitnessFactory, RelationshipNetwork, BackstoryGenerator
 import logging
-logging.basicConfig(level=logging.INFO,
-                   format='%(asctime)s - %(levelname)s - %(message)s',
-                   handlers=[logging.StreamHandler()])
+from log_pipeline import log_payload
+
+MANUAL_SAVE_SLOT = "manual"  # Where the UI's Save Game button saves
+OBJECTION_TYPES = ["Relevance", "Leading", "Hearsay", "Speculation"]
 
 class Juror:
     def __init__(self, id: int, personality: str, bias: str):
@@ -76,6 +82,14 @@ class Jury:
         for juror in self.jurors:
             juror.deliberate(self.trial_events, self.jurors)
 
+    def sentiments(self) -> Dict[int, float]:
+        return {juror.id: juror.sentiment for juror in self.jurors}
+
+    def sentiment_deltas(self, before: Dict[int, float]) -> Dict[int, float]:
+        """Per-juror sentiment change since ``before`` (a ``sentiments()`` snapshot); unchanged jurors are left out."""
+        return {juror.id: juror.sentiment - before.get(juror.id, 0) for juror in self.jurors
+                if juror.sentiment != before.get(juror.id, 0)}
+
     def get_verdict(self) -> str:
         total_sentiment = sum(juror.sentiment for juror in self.jurors)
         if total_sentiment > 0:
@@ -98,8 +112,6 @@ class Jury:
 
 class Game:
     def __init__(self, config: Dict, jury: Optional[Jury] = None):
-        print("Initializing Game...")
-        print(f"Config in Game.__init__: {config}")  # Check config
         self.config = config
         self.event_manager = EventManager()
         self.state = GameState(self.event_manager)
@@ -111,15 +123,64 @@ class Game:
         self.jury = jury or Jury()
         self.reputation = 0
         self.logger = Logger(config)
-        self.serializer = GameSerializer()
-        self.ai_manager = ChatGPT(config)
-        print("Initializing PromptManager...")
-        self.prompt_manager = GamePromptManager(config)  # Pass config
-        print(f"PromptManager initialized: {self.prompt_manager}")  #
-        print("Game initialization complete.")
+        self.event_store = EventStore.from_config(config)
+        self.save_file = config.get("save_file", {}).get("path", "save_game.json")
+        self.serializer = GameSerializer(compression=config.get("save_file", {}).get("compression"))
+        self.autosave = AutosaveService.from_config(config, self.serializer)
+        self.autosave.watch(self)  # Snapshot on every phase transition; written in the background
+        self.ai_manager = get_chat_client(config)
+        self.prompt_manager = get_prompt_manager(config)  # Shared with the witnesses
+        self.prefetcher = PrefetchScheduler.from_config(self.ai_manager.ai_manager, config)
+        self.session = None  # SessionRecorder or SessionReplayer when recording/replaying
+        # Clear-cut objections are ruled on locally; only ambiguous ones reach the model.
+        self.objection_judge = ObjectionJudge.from_config(config, self.llm_ruling)
+        logging.debug("Game initialized")
 
     def log_event(self, event_type: str, details: str):
-        self.logger.log_event(event_type, details)
+        self.logger.log_event(event_type, details, case=self.current_case.title if self.current_case else None)
+        if self.event_store is not None:
+            self.event_store.record(event_type, details, case=self.current_case, role=self.role)
+
+    def publish_jury_changes(self, before: Dict[int, float], changes: Optional[ChangeSet] = None):
+        """Publishes the juror sentiment changes since ``before``, along with any other ``changes``."""
+        changes = changes or ChangeSet()
+        changes.merge(ChangeSet(juror_sentiment=self.jury.sentiment_deltas(before)))
+        self.state.publish(changes)
+
+    def adjust_jury(self, delta: int):
+        before = self.jury.sentiments()
+        for juror in self.jury.jurors:
+            juror.sentiment += delta
+        self.publish_jury_changes(before)
+
+    def present_evidence(self, evidence: Evidence):
+        before = self.jury.sentiments()
+        self.jury.assess_case(evidence, self.current_case.case_context)
+        self.log_event("Evidence Presented", evidence.description)
+        index = self.current_case.evidence_list.index(evidence)
+        self.publish_jury_changes(before, ChangeSet(evidence_updated={index}))
+
+    async def question_witness(self, witness: Witness, question: str, strategy: str,
+                               on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """Puts one question to a witness and publishes the resulting stress change."""
+        stress = witness.stress
+        try:
+            return await witness.respond(question, strategy, self, on_chunk=on_chunk)
+        finally:
+            if witness.stress != stress:
+                self.state.publish(ChangeSet(witness_stress={witness.name: witness.stress}))
+
+    def prompt_input(self, prompt: str) -> str:
+        """Reads one line of player input, through the session recorder/replayer if attached."""
+        if self.session is not None:
+            return self.session.read_input(prompt, input)
+        return input(prompt)
+
+    async def read_input(self, prompt: str) -> str:
+        """Reads player input without blocking the event loop, so background AI work keeps going."""
+        if getattr(self.session, "replaying", False):
+            return self.prompt_input(prompt)
+        return await asyncio.get_running_loop().run_in_executor(None, self.prompt_input, prompt)
 
     async def start_game(self):
         print("Welcome to Courtroom Drama: Interactive Legal Simulation\n")
@@ -134,7 +195,7 @@ class Game:
             print("3. Load Game")
             print("4. Save Game")
             print("5. Exit")
-            choice = input("Enter your choice: ")
+            choice = self.prompt_input("Enter your choice: ")
             if choice == "1":
                 asyncio.run(self.start_career_mode())
             elif choice == "2":
@@ -145,7 +206,7 @@ class Game:
                 self.save_game()
             elif choice == "5":
                 print("Thank you for playing Courtroom Drama. Goodbye!")
-                self.logger.log_event("Game Exit", "User exited the game")
+                self.log_event("Game Exit", "User exited the game")
                 sys.exit()
             else:
                 print("Invalid choice. Please try again.")
@@ -160,9 +221,10 @@ class Game:
             player_level=1,
             previous_cases=[]
         )
-        self.state.transition_to(GamePhase.CASE_PREPARATION)
+        self.state.transition_to(GamePhase.CASE_PREPARATION, changes=ChangeSet(case_changed=True))
         print(f"Starting Case {self.state.unlocked_cases}: {self.current_case.title}\n")
         self.current_case.display_summary()
+        self.prefetch_opening_statement()
 
     def get_context(self) -> Dict:
         """Get current game context with proper error handling"""
@@ -185,7 +247,10 @@ class Game:
 
     async def continue_case(self):
         if self.current_case:
-            self.case_preparation()
+            if not self.role:
+                self.choose_role()
+            self.prefetch_opening_statement()
+            await self.case_preparation()
             await self.courtroom_proceedings()
             self.deliberation_and_verdict()
         else:
@@ -198,17 +263,19 @@ class Game:
                 player_level=self.state.player_reputation // 10 + 1,
                 previous_cases=self.state.completed_cases
             )
+            self.state.publish(ChangeSet(case_changed=True))
             print(f"Starting Case {self.state.unlocked_cases}: {self.current_case.title}\n")
             self.current_case.display_summary()
             self.choose_role()
-            self.case_preparation()
+            self.prefetch_opening_statement()
+            await self.case_preparation()
             await self.courtroom_proceedings()
             self.deliberation_and_verdict()
             self.state.completed_cases.append(self.current_case)
             self.state.unlocked_cases += 1
         else:
             print("Congratulations! You have completed all available cases.")
-            self.logger.log_event("Game Completion", "All cases completed")
+            self.log_event("Game Completion", "All cases completed")
             self.state.transition_to(GamePhase.GAME_OVER)
             sys.exit()
 
@@ -217,7 +284,7 @@ class Game:
             print("Choose Your Role:")
             print("1. Prosecution")
             print("2. Defense")
-            choice = input("Enter your choice: ")
+            choice = self.prompt_input("Enter your choice: ")
 
             if choice == "1":
                 self.role = "Prosecution"
@@ -232,11 +299,11 @@ class Game:
             else:
                 print("Invalid choice. Please try again.")
 
-    def case_preparation(self):
+    async def case_preparation(self):
         print("Case Preparation Phase:\n")
         self.current_case.list_evidence()
         while True:
-            selected = input("Select up to two pieces of evidence to present (e.g., 1,3 or 'none'): ")
+            selected = await self.read_input("Select up to two pieces of evidence to present (e.g., 1,3 or 'none'): ")
             if selected.lower() == 'none':
                 self.selected_evidence = {}
                 break
@@ -263,7 +330,7 @@ class Game:
         print("\nWitness Information:")
         self.current_case.list_witnesses()
         while True:
-            order = input("Choose the order to examine witnesses (e.g., 1,2 or 2,1): ")
+            order = await self.read_input("Choose the order to examine witnesses (e.g., 1,2 or 2,1): ")
             order_indices = order.split(",")
             valid = True
             temp_order = []
@@ -290,23 +357,39 @@ class Game:
         await self.examine_witnesses()
         self.closing_arguments()
 
+    def prefetch_opening_statement(self):
+        """Starts the opening statement in the background once a case is active and a role is chosen.
+
+        It only depends on case and role, so it generates while the player prepares.
+        """
+        self.prefetcher.discard("opening_statement")  # One left over from the previous case
+        if self.current_case and self.role:
+            self.prefetcher.prefetch("opening_statement", self.opening_statement_messages(),
+                                     prompt_type="opening_statement")
+
+    def opening_statement_messages(self) -> List[Dict]:
+        context = self.get_context()
+        context["strategy"] = "Focus on establishing key evidence and timeline of events"  # Default strategy
+        return self.prompt_manager.generate_prompt("opening_statement", context)
+
     async def opening_statements(self):
         print("Opening Statements:\n")
 
         if not self.role:
             self.choose_role()  # Make sure role is selected
 
-        logging.info(f"Current context for opening statement: {self.get_context()}")  # Debug logging
+        log_payload("context", "opening statement", self.get_context)
 
         try:
-            context = self.get_context()
-            context["strategy"] = "Focus on establishing key evidence and timeline of events"  # Default strategy
-
-            messages = self.prompt_manager.generate_prompt("opening_statement", context)
-            statement = await self.ai_manager.get_response(messages)
+            messages = self.opening_statement_messages()
+            self.prefetcher.claim(messages)
 
             print("\nYour Opening Statement:")
-            print(statement)
+            chunks = []
+            async for chunk in self.ai_manager.stream_response(messages, prompt_type="opening_statement"):
+                chunks.append(chunk)
+                print(chunk, end="", flush=True)
+            statement = "".join(chunks).strip()
             print("\n")
 
             self.log_event("Opening Statement", statement)
@@ -333,7 +416,7 @@ class Game:
                 print(f"{idx}. {stmt}")
 
             while True:
-                choice = input("Enter the number of your chosen opening statement: ")
+                choice = await self.read_input("Enter the number of your chosen opening statement: ")
                 if choice.isdigit() and 1 <= int(choice) <= len(statements):
                     selected_statement = statements[int(choice) - 1]
                     print(f"\nYou selected: \"{selected_statement}\"\n")
@@ -360,7 +443,7 @@ class Game:
             print("2. Neutral")
             print("3. Aggressive")
             while True:
-                choice = input("Enter your choice: ")
+                choice = await self.read_input("Enter your choice: ")
                 if choice == "1":
                     strategy = "Friendly"
                     break
@@ -378,9 +461,13 @@ class Game:
             # Simulate asking 3 questions
             for q_num in range(1, 4):
                 print(f"Question {q_num}:")
-                question = input("Enter your question: ")
-                response = await witness.respond(question, strategy, self)
-                print(f"Witness Response: {response}\n")
+                question = await self.read_input("Enter your question: ")
+                ruling_group = f"ruling:{witness.name}:{q_num}"
+                self.prefetch_rulings(ruling_group, question)
+                print("Witness Response: ", end="", flush=True)
+                response = await self.question_witness(witness, question, strategy,
+                                                       on_chunk=lambda chunk: print(chunk, end="", flush=True))
+                print("\n")
                 self.log_event("Witness Response", f"Q: {question} | A: {response}")
 
                 # Check for evidence synergy
@@ -389,55 +476,60 @@ class Game:
                         if desc != other_desc and evidence.metadata['synergy'] is not None and other_evidence.metadata['synergy'] is not None:
                             if other_evidence.type in evidence.metadata['synergy'] and evidence.type in other_evidence.metadata['synergy']:
                                 print(f"Synergy between {evidence.type} and {other_evidence.type} activated!")
-                                for juror in self.jury.jurors:
-                                    juror.sentiment += 1 # Add extra sentiment for synergy
+                                self.adjust_jury(1) # Add extra sentiment for synergy
 
                 impact = random.randint(-1, 2)
                 self.jury.trial_events.append({'type': 'witness_testimony', 'impact': impact})
 
-                objection = input("Do you want to raise an objection? (yes/no): ").lower()
+                objection = (await self.read_input("Do you want to raise an objection? (yes/no): ")).lower()
                 if objection == "yes":
-                    self.raise_objection(witness, question)
+                    await self.raise_objection(witness, question)
 
                 if random.random() < 0.3:
-                    objection_type = random.choice(["Relevance", "Leading", "Hearsay", "Speculation"])
+                    objection_type = random.choice(OBJECTION_TYPES)
                     print(f"Opposing side raises an objection: {objection_type}")
-                    ruling = self.judge_ruling(objection_type, question)
+                    ruling = await self.judge_ruling(objection_type, question)
                     print(f"Judge Ruling: {ruling}\n")
                     if ruling == "Sustained":
-                        for juror in self.jury.jurors:
-                            juror.sentiment += 1
+                        self.adjust_jury(1)
                     else:
-                        for juror in self.jury.jurors:
-                            juror.sentiment -= 1
+                        self.adjust_jury(-1)
                     self.log_event("Objection Ruling", ruling)
-
-    def raise_objection(self, witness: Witness, question: str):
+                self.prefetcher.discard(ruling_group)
+        self.prefetcher.log_stats()
+        self.objection_judge.log_stats()
+
+    def prefetch_rulings(self, group: str, question: str):
+        """Speculatively asks for the rulings the local judge cannot make, while the player reads the answer."""
+        for objection_type in OBJECTION_TYPES:
+            if not self.objection_judge.needs_escalation(objection_type, question, self.current_case):
+                continue
+            self.prefetcher.prefetch(group, self.judge_ruling_messages(objection_type, question),
+                                     prompt_type="judge_ruling")
+
+    async def raise_objection(self, witness: Witness, question: str):
         print("Choose objection type:")
-        objections = ["Relevance", "Leading", "Hearsay", "Speculation"]
+        objections = OBJECTION_TYPES
         for idx, obj in enumerate(objections, 1):
             print(f"{idx}. {obj}")
         while True:
-            choice = input("Enter the number of your objection: ")
+            choice = await self.read_input("Enter the number of your objection: ")
             if choice.isdigit() and 1 <= int(choice) <= len(objections):
                 objection_type = objections[int(choice) - 1]
                 break
             else:
                 print("Invalid choice. Please try again.")
         self.log_event("Player Objection", objection_type)
-        ruling = self.judge_ruling(objection_type, question)
+        ruling = await self.judge_ruling(objection_type, question)
         print(f"Judge Ruling: {ruling}\n")
         if ruling == "Sustained":
-            for juror in self.jury.jurors:
-                juror.sentiment += 1
+            self.adjust_jury(1)
         else:
-            for juror in self.jury.jurors:
-                juror.sentiment -= 1
+            self.adjust_jury(-1)
         self.log_event("Objection Ruling", ruling)
 
-    def judge_ruling(self, objection_type: str, question: str) -> str:
-        prompt_manager = PromptManager(self.config)  # Pass self.config
-        prompt = prompt_manager.generate_prompt(
+    def judge_ruling_messages(self, objection_type: str, question: str) -> List[Dict]:
+        return self.prompt_manager.generate_prompt(
             "judge_ruling",
             {
                 "case_type": self.current_case.case_type.value,
@@ -445,9 +537,19 @@ class Game:
                 "question": question
             }
         )
-        messages = [{"role": "user", "parts": [prompt]}]
-        ruling = asyncio.run(self.ai_manager.generate_response(messages))
-        # Extract ruling from AI response
+
+    async def judge_ruling(self, objection_type: str, question: str) -> str:
+        return await self.objection_judge.rule(objection_type, question, self.current_case)
+
+    async def llm_ruling(self, objection_type: str, question: str) -> str:
+        """Asks the model to rule; used by the objection judge for low-confidence cases."""
+        messages = self.judge_ruling_messages(objection_type, question)
+        self.prefetcher.claim(messages)
+        ruling = await self.ai_manager.get_response(messages, prompt_type="judge_ruling")
+        decision = parse_json_reply(ruling)
+        if decision is not None and decision.get("ruling") in ("Sustained", "Overruled"):
+            return decision["ruling"]
+        # Fallback replies (and anything the model sent as prose) are matched by keyword.
         if "sustained" in ruling.lower():
             return "Sustained"
         elif "overruled" in ruling.lower():
@@ -472,7 +574,7 @@ class Game:
         for idx, arg in enumerate(arguments, 1):
             print(f"{idx}. {arg}")
         while True:
-            choice = input("Enter the number of your chosen closing argument: ")
+            choice = self.prompt_input("Enter the number of your chosen closing argument: ")
             if choice.isdigit() and 1 <= int(choice) <= len(arguments):
                 selected_argument = arguments[int(choice) - 1]
                 print(f"\nYou selected: \"{selected_argument}\"\n")
@@ -485,9 +587,11 @@ class Game:
 
     def deliberation_and_verdict(self):
         print("Deliberation Phase:\n")
+        before = self.jury.sentiments()
         for evidence_desc, evidence in self.selected_evidence.items():
           self.jury.assess_case(evidence, self.current_case.case_context)
         self.jury.deliberate_phase()
+        self.publish_jury_changes(before)
         print("Jurors are deliberating...\n")
         self.jury.display_juror_states()
         verdict = self.jury.get_verdict()
@@ -501,20 +605,26 @@ class Game:
             print("The opposing side has won the case.\n")
             self.reputation -= 5
             self.log_event("Case Outcome", "Defeat")
-        self.next_case()
 
-    def get_context(self) -> Dict:
-        evidence_presented = [f"{evidence.type}: {evidence.description}" for evidence in self.selected_evidence.values()]
-        return {
-            "current_case_title": self.current_case.title,
-            "current_case_summary": self.current_case.summary,
-            "player_role": self.role,
-            "evidence_presented": ", ".join(evidence_presented) if evidence_presented else "No evidence presented yet.",
-            "special_conditions": ", ".join(self.current_case.case_context.get("special_conditions", [])) or "None",
-        }
-
-    def save_game(self):
-        filename = "save_game.json"
+    def save_game(self, slot: Optional[str] = None, on_saved: Optional[Callable[[bool], None]] = None):
+        """Saves to the save file (save_game.json, or a binary .sav), or to the named save slot.
+
+        With ``on_saved`` a slot save only snapshots the game here and returns;
+        the slot is written in the background and ``on_saved(ok)`` is called
+        from the writer thread.
+        """
+        self.state.active_case = self.current_case
+        if slot and on_saved is not None:
+            self.autosave.request(self, slot, on_saved)
+            self.log_event("Game Saved", f"User saved the game to slot {slot}.")
+            return
+        if slot:
+            if not self.autosave.save(self, slot):
+                print(f"Saving to slot {slot} is taking longer than expected; it will finish in the background.")
+            print(f"Game state has been saved to slot {slot}.")
+            self.log_event("Game Saved", f"User saved the game to slot {slot}.")
+            return
+        filename = self.save_file
         self.serializer.save_game_state(
             game_state=self.state,
             filename=filename
@@ -522,20 +632,28 @@ class Game:
         print(f"Game state has been saved to {filename}.")
         self.log_event("Game Saved", "User saved the game.")
 
-    def load_game(self):
-        filename = "save_game.json"
-        if not os.path.exists(filename):
+    def load_game(self, slot: Optional[str] = None):
+        """Loads the save file (either format), or the named save slot (e.g. "autosave")."""
+        filename = self.save_file
+        if slot and slot not in self.autosave.slots():
+            print(f"No saved game in slot {slot}.")
+            return
+        if not slot and not os.path.exists(filename):
             print("No saved game found.")
             return
         try:
-            self.state = self.serializer.load_game_state(
-                filename=filename,
-                case_factory=self.case_factory,
-                witness_factory=self.case_factory.witness_factory,
-                evidence_factory=self.case_factory.evidence_factory,
-                relationship_network=self.case_factory.relationship_network,
-                backstory_generator=self.case_factory.backstory_generator
-            )
+            if slot:
+                self.state = self.autosave.load(slot, self.case_factory)
+            else:
+                self.state = self.serializer.load_game_state(
+                    filename=filename,
+                    case_factory=self.case_factory,
+                    witness_factory=self.case_factory.witness_factory,
+                    evidence_factory=self.case_factory.evidence_factory,
+                    relationship_network=self.case_factory.relationship_network,
+                    backstory_generator=self.case_factory.backstory_generator
+                )
+            self.autosave.watch(self)
             print("Game state has been loaded.")
             self.log_event("Game Loaded", "User loaded the game.")
             self.current_case = self.state.active_case
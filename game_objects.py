@@ -1,10 +1,15 @@
 # game_objects.py
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from collections import OrderedDict, deque
 import random
-from prompt_manager import GamePromptManager
-from ai_module import ChatGPT, PromptManager
+import uuid
+from ai_registry import get_chat_client, get_prompt_manager
+from semantic_cache import stress_band
+from witness_context import WitnessContextBudget
+from bm25_index import BM25Index
+from chat_session import ChatSession
+from log_pipeline import log_payload
 
 class CaseType(Enum):
     WHITE_COLLAR = "white_collar"
@@ -70,43 +75,72 @@ class Witness:
         self.hidden_motive = hidden_motive
         self.testimony = OrderedDict()
         self.memory = deque(maxlen=20)
-        self.ai_manager = ChatGPT(config)  # You'll need to pass config to Witness
-        self.prompt_manager = GamePromptManager(config)
+        self.ai_manager = get_chat_client(config)  # Shared across witnesses, judge and game
+        self.prompt_manager = get_prompt_manager(config)
+        self.index = BM25Index()  # Over every answered exchange, for relevance retrieval
+        # Bounded prompt view of ``testimony``: recent and relevant answers verbatim, older ones summarized.
+        self.context = WitnessContextBudget.from_config(config, self.ai_manager, self.prompt_manager, name,
+                                                        index=self.index)
+        self.chat: Optional[ChatSession] = None  # Built by ``prepare_persona`` once the case is known
 
-    async def respond(self, question: str, strategy: str, game: "Game") -> str:
+    def prepare_persona(self, case: "Case"):
+        """Formats the static persona prefix once and opens the witness's chat session."""
+        persona = self.prompt_manager.format_prompt("witness_persona", {
+            "witness_name": self.name,
+            "personality_traits": self.personalities,
+            "backstory": self.backstory,
+            "relationship": self.relationship,
+            "case_context": case.describe_context(),
+        })
+        self.chat = ChatSession(persona, max_turns=self.context.recent_exchanges,
+                                turn_tokens=self.context.max_tokens // self.context.recent_exchanges)
+        self.chat.load((question, answer) for _, question, answer in self.context.recent)
+
+    async def respond(self, question: str, strategy: str, game: "Game",
+                      on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """Generates the witness's answer; ``on_chunk`` receives text as it streams in."""
         self.update_stress(strategy)
-        case_context_string = f"The case is about {game.current_case.summary} "
-        if game.current_case.case_context.get("case_specific_traits"):
-            case_context_string += "Special traits of this case include: " + ", ".join(
-                f"{k}: {v}" for k, v in game.current_case.case_context["case_specific_traits"].items()) + ". "
-        if game.current_case.case_context.get("special_conditions"):
-            case_context_string += "Special conditions for this case are: " + ", ".join(
-                game.current_case.case_context["special_conditions"]) + ". "
-
-        # Construct the messages list correctly here:
-        messages = self.prompt_manager.generate_prompt(
-            "witness_testimony",
-            {
-                "witness_name": self.name,
-                "personality_traits": self.personalities,
-                "stress": self.stress,
-                "backstory": self.backstory,
-                "relationship": self.relationship,
-                "previous_testimony": self.get_previous_testimony(),
-                "question": question,
-                "case_context": case_context_string,
-                "hidden_motive": self.hidden_motive
-            }
-        )
+        if self.chat is None:
+            self.prepare_persona(game.current_case)
+
+        if getattr(game.session, "replaying", False):
+            # A recorded player was slower than a replay; let pending summaries land as they did then.
+            await self.context.wait_for_refresh()
+
+        # Only the turn changes between questions; the persona prefix and recent turns are reused as-is.
+        turn = self.prompt_manager.format_prompt("witness_turn", {
+            "stress": self.stress,
+            "previous_testimony": self.context.render(question, include_recent=False),
+            "question": question,
+            "hidden_motive": self.hidden_motive,
+        })
+        messages = self.chat.messages(turn)
 
-        print(f"Messages to be sent to AI: {messages}")
+        log_payload("messages", self.name, messages)
 
-        response = await self.ai_manager.get_response(messages)
+        if on_chunk is None:
+            response = await self.ai_manager.get_response(
+                messages, semantic_scope=self.semantic_scope(), semantic_query=question,
+                prompt_type="witness_testimony"
+            )
+        else:
+            chunks = []
+            async for chunk in self.ai_manager.stream_response(
+                    messages, semantic_scope=self.semantic_scope(), semantic_query=question,
+                    prompt_type="witness_testimony"):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            response = "".join(chunks).strip()
 
         if self.stress > 7 and random.random() < 0.3:
-            response += f" (Thinking about hidden motive: {self.hidden_motive})"
+            motive_hint = f" (Thinking about hidden motive: {self.hidden_motive})"
+            response += motive_hint
+            if on_chunk is not None:
+                on_chunk(motive_hint)
 
         self.testimony[question] = response
+        self.context.add(question, response)
+        self.chat.add_exchange(question, response)
         self.memory.append({"question": question, "response": response})
 
         return response
@@ -122,15 +156,29 @@ class Witness:
                                   for p in self.personalities), default_modifier)
         self.stress = max(min(self.stress + personality_modifier, 10), 0)
 
-    def get_previous_testimony(self) -> str:
-        """Returns a string summarizing the witness's previous testimony."""
-        if not self.testimony:
-            return "No previous testimony."
+    def semantic_scope(self) -> str:
+        """Scope key under which near-duplicate questions may share an answer."""
+        traits = "+".join(sorted(self.personalities))
+        return f"{self.name}|{traits}|{self.relationship}|{stress_band(self.stress)}"
+
+    def get_previous_testimony(self, question: Optional[str] = None) -> str:
+        """Returns the witness's previous testimony, summarized to fit the prompt budget."""
+        return self.context.render(question)
 
-        summary = ""
-        for i, (question, answer) in enumerate(self.testimony.items()):
-            summary += f"Question {i + 1}: {question}\nAnswer {i + 1}: {answer}\n"
-        return summary
+    def restore_index(self, data: Optional[Dict]):
+        """Replaces the retrieval index with a saved one, or rebuilds it from ``testimony``.
+
+        The saved postings are only reusable when every indexed exchange is
+        still in ``testimony``; a repeated question replaces its earlier answer
+        there, so such witnesses (and old saves without an index) are re-indexed.
+        """
+        if data is not None and len(data.get("lengths", [])) == len(self.testimony):
+            self.index = BM25Index.from_dict(data, self.testimony.items())
+        else:
+            self.index = BM25Index()
+            self.index.extend(self.testimony.items())
+        if self.context.index is not None:
+            self.context.index = self.index
 
 
 
@@ -138,7 +186,9 @@ class Case:
     def __init__(self, title: str, summary: str, case_type: CaseType, complexity: int,
                  num_witnesses: int, num_evidence: int, evidence_templates: List[str],
                  evidence_factory, witness_factory, relationship_network,
-                 backstory_generator, case_context: Dict):
+                 backstory_generator, case_context: Dict, case_id: Optional[str] = None, generate: bool = True):
+        """``generate=False`` skips rolling evidence and witnesses, for cases restored from a save."""
+        self.case_id = case_id or uuid.uuid4().hex[:12]  # Stable across saves; titles repeat between careers
         self.title = title
         self.summary = summary
         self.case_type = case_type
@@ -153,7 +203,8 @@ class Case:
         self._relationship_network = relationship_network
         self._backstory_generator = backstory_generator
         self.case_context = case_context
-        self.generate_case()
+        if generate:
+            self.generate_case()
 
     def display_summary(self):
         """Display a summary of the case"""
@@ -178,6 +229,17 @@ class Case:
         for i, witness in enumerate(self.witnesses, 1):
             print(f"{i}. {witness.name} - {witness.occupation}")
 
+    def describe_context(self) -> str:
+        """The case description given to every witness persona."""
+        description = f"The case is about {self.summary} "
+        if self.case_context.get("case_specific_traits"):
+            description += "Special traits of this case include: " + ", ".join(
+                f"{k}: {v}" for k, v in self.case_context["case_specific_traits"].items()) + ". "
+        if self.case_context.get("special_conditions"):
+            description += "Special conditions for this case are: " + ", ".join(
+                self.case_context["special_conditions"]) + ". "
+        return description
+
     def generate_case(self):
         self.evidence_list = self._evidence_factory.generate_evidence(
             num_evidence=self.num_evidence,
@@ -190,4 +252,5 @@ class Case:
             witness = self._witness_factory.create_witness(
                 self.case_context, relationships[i][1], self._backstory_generator
             )
+            witness.prepare_persona(self)
             self.witnesses.append(witness)
@@ -0,0 +1,175 @@
+# log_pipeline.py
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+__all__ = ['configure_logging', 'log_payload', 'PayloadSampler', 'payload_sampler']
+
+GAME_LOGGER = "courtroom"
+PAYLOAD_LOGGER = f"{GAME_LOGGER}.payloads"
+FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the game."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class PayloadSampler:
+    """Decides which verbose prompt/response dumps get logged.
+
+    Every ``sample_every``-th payload of each kind is kept, and at most
+    ``per_minute`` per kind are kept in any minute. Sampling is by counter,
+    not by random draw, so it never touches the game's RNG (recorded sessions
+    replay identically with logging on or off). Payloads that pass are
+    clipped to ``max_chars``.
+    """
+
+    def __init__(self, sample_every: int = 10, per_minute: int = 30, max_chars: int = 2000):
+        self.sample_every = max(1, sample_every)
+        self.per_minute = per_minute
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self._window: Dict[str, list] = {}  # kind -> [window start, payloads logged in it]
+        self.logged = 0
+        self.skipped = 0
+
+    def configure(self, settings: Dict):
+        self.sample_every = max(1, settings.get("sample_every", self.sample_every))
+        self.per_minute = settings.get("per_minute", self.per_minute)
+        self.max_chars = settings.get("max_chars", self.max_chars)
+
+    def allow(self, kind: str) -> bool:
+        with self._lock:
+            seen = self._seen.get(kind, 0)
+            self._seen[kind] = seen + 1
+            if seen % self.sample_every:
+                self.skipped += 1
+                return False
+            now = time.monotonic()
+            window = self._window.setdefault(kind, [now, 0])
+            if now - window[0] >= 60:
+                window[0], window[1] = now, 0
+            if window[1] >= self.per_minute:
+                self.skipped += 1
+                return False
+            window[1] += 1
+            self.logged += 1
+            return True
+
+    def clip(self, text: str) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}… [{len(text) - self.max_chars} more chars]"
+
+payload_sampler = PayloadSampler()
+_payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+
+def log_payload(kind: str, label: str, payload: Union[str, Callable[[], object], object]):
+    """Logs a sampled, clipped DEBUG dump of a prompt or response.
+
+    ``payload`` may be a callable so the (possibly large) text is only built
+    for the dumps that are actually kept.
+    """
+    if not _payload_logger.isEnabledFor(logging.DEBUG) or not payload_sampler.allow(kind):
+        return
+    if callable(payload):
+        payload = payload()
+    text = payload if isinstance(payload, str) else repr(payload)
+    _payload_logger.debug("%s %s: %s", kind, label, payload_sampler.clip(text))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_lock = threading.Lock()
+
+def _level(name: str, default: int) -> int:
+    level = getattr(logging, str(name).upper(), None)
+    return level if isinstance(level, int) else default
+
+def _set_levels(handlers, console_level: int, file_level: int):
+    """Sets each handler's level and opens loggers only as far as some handler needs.
+
+    Below INFO, only the game's own ``courtroom.*`` loggers (the payload
+    dumps) are opened for the file, so library DEBUG records (aiohttp,
+    asyncio, ...) are never built and queued just to be dropped. A DEBUG
+    console level opens everything.
+    """
+    has_file = False
+    for handler in handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.setLevel(file_level)
+            has_file = True
+        else:
+            handler.setLevel(console_level)
+    needed = min(console_level, file_level) if has_file else console_level
+    logging.getLogger().setLevel(min(console_level, max(needed, logging.INFO)))
+    logging.getLogger(GAME_LOGGER).setLevel(needed)
+
+def configure_logging(config: Dict) -> DroppingQueueHandler:
+    """Routes all logging through one queue to a background listener (console + rotating log file).
+
+    Safe to call more than once; later calls only update levels and sampling.
+    """
+    global _listener, _queue_handler
+    settings = config.get("logging", {})
+    console_level = _level(config.get("log_level", "INFO"), logging.INFO)
+    file_level = _level(settings.get("file_level", "DEBUG"), logging.DEBUG)
+    payload_sampler.configure(settings.get("payloads", {}))
+    root = logging.getLogger()
+    with _lock:
+        if _listener is not None:
+            _set_levels(_listener.handlers, console_level, file_level)
+            return _queue_handler
+
+        formatter = logging.Formatter(FORMAT, DATE_FORMAT)
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        handlers = [console]
+        path = settings.get("file", "courtroom.log")
+        if path:
+            try:
+                file_handler = logging.handlers.RotatingFileHandler(
+                    path, maxBytes=settings.get("max_bytes", 5 * 1024 * 1024),
+                    backupCount=settings.get("backups", 3), encoding="utf-8", delay=True)
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+            except OSError as e:
+                logging.error(f"Error opening log file {path}: {e}")
+
+        # Replace plain console/file handlers from earlier basicConfig calls; leave any others (e.g. test capture).
+        for handler in list(root.handlers):
+            if type(handler) in (logging.StreamHandler, logging.FileHandler):
+                root.removeHandler(handler)
+        _queue_handler = DroppingQueueHandler(queue.Queue(settings.get("queue_size", 10000)))
+        root.addHandler(_queue_handler)
+        _set_levels(handlers, console_level, file_level)
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _queue_handler
+
+def stop_logging():
+    """Drains the queue into the handlers and stops the listener thread."""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_queue_handler)
+        logging.getLogger(GAME_LOGGER).setLevel(logging.NOTSET)
+        _listener = _queue_handler = None
@@ -0,0 +1,258 @@
+# log_viewer.py
+import json
+import tkinter as tk
+from array import array
+from tkinter import font, ttk
+from typing import Dict, List, Optional, Sequence
+
+__all__ = ['LogView', 'LogViewer']
+
+ALL = "All"
+SCAN_CHUNK = 4096
+MAX_ROW_CHARS = 240
+
+def format_entry(entry: Dict) -> str:
+    row = f"[{entry.get('timestamp', '')}] {entry.get('type', '')}: {entry.get('details', '')}"
+    row = row.replace("\n", " ")
+    return row if len(row) <= MAX_ROW_CHARS else row[:MAX_ROW_CHARS - 1] + "…"
+
+class LogView:
+    """A filtered, windowed view over a log store, for the log viewer.
+
+    ``source`` is any sequence of log entries supporting ``len``, indexing
+    and slicing (``Logger.logs`` works). Matching entries are kept as an
+    array of positions, never copies, and ``window`` only materializes the
+    rows being displayed. Typing more of a search term narrows the previous
+    matches instead of rescanning, and ``refresh`` only scans entries
+    appended since the last call.
+    """
+
+    def __init__(self, source: Sequence[Dict]):
+        self.source = source
+        self.event_type: Optional[str] = None
+        self.case: Optional[str] = None
+        self.text = ""
+        self._matches: Optional[array] = None  # positions in ``source``; None while unfiltered
+        self._scanned = 0
+        self._event_types = set()
+        self._cases = set()
+        self._facets_scanned = 0
+        self.refresh()
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.event_type or self.case or self.text)
+
+    def __len__(self) -> int:
+        return len(self._matches) if self._matches is not None else self._scanned
+
+    @property
+    def total(self) -> int:
+        """Entries in the store as of the last ``refresh``, filtered or not."""
+        return self._scanned
+
+    def _match(self, entry: Dict) -> bool:
+        if self.event_type and entry.get("type") != self.event_type:
+            return False
+        if self.case and entry.get("case") != self.case:
+            return False
+        if self.text:
+            details = entry.get("details", "")
+            if not isinstance(details, str):  # e.g. the witness order list
+                details = json.dumps(details)
+            return self.text in details.lower() or self.text in entry.get("type", "").lower()
+        return True
+
+    def set_filter(self, event_type: Optional[str] = None, case: Optional[str] = None, text: str = "") -> int:
+        """Applies a filter and returns the number of matching entries."""
+        text = text.strip().lower()
+        narrowing = (self._matches is not None and self.event_type in (None, event_type)
+                     and self.case in (None, case) and text.startswith(self.text))
+        self.event_type, self.case, self.text = event_type, case, text
+        if not self.filtered:
+            self._matches = None
+        elif narrowing:
+            self._matches = array("q", (i for i in self._matches if self._match(self.source[i])))
+        else:
+            self._matches = array("q")
+            self._scan(0, self._scanned)
+        self.refresh()
+        return len(self)
+
+    def _scan(self, start: int, stop: int):
+        for chunk_start in range(start, stop, SCAN_CHUNK):
+            chunk = self.source[chunk_start:min(chunk_start + SCAN_CHUNK, stop)]
+            self._matches.extend(chunk_start + offset for offset, entry in enumerate(chunk) if self._match(entry))
+
+    def refresh(self) -> int:
+        """Picks up entries appended to the store since the last call; returns how many there were."""
+        total = len(self.source)
+        new = total - self._scanned
+        if new <= 0:
+            return 0
+        if self._matches is not None:
+            self._scan(self._scanned, total)
+        self._scanned = total
+        return new
+
+    def _update_facets(self):
+        total = len(self.source)
+        for chunk_start in range(self._facets_scanned, total, SCAN_CHUNK):
+            for entry in self.source[chunk_start:min(chunk_start + SCAN_CHUNK, total)]:
+                self._event_types.add(entry.get("type", ""))
+                if entry.get("case"):
+                    self._cases.add(entry["case"])
+        self._facets_scanned = total
+
+    def event_types(self) -> List[str]:
+        self._update_facets()
+        return sorted(self._event_types)
+
+    def cases(self) -> List[str]:
+        self._update_facets()
+        return sorted(self._cases)
+
+    def window(self, start: int, count: int) -> List[Dict]:
+        """The ``count`` matching entries from row ``start`` on."""
+        start = max(0, start)
+        if self._matches is None:
+            return list(self.source[start:min(start + count, self._scanned)])
+        return [self.source[i] for i in self._matches[start:start + count]]
+
+class LogViewer:
+    """Toplevel log browser that only ever renders the rows on screen.
+
+    The listbox holds one screenful of rows; the scrollbar is driven by the
+    view's row count, so opening and scrolling cost the same for ten entries
+    or a few hundred thousand.
+    """
+
+    def __init__(self, master, source: Sequence[Dict], poll_ms: int = 1000, search_delay_ms: int = 150):
+        self.view = LogView(source)
+        self.poll_ms = poll_ms
+        self.search_delay_ms = search_delay_ms
+        self.first = 0
+        self.rows = 20
+        self._search_job = None
+        self._entries: List[Dict] = []
+
+        self.toplevel = tk.Toplevel(master)
+        self.toplevel.title("Game Logs")
+        self.toplevel.geometry("800x500")
+
+        controls = tk.Frame(self.toplevel)
+        controls.pack(fill="x", padx=5, pady=5)
+        tk.Label(controls, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self._schedule_search())
+        tk.Entry(controls, textvariable=self.search_var, width=30).pack(side="left", padx=5)
+        tk.Label(controls, text="Type:").pack(side="left")
+        self.type_var = tk.StringVar(value=ALL)
+        self.type_box = ttk.Combobox(controls, textvariable=self.type_var, state="readonly", width=18,
+                                     postcommand=lambda: self.type_box.config(values=[ALL, *self.view.event_types()]))
+        self.type_box.pack(side="left", padx=5)
+        self.type_box.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+        tk.Label(controls, text="Case:").pack(side="left")
+        self.case_var = tk.StringVar(value=ALL)
+        self.case_box = ttk.Combobox(controls, textvariable=self.case_var, state="readonly", width=24,
+                                     postcommand=lambda: self.case_box.config(values=[ALL, *self.view.cases()]))
+        self.case_box.pack(side="left", padx=5)
+        self.case_box.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+        self.count_label = tk.Label(controls, anchor="e")
+        self.count_label.pack(side="right")
+
+        body = tk.Frame(self.toplevel)
+        body.pack(expand=True, fill="both", padx=5)
+        self.scrollbar = tk.Scrollbar(body, command=self._on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox = tk.Listbox(body, activestyle="none", exportselection=False)
+        self.listbox.pack(side="left", expand=True, fill="both")
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._show_details)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self._on_wheel)
+        for key, amount, unit in (("<Up>", -1, "units"), ("<Down>", 1, "units"),
+                                  ("<Prior>", -1, "pages"), ("<Next>", 1, "pages")):
+            self.listbox.bind(key, lambda event, amount=amount, unit=unit: self._on_scroll("scroll", amount, unit)
+                              or "break")
+
+        self.details = tk.Text(self.toplevel, wrap="word", height=6, state="disabled")
+        self.details.pack(fill="x", padx=5, pady=5)
+
+        self.render()
+        self.toplevel.after(self.poll_ms, self._poll)
+
+    def _schedule_search(self):
+        # Debounced so a fast typist triggers one narrowing pass, not one per keystroke.
+        if self._search_job is not None:
+            self.toplevel.after_cancel(self._search_job)
+        self._search_job = self.toplevel.after(self.search_delay_ms, self.apply_filter)
+
+    def apply_filter(self):
+        self._search_job = None
+        event_type = self.type_var.get()
+        case = self.case_var.get()
+        self.view.set_filter(None if event_type == ALL else event_type, None if case == ALL else case,
+                             self.search_var.get())
+        self.first = 0
+        self.render()
+
+    def scroll_to(self, first: int):
+        self.first = max(0, min(first, len(self.view) - self.rows))
+        self.render()
+
+    def render(self):
+        total = len(self.view)
+        self.first = max(0, min(self.first, total - self.rows))
+        self._entries = self.view.window(self.first, self.rows)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(format_entry(entry) for entry in self._entries))
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        shown = f"{self.first + 1}-{self.first + len(self._entries)}" if self._entries else "0"
+        suffix = f" (filtered from {self.view.total})" if self.view.filtered else ""
+        self.count_label.config(text=f"{shown} of {total}{suffix}")
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.view)))
+        else:
+            step = self.rows if unit == "pages" else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return "break"
+
+    def _on_resize(self, event):
+        line_height = max(1, font.Font(font=self.listbox.cget("font")).metrics("linespace") + 1)
+        rows = max(1, event.height // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def _show_details(self, event):
+        selection = self.listbox.curselection()
+        if not selection or selection[0] >= len(self._entries):
+            return
+        entry = self._entries[selection[0]]
+        self.details.config(state="normal")
+        self.details.delete("1.0", tk.END)
+        case = f" — {entry['case']}" if entry.get("case") else ""
+        self.details.insert(tk.END, f"[{entry.get('timestamp', '')}] {entry.get('type', '')}{case}\n"
+                                    f"{entry.get('details', '')}")
+        self.details.config(state="disabled")
+
+    def _poll(self):
+        if not self.toplevel.winfo_exists():
+            return
+        at_bottom = self.first + self.rows >= len(self.view)
+        if self.view.refresh():
+            # Follow new entries only if the player was already looking at the newest ones.
+            self.scroll_to(len(self.view) if at_bottom else self.first)
+        self.toplevel.after(self.poll_ms, self._poll)
@@ -1,14 +1,21 @@
 import tkinter as tk
 from ui_module import MainMenu
 import json
+from ai_metrics import metrics
+from async_bridge import bridge
+from log_pipeline import configure_logging
 
 def main():
     with open("config.json", "r") as f:
         config = json.load(f)
+    configure_logging(config)  # Before anything else logs
+    metrics.configure(config)  # Snapshot on exit (and on SIGUSR1)
+    bridge.configure(config)
 
     root = tk.Tk()
     main_menu = MainMenu(root, config)
     root.mainloop()
+    bridge.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+# objection_judge.py
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from semantic_cache import normalize_question
+
+__all__ = ['LocalObjectionJudge', 'ObjectionJudge', 'case_keywords']
+
+SUSTAINED = "Sustained"
+OVERRULED = "Overruled"
+
+_LEADING_CUES = re.compile(
+    r"^(isn't it true|is it not true|isn't it|wasn't it|weren't you|didn't you|don't you|aren't you|wouldn't you agree|"
+    r"you (were|are|did|knew|saw|had)\b)"
+    r"|,\s*(right|correct|isn't that so|didn't you|weren't you|wasn't it|isn't it|true)\s*\?*$",
+    re.IGNORECASE)
+_OPEN_QUESTION = re.compile(r"^(who|what|where|when|why|how|which|describe|explain|tell us)\b", re.IGNORECASE)
+_HEARSAY_CUES = re.compile(
+    r"\b(told (you|him|her|them)|tell you|say to you|said (that|to)|what did (he|she|they|[a-z]+) (say|tell|mention)|"
+    r"heard (that|from|about)|according to|rumou?r|word (was|got around)|someone said|did anyone (tell|say))\b",
+    re.IGNORECASE)
+_SPECULATION_CUES = re.compile(
+    r"\b(what do you think|why do you think|do you believe|would have|could have|might have|guess|imagine|"
+    r"suppose|what if|probably|in your opinion|speculate|what would)\b",
+    re.IGNORECASE)
+_PERSONAL_KNOWLEDGE = re.compile(r"\b(did you|were you|have you|you (saw|see|heard|did|went|were))\b", re.IGNORECASE)
+
+def case_keywords(case) -> Set[str]:
+    """Content words describing a case: title, summary, evidence, witnesses and case traits."""
+    texts = [case.title, case.summary, case.case_type.value.replace("_", " ")]
+    texts.extend(evidence.metadata.get("description", "") for evidence in case.evidence_list)
+    texts.extend(f"{witness.name} {witness.occupation} {witness.relationship}" for witness in case.witnesses)
+    texts.extend(str(key).replace("_", " ") for key in case.case_context.get("case_specific_traits", {}))
+    return set(normalize_question(" ".join(texts)))
+
+class LocalObjectionJudge:
+    """Rule/feature-based ruling with a confidence score; decides the clear cases without a model call."""
+
+    def assess(self, objection_type: str, question: str, keywords: Set[str]) -> Tuple[str, float]:
+        question = question.strip()
+        if objection_type == "Leading":
+            if _LEADING_CUES.search(question):
+                return SUSTAINED, 0.9
+            if _OPEN_QUESTION.match(question):
+                return OVERRULED, 0.9
+            return OVERRULED, 0.5
+        if objection_type == "Hearsay":
+            if _HEARSAY_CUES.search(question):
+                return SUSTAINED, 0.85
+            if _PERSONAL_KNOWLEDGE.search(question):
+                return OVERRULED, 0.85
+            return OVERRULED, 0.55
+        if objection_type == "Speculation":
+            if _SPECULATION_CUES.search(question):
+                return SUSTAINED, 0.85
+            if _PERSONAL_KNOWLEDGE.search(question):
+                return OVERRULED, 0.85
+            return OVERRULED, 0.55
+        if objection_type == "Relevance":
+            overlap = len(set(normalize_question(question)) & keywords)
+            if overlap >= 2:
+                return OVERRULED, 0.9
+            if overlap == 1:
+                return OVERRULED, 0.6
+            return SUSTAINED, 0.65
+        return OVERRULED, 0.0
+
+class ObjectionJudge:
+    """Tiered ruling engine: the local judge answers when confident, the model otherwise.
+
+    ``escalate`` is an async callable ``(objection_type, question) -> ruling``.
+    ``stats`` reports how often, and how fast, each tier answered.
+    """
+
+    def __init__(self, escalate: Optional[Callable[[str, str], Awaitable[str]]] = None,
+                 confidence_threshold: float = 0.8, local: Optional[LocalObjectionJudge] = None):
+        self.escalate = escalate
+        self.confidence_threshold = confidence_threshold
+        self.local = local or LocalObjectionJudge()
+        self.counts = {"local": 0, "llm": 0}
+        self.seconds = {"local": 0.0, "llm": 0.0}
+        self._keywords: Tuple[Optional[int], Set[str]] = (None, set())
+
+    @classmethod
+    def from_config(cls, config: Dict, escalate: Optional[Callable[[str, str], Awaitable[str]]] = None
+                    ) -> "ObjectionJudge":
+        judge_config = config.get("objection_judge", {})
+        return cls(
+            escalate if judge_config.get("escalate", True) else None,
+            confidence_threshold=judge_config.get("confidence_threshold", 0.8),
+        )
+
+    def _case_keywords(self, case) -> Set[str]:
+        if case is None:
+            return set()
+        if self._keywords[0] != id(case):
+            self._keywords = (id(case), case_keywords(case))
+        return self._keywords[1]
+
+    def assess(self, objection_type: str, question: str, case=None) -> Tuple[str, float]:
+        return self.local.assess(objection_type, question, self._case_keywords(case))
+
+    def needs_escalation(self, objection_type: str, question: str, case=None) -> bool:
+        """True if this objection would go to the model (so it is worth prefetching)."""
+        return self.escalate is not None and self.assess(objection_type, question, case)[1] < self.confidence_threshold
+
+    async def rule(self, objection_type: str, question: str, case=None) -> str:
+        start = time.perf_counter()
+        ruling, confidence = self.assess(objection_type, question, case)
+        if self.escalate is None or confidence >= self.confidence_threshold:
+            self.counts["local"] += 1
+            self.seconds["local"] += time.perf_counter() - start
+            return ruling
+        ruling = await self.escalate(objection_type, question)
+        self.counts["llm"] += 1
+        self.seconds["llm"] += time.perf_counter() - start
+        return ruling
+
+    def stats(self) -> Dict:
+        total = sum(self.counts.values())
+        return {
+            "rulings": total,
+            "local": self.counts["local"],
+            "llm": self.counts["llm"],
+            "local_share": round(self.counts["local"] / total, 3) if total else 0.0,
+            "avg_local_ms": round(1000 * self.seconds["local"] / self.counts["local"], 3) if self.counts["local"] else 0.0,
+            "avg_llm_ms": round(1000 * self.seconds["llm"] / self.counts["llm"], 3) if self.counts["llm"] else 0.0,
+        }
+
+    def log_stats(self):
+        logging.info(f"Objection ruling tiers: {self.stats()}")
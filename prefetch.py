@@ -0,0 +1,113 @@
+# prefetch.py
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+from ai_module import AIResponseManager, estimate_tokens
+
+__all__ = ['PrefetchScheduler']
+
+class _PrefetchEntry:
+    def __init__(self, group: str, task: asyncio.Task, prompt_tokens: int):
+        self.group = group
+        self.task = task
+        self.prompt_tokens = prompt_tokens
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self.finished_at = time.perf_counter()
+
+class PrefetchScheduler:
+    """Speculatively generates replies whose prompts are already known.
+
+    Prefetches run through ``AIResponseManager.prefetch`` so they warm the
+    response cache and coalesce with the real request if it arrives while they
+    are still running. Entries are grouped (e.g. per question); unclaimed ones
+    are cancelled or dropped by ``discard``, and their token cost counts against
+    ``max_wasted_tokens``.
+    """
+
+    def __init__(self, ai_manager: AIResponseManager, enabled: bool = True, max_in_flight: int = 4,
+                 max_wasted_tokens: int = 20000):
+        self.ai_manager = ai_manager
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self.max_wasted_tokens = max_wasted_tokens
+        self._entries: Dict[str, _PrefetchEntry] = {}
+        self.scheduled = 0
+        self.skipped = 0
+        self.claimed = 0
+        self.discarded = 0
+        self.cancelled = 0
+        self.saved_seconds = 0.0
+        self.wasted_tokens = 0
+
+    @classmethod
+    def from_config(cls, ai_manager: AIResponseManager, config: Dict) -> "PrefetchScheduler":
+        prefetch_config = config.get("prefetch", {})
+        return cls(
+            ai_manager,
+            enabled=prefetch_config.get("enabled", True),
+            max_in_flight=prefetch_config.get("max_in_flight", 4),
+            max_wasted_tokens=prefetch_config.get("max_wasted_tokens", 20000),
+        )
+
+    def _running(self) -> int:
+        return sum(1 for entry in self._entries.values() if not entry.task.done())
+
+    def prefetch(self, group: str, messages: List[Dict], **options) -> bool:
+        """Schedules a background generation; returns False if skipped or unnecessary."""
+        if not self.enabled or self.wasted_tokens >= self.max_wasted_tokens \
+                or self._running() >= self.max_in_flight:
+            self.skipped += 1
+            return False
+        key = self.ai_manager.request_key(messages)
+        if key in self._entries:
+            return False
+        task = self.ai_manager.prefetch(messages, **options)
+        if task is None:
+            return False
+        self._entries[key] = _PrefetchEntry(group, task, estimate_tokens(json.dumps(messages)))
+        self.scheduled += 1
+        return True
+
+    def claim(self, messages: List[Dict]):
+        """Marks a prefetched prompt as used and credits the latency it saved."""
+        entry = self._entries.pop(self.ai_manager.request_key(messages), None)
+        if entry is None:
+            return
+        self.claimed += 1
+        # A finished prefetch saved its whole generation time; a running one the time it has had so far.
+        end = entry.finished_at if entry.finished_at is not None else time.perf_counter()
+        self.saved_seconds += end - entry.started_at
+
+    def discard(self, group: Optional[str] = None):
+        """Drops unclaimed prefetches (all of them, or one group), cancelling those still running."""
+        for key, entry in list(self._entries.items()):
+            if group is not None and entry.group != group:
+                continue
+            del self._entries[key]
+            self.discarded += 1
+            if not entry.task.done():
+                if self.ai_manager.inflight.cancel_unwaited(key):
+                    self.cancelled += 1
+                self.wasted_tokens += entry.prompt_tokens
+            elif not entry.task.cancelled() and entry.task.exception() is None:
+                self.wasted_tokens += entry.prompt_tokens + estimate_tokens(entry.task.result())
+
+    def stats(self) -> Dict:
+        return {
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "claimed": self.claimed,
+            "discarded": self.discarded,
+            "cancelled": self.cancelled,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "wasted_tokens": self.wasted_tokens,
+        }
+
+    def log_stats(self):
+        logging.info(f"Prefetch stats: {self.stats()}")
@@ -0,0 +1,199 @@
+# response_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+__all__ = ['AIResponseCache', 'template_version']
+
+def template_version(path: Optional[str]) -> str:
+    """Returns a short content hash of a template file, used to namespace cache keys."""
+    if not path or not os.path.exists(path):
+        return "none"
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+class AIResponseCache:
+    """Bounded LRU response cache with TTLs and an optional SQLite backing store.
+
+    Hot entries live in an in-process LRU; every entry is also written to a
+    SQLite database in WAL mode so it survives restarts and can be shared by
+    several game processes. Keys are namespaced (normally with the prompt
+    template version) so editing the templates invalidates old entries.
+    """
+
+    TRIM_INTERVAL = 32
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000, memory_entries: int = 256,
+                 ttl_seconds: Optional[float] = None, namespace: str = ""):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = min(memory_entries, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_failed = False
+        self._writes_since_trim = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, payload: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{payload}".encode()).hexdigest()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self.path is None or self._disk_failed:
+            return self._conn
+        try:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+                "expires_at REAL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self._conn = conn
+        except sqlite3.Error as e:
+            logging.error(f"Response cache disabled its disk store ({self.path}): {e}")
+            self._disk_failed = True
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: Optional[float]):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            if self.path is None:
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+                self.expirations += 1
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        value, expires_at = row
+                        if expires_at is None or expires_at > now:
+                            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                            self._remember(key, value, expires_at)
+                            self.hits += 1
+                            self.disk_hits += 1
+                            return value
+                        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self.expirations += 1
+                except sqlite3.Error as e:
+                    logging.error(f"Response cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stores += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, now, expires_at, now),
+                )
+                self._writes_since_trim += 1
+                if self._writes_since_trim >= self.TRIM_INTERVAL:
+                    self._trim(conn, now)
+            except sqlite3.Error as e:
+                logging.error(f"Response cache write failed: {e}")
+
+    def _trim(self, conn: sqlite3.Connection, now: float):
+        """Drops expired rows and the least recently used rows beyond ``max_entries``."""
+        self._writes_since_trim = 0
+        expired = conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self.expirations += max(expired.rowcount, 0)
+        evicted = conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evictions += max(evicted.rowcount, 0)
+
+    def trim(self):
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                self._trim(conn, time.time())
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``get`` would return a reply; unlike ``get`` it neither counts nor refreshes anything."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                return True
+            conn = self._db()
+            if conn is None:
+                return False
+            try:
+                return conn.execute("SELECT 1 FROM responses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                                    (key, now)).fetchone() is not None
+            except sqlite3.Error as e:
+                logging.error(f"Response cache read failed: {e}")
+                return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return len(self._memory)
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,352 @@
+# save_codec.py
+"""Compact binary save format (``.sav``), with a converter and a benchmark.
+
+A save is a string table, holding each distinct string once, plus a stream
+of uint32 tokens, optionally compressed with zlib or lzma. It is about half
+the size of the JSON uncompressed and smaller than JSON+zlib when compressed.
+The codec is pure Python, so encoding and decoding are *slower* than
+``json.dumps``/``json.loads`` (the C implementation): roughly 2x to encode
+and 1.4x to decode a 30-case career. Use it for size, not speed;
+``python save_codec.py bench`` measures both on any save.
+"""
+import argparse
+import json
+import lzma
+import struct
+import sys
+import time
+import zlib
+from array import array
+from itertools import accumulate, islice
+from typing import Dict, List, Optional, Tuple
+
+from data_management import atomic_write
+
+__all__ = ['encode', 'decode', 'dump', 'load', 'is_binary_save', 'SaveFormatError', 'FORMAT_VERSION',
+           'SAVE_EXTENSION']
+
+MAGIC = b"CDSV"
+FORMAT_VERSION = 1
+SAVE_EXTENSION = ".sav"
+COMPRESSION = {None: 0, "zlib": 1, "lzma": 2}
+# magic, format version, compression, reserved; then the four section lengths of the (decompressed) body
+HEADER = struct.Struct("<4sHBB")
+SECTIONS = struct.Struct("<IIII")
+
+# Each value is one or more uint32 tokens: (payload << 4) | tag. Lists of only strings or only small ints, and
+# lists of equally long such lists (testimony pairs, BM25 postings), are packed so they decode without recursion.
+CONST, INT, STR, LIST, DICT, FLOAT, BIG_INT, STR_LIST, INT_LIST, STR_ROWS, INT_ROWS = range(11)
+SMALL_INT_LIMIT = 1 << 28
+CONSTANTS = (None, False, True)
+
+class SaveFormatError(ValueError):
+    pass
+
+def _key(key) -> str:
+    """Dict keys the way ``json`` writes them."""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return json.dumps(key)
+    if isinstance(key, (int, float)):
+        return json.dumps(key)
+    raise TypeError(f"Keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+def _all_str(items) -> bool:
+    return all(type(item) is str for item in items)
+
+def _all_small_int(items) -> bool:
+    return all(type(item) is int and 0 <= item < SMALL_INT_LIMIT for item in items)
+
+def _uniform_rows(rows) -> bool:
+    width = len(rows[0])
+    return all((type(row) is list or type(row) is tuple) and len(row) == width for row in rows)
+
+class _Encoder:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.floats = array("d")
+        self.tokens: List[int] = []
+
+    def intern(self, text: str) -> int:
+        index = self.index.get(text)
+        if index is None:
+            index = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def list(self, items):
+        self.tokens.append(len(items) << 4 | LIST)
+        for item in items:
+            self.value(item)
+
+    def value(self, value):
+        append = self.tokens.append
+        kind = type(value)
+        if kind is str:
+            append(self.intern(value) << 4 | STR)
+        elif kind is dict:
+            append(len(value) << 4 | DICT)
+            intern = self.intern
+            for key in value:
+                append(intern(key if type(key) is str else _key(key)))
+            for item in value.values():
+                self.value(item)
+        elif kind is list or kind is tuple:
+            first = type(value[0]) if value else None
+            if first is str and _all_str(value):
+                append(len(value) << 4 | STR_LIST)
+                self.tokens.extend(map(self.intern, value))
+            elif first is int and _all_small_int(value):
+                append(len(value) << 4 | INT_LIST)
+                self.tokens.extend(value)
+            elif (first is list or first is tuple) and value[0] and _uniform_rows(value):
+                width = len(value[0])
+                if type(value[0][0]) is str and all(_all_str(row) for row in value):
+                    append(len(value) << 4 | STR_ROWS)
+                    append(width)
+                    for row in value:
+                        self.tokens.extend(map(self.intern, row))
+                elif type(value[0][0]) is int and all(_all_small_int(row) for row in value):
+                    append(len(value) << 4 | INT_ROWS)
+                    append(width)
+                    for row in value:
+                        self.tokens.extend(row)
+                else:
+                    self.list(value)
+            else:
+                self.list(value)
+        elif value is None or kind is bool:
+            append(CONSTANTS.index(value) << 4 | CONST)
+        elif kind is int or isinstance(value, int):
+            if 0 <= value < SMALL_INT_LIMIT:
+                append(int(value) << 4 | INT)
+            else:
+                append(self.intern(str(int(value))) << 4 | BIG_INT)
+        elif kind is float:
+            append(len(self.floats) << 4 | FLOAT)
+            self.floats.append(value)
+        elif isinstance(value, (list, tuple, dict, str)):  # subclasses, e.g. an OrderedDict
+            self.value(dict(value) if isinstance(value, dict) else str(value) if isinstance(value, str)
+                       else list(value))
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} in a save")
+
+def encode(obj, compression: Optional[str] = None) -> bytes:
+    """Encodes JSON-compatible data: a string table (every distinct string once) plus a token stream."""
+    if compression not in COMPRESSION:
+        raise ValueError(f"Unknown compression: {compression}")
+    encoder = _Encoder()
+    encoder.value(obj)
+    text = "".join(encoder.strings)
+    lengths = array("I", map(len, encoder.strings))
+    blob = text.encode("utf-8", "surrogatepass")
+    tokens = array("I", encoder.tokens)
+    if sys.byteorder == "big":
+        for section in (lengths, encoder.floats, tokens):
+            section.byteswap()
+    body = b"".join((SECTIONS.pack(len(lengths), len(blob), len(encoder.floats), len(tokens)),
+                     lengths.tobytes(), blob, encoder.floats.tobytes(), tokens.tobytes()))
+    if compression == "zlib":
+        body = zlib.compress(body, 6)
+    elif compression == "lzma":
+        body = lzma.compress(body)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, COMPRESSION[compression], 0) + body
+
+def is_binary_save(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+def _sections(data: bytes) -> Tuple[List[str], array, array]:
+    if len(data) < HEADER.size or not is_binary_save(data):
+        raise SaveFormatError("Not a binary save file")
+    _, version, compression, _ = HEADER.unpack_from(data)
+    if version > FORMAT_VERSION:
+        raise SaveFormatError(f"Save format version {version} is newer than this game supports ({FORMAT_VERSION})")
+    body = memoryview(data)[HEADER.size:]
+    if compression == COMPRESSION["zlib"]:
+        body = memoryview(zlib.decompress(body))
+    elif compression == COMPRESSION["lzma"]:
+        body = memoryview(lzma.decompress(body))
+    elif compression != COMPRESSION[None]:
+        raise SaveFormatError(f"Unknown save compression {compression}")
+    if len(body) < SECTIONS.size:
+        raise SaveFormatError("Truncated save file")
+    string_count, blob_size, float_count, token_count = SECTIONS.unpack_from(body)
+    if SECTIONS.size + 4 * string_count + blob_size + 8 * float_count + 4 * token_count != len(body):
+        raise SaveFormatError("Truncated or corrupt save file")
+    offset = SECTIONS.size
+    lengths = array("I")
+    lengths.frombytes(body[offset:offset + 4 * string_count])
+    offset += 4 * string_count
+    text = str(body[offset:offset + blob_size], "utf-8", "surrogatepass")
+    offset += blob_size
+    floats = array("d")
+    floats.frombytes(body[offset:offset + 8 * float_count])
+    offset += 8 * float_count
+    tokens = array("I")
+    tokens.frombytes(body[offset:])
+    if sys.byteorder == "big":
+        for section in (lengths, floats, tokens):
+            section.byteswap()
+    ends = list(accumulate(lengths))
+    strings = [text[start:end] for start, end in zip([0] + ends, ends)]
+    return strings, floats, tokens
+
+def decode(data: bytes):
+    strings, floats, tokens = _sections(data)
+    tokens_iter = iter(tokens)
+    next_token = tokens_iter.__next__
+    string = strings.__getitem__
+
+    def value():
+        token = next_token()
+        tag = token & 15
+        payload = token >> 4
+        if tag == STR:
+            return strings[payload]
+        if tag == DICT:
+            keys = list(map(string, islice(tokens_iter, payload)))
+            return dict(zip(keys, [value() for _ in range(payload)]))
+        if tag == STR_LIST:
+            return list(map(string, islice(tokens_iter, payload)))
+        if tag == INT_LIST:
+            return list(islice(tokens_iter, payload))
+        if tag == STR_ROWS:
+            width = next_token()
+            cells = map(string, islice(tokens_iter, payload * width))
+            return list(map(list, zip(*[cells] * width)))
+        if tag == INT_ROWS:
+            width = next_token()
+            cells = islice(tokens_iter, payload * width)
+            return list(map(list, zip(*[cells] * width)))
+        if tag == LIST:
+            return [value() for _ in range(payload)]
+        if tag == INT:
+            return payload
+        if tag == CONST:
+            return CONSTANTS[payload]
+        if tag == FLOAT:
+            return floats[payload]
+        if tag == BIG_INT:
+            return int(strings[payload])
+        raise SaveFormatError(f"Unknown value tag {tag}")
+
+    try:
+        result = value()
+    except (StopIteration, IndexError):
+        raise SaveFormatError("Truncated or corrupt save file")
+    if next(tokens_iter, None) is not None:
+        raise SaveFormatError("Trailing data in save file")
+    return result
+
+def dump(obj, path: str, compression: Optional[str] = None):
+    atomic_write(path, encode(obj, compression))
+
+def load(path: str):
+    """Loads a save in either format: binary, or the original JSON."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode(data) if is_binary_save(data) else json.loads(data)
+
+def convert(source: str, target: str, compression: Optional[str] = None):
+    """Converts between save_game.json and the binary format; the target's extension picks the format."""
+    state = load(source)
+    if target.endswith(".json"):
+        atomic_write(target, json.dumps(state).encode("utf-8"))
+    else:
+        dump(state, target, compression)
+
+def _synthetic_career(cases: int) -> Dict:
+    """A save with ``cases`` completed cases built from the real templates and serializer.
+
+    Each witness is questioned the way ``Witness.ask_question`` records it:
+    testimony, the context budget (and with it the retrieval index) and
+    ``{"question", "response"}`` memory entries.
+    """
+    import random
+    import tempfile
+    from ai_registry import registry
+    from data_management import offline_config
+    from game_logic import Game
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as scratch:
+        game = Game(offline_config(config, scratch, witness_context={"summarize": False}))
+        completed = []
+        for number in range(cases):
+            case = game.case_factory.generate_case(player_level=3, previous_cases=[])
+            for witness in case.witnesses:
+                for turn in range(12):
+                    question = f"Where were you on the night of the incident? (case {number}, question {turn})"
+                    answer = f"I was at {witness.occupation.lower()} duties until late, as I told the detectives."
+                    witness.testimony[question] = answer
+                    witness.context.add(question, answer)
+                    witness.memory.append({"question": question, "response": answer})
+            completed.append(game.serializer._serialize_case(case))
+        game.logger.save_logs()
+    registry.clear()
+    return {"phase": "CASE_PREPARATION", "reputation": 10 * cases, "completed_cases": completed,
+            "current_case": None, "unlocked_cases": cases + 1}
+
+def benchmark(state: Dict, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Best-of-``repeat`` encode/decode times (ms) and sizes for each codec.
+
+    The baseline is JSON the way ``GameSerializer`` writes and reads it
+    (``json.dumps``/``json.loads``, the C encoder and decoder), with and
+    without zlib, so the binary format is measured against what it replaces.
+    """
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return round(1000 * min(times), 2)
+
+    def json_encode():
+        return json.dumps(state).encode("utf-8")
+
+    text = json_encode()
+    packed = zlib.compress(text, 6)
+    results = {"json": {"bytes": len(text), "encode_ms": best(json_encode),
+                        "decode_ms": best(lambda: json.loads(text))},
+               "json/zlib": {"bytes": len(packed), "encode_ms": best(lambda: zlib.compress(json_encode(), 6)),
+                             "decode_ms": best(lambda: json.loads(zlib.decompress(packed)))}}
+    for compression in COMPRESSION:
+        data = encode(state, compression)
+        if decode(data) != json.loads(text):
+            raise AssertionError(f"Round trip with {compression} compression changed the save")
+        results[f"binary/{compression or 'none'}"] = {
+            "bytes": len(data), "encode_ms": best(lambda: encode(state, compression)),
+            "decode_ms": best(lambda: decode(data))}
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert and benchmark save files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    converter = commands.add_parser("convert", help="Convert a save (json <-> binary)")
+    converter.add_argument("source")
+    converter.add_argument("target", help=f"*.json for JSON, anything else (e.g. save_game{SAVE_EXTENSION}) "
+                                          "for the binary format")
+    converter.add_argument("--compression", choices=["zlib", "lzma"])
+    bench = commands.add_parser("bench", help="Round-trip benchmark against JSON (plain and zlib-compressed)")
+    bench.add_argument("save", nargs="?", help="Save file to measure (default: a synthetic career)")
+    bench.add_argument("--cases", type=int, default=30, help="Completed cases in the synthetic career")
+    bench.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        convert(args.source, args.target, args.compression)
+        print(f"Converted {args.source} to {args.target}")
+        return
+    state = load(args.save) if args.save else _synthetic_career(args.cases)
+    results = benchmark(state, args.repeat)
+    print(f"{'format':<14}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    for name, row in results.items():
+        print(f"{name:<14}{row['bytes']:>12}{row['encode_ms']:>12}{row['decode_ms']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# semantic_cache.py
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+__all__ = ['SemanticResponseCache', 'normalize_question', 'stress_band']
+
+STOPWORDS = {
+    "a", "an", "the", "on", "in", "at", "of", "to", "that", "this", "those", "these", "is", "are",
+    "was", "be", "been", "do", "does", "did", "can", "could", "would", "will", "please", "tell",
+    "me", "us", "and", "or", "so", "just", "exactly", "then",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+def normalize_question(question: str) -> List[str]:
+    """Lower-cases, strips punctuation and filler words, and returns content tokens."""
+    tokens = [t.strip("'") for t in _TOKEN_RE.findall(question.lower())]
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+def stress_band(stress: int) -> str:
+    """Buckets stress the same way the testimony prompt reacts to it (>7 reveals motives)."""
+    if stress > 7:
+        return "high"
+    if stress > 3:
+        return "medium"
+    return "low"
+
+def _features(tokens: List[str]) -> Counter:
+    """Word tokens plus character 3-gram shingles, so small spelling variants still overlap."""
+    features = Counter(f"w:{t}" for t in tokens)
+    for token in tokens:
+        padded = f"#{token}#"
+        features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+class _ScopeIndex:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[int, Tuple[Counter, str]]" = OrderedDict()
+        self.postings: Dict[str, set] = defaultdict(set)
+        self.doc_freq: Counter = Counter()
+        self.next_id = 0
+
+    def add(self, features: Counter, response: str):
+        entry_id = self.next_id
+        self.next_id += 1
+        self.entries[entry_id] = (features, response)
+        for feature in features:
+            self.postings[feature].add(entry_id)
+            self.doc_freq[feature] += 1
+        while len(self.entries) > self.max_entries:
+            old_id, (old_features, _) = self.entries.popitem(last=False)
+            for feature in old_features:
+                self.postings[feature].discard(old_id)
+                self.doc_freq[feature] -= 1
+                if self.doc_freq[feature] <= 0:
+                    del self.doc_freq[feature]
+                    del self.postings[feature]
+
+    def _weights(self, features: Counter) -> Dict[str, float]:
+        total_docs = len(self.entries) + 1
+        return {f: tf * (math.log((1 + total_docs) / (1 + self.doc_freq.get(f, 0))) + 1.0)
+                for f, tf in features.items()}
+
+    def best_match(self, features: Counter) -> Tuple[float, Optional[str]]:
+        candidates = set()
+        for feature in features:
+            if feature.startswith("w:"):
+                candidates |= self.postings.get(feature, set())
+        if not candidates:
+            return 0.0, None
+        query = self._weights(features)
+        query_norm = math.sqrt(sum(w * w for w in query.values()))
+        best_score, best_response = 0.0, None
+        for entry_id in candidates:
+            entry_features, response = self.entries[entry_id]
+            weights = self._weights(entry_features)
+            dot = sum(w * weights.get(f, 0.0) for f, w in query.items())
+            norm = query_norm * math.sqrt(sum(w * w for w in weights.values()))
+            score = dot / norm if norm else 0.0
+            if score > best_score:
+                best_score, best_response = score, response
+        return best_score, best_response
+
+class SemanticResponseCache:
+    """Second-tier cache that answers near-duplicate questions from earlier replies.
+
+    Questions are normalized and compared with TF-IDF cosine similarity over
+    word tokens and character shingles. Each scope (normally a witness persona
+    plus stress band) has its own small index, so a reply is only reused for
+    the same witness in a comparable state.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_entries_per_scope: int = 200):
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self._scopes: Dict[str, _ScopeIndex] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+
+    def lookup(self, scope: str, question: str) -> Optional[str]:
+        tokens = normalize_question(question)
+        with self._lock:
+            self.lookups += 1
+            index = self._scopes.get(scope)
+            if index is None or not tokens:
+                return None
+            score, response = index.best_match(_features(tokens))
+            if response is not None and score >= self.threshold:
+                self.hits += 1
+                return response
+            return None
+
+    def store(self, scope: str, question: str, response: str):
+        tokens = normalize_question(question)
+        if not tokens:
+            return
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is None:
+                index = self._scopes[scope] = _ScopeIndex(self.max_entries_per_scope)
+            index.add(_features(tokens), response)
+            self.stores += 1
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "stores": self.stores,
+            "scopes": len(self._scopes),
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+        }
@@ -0,0 +1,202 @@
+# session_recording.py
+import argparse
+import asyncio
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import random
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from ai_backends import LLMBackend
+from ai_metrics import metrics
+
+__all__ = ['SessionRecorder', 'SessionReplayer', 'ReplayBackend', 'ReplayMissError', 'prompt_digest',
+           'play_career']
+
+RECORDING_VERSION = 1
+
+# Game methods timed by ``play_career``; the examination is where nearly all AI traffic happens.
+PHASES = ["case_preparation", "opening_statements", "examine_witnesses", "closing_arguments",
+          "deliberation_and_verdict"]
+
+def prompt_digest(messages: List[Dict]) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ReplayMissError(Exception):
+    """Raised when a replayed session sends a prompt that was never recorded."""
+
+class SessionRecorder:
+    """Captures player inputs, the RNG seed and every prompt/response pair of a session.
+
+    Attach it as ``game.session`` (inputs) and ``AIResponseManager.recorder``
+    (responses), then ``save`` it to a gzip-compressed JSON recording.
+    """
+
+    replaying = False
+
+    def __init__(self, seed: int, cases: int = 1):
+        self.seed = seed
+        self.cases = cases
+        self.inputs: List[List[str]] = []
+        self.responses: Dict[str, str] = {}
+
+    def read_input(self, prompt: str, reader: Callable[[str], str]) -> str:
+        value = reader(prompt)
+        self.inputs.append([prompt, value])
+        return value
+
+    def record_response(self, messages: List[Dict], response: str):
+        self.responses[prompt_digest(messages)] = response
+
+    def to_dict(self) -> Dict:
+        return {"version": RECORDING_VERSION, "seed": self.seed, "cases": self.cases,
+                "inputs": self.inputs, "responses": self.responses}
+
+    def save(self, path: str):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+class SessionReplayer:
+    """Feeds a recorded session's inputs back to the game and serves its AI replies."""
+
+    replaying = True
+
+    def __init__(self, recording: Dict):
+        if recording.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {recording.get('version')}")
+        self.seed = recording["seed"]
+        self.cases = recording.get("cases", 1)
+        self.inputs = [tuple(entry) for entry in recording["inputs"]]
+        self.responses = recording["responses"]
+        self.position = 0
+
+    @classmethod
+    def load(cls, path: str) -> "SessionReplayer":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def read_input(self, prompt: str, reader: Optional[Callable[[str], str]] = None) -> str:
+        if self.position >= len(self.inputs):
+            raise EOFError("Recorded session has no more inputs")
+        recorded_prompt, value = self.inputs[self.position]
+        self.position += 1
+        if recorded_prompt != prompt:
+            logging.warning(f"Replay diverged: expected input prompt {recorded_prompt!r}, got {prompt!r}")
+        return value
+
+    def backend(self) -> "ReplayBackend":
+        return ReplayBackend(self.responses)
+
+    def install(self, game):
+        """Routes the game's inputs and AI calls through this recording."""
+        game.session = self
+        game.ai_manager.ai_manager.backend = self.backend()
+
+class ReplayBackend(LLMBackend):
+    """Serves recorded replies by prompt digest, with no network or synthetic latency."""
+
+    def __init__(self, responses: Dict[str, str]):
+        self.responses = responses
+        self.hits = 0
+        self.misses = 0
+
+    def has_capacity(self) -> bool:
+        return True
+
+    async def generate(self, messages: List[Dict], generation_config: Dict) -> str:
+        response = self.responses.get(prompt_digest(messages))
+        if response is None:
+            self.misses += 1
+            raise ReplayMissError("Prompt not found in the recorded session")
+        self.hits += 1
+        return response
+
+def _time_phases(game, timings: Dict[str, float]):
+    """Wraps the game's phase methods on the instance so their wall time accumulates in ``timings``."""
+    for name in PHASES:
+        method = getattr(game, name)
+        timings.setdefault(name, 0.0)
+        if inspect.iscoroutinefunction(method):
+            async def timed(*args, _method=method, _name=name, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await _method(*args, **kwargs)
+                finally:
+                    timings[_name] += time.perf_counter() - start
+        else:
+            def timed(*args, _method=method, _name=name, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return _method(*args, **kwargs)
+                finally:
+                    timings[_name] += time.perf_counter() - start
+        setattr(game, name, wraps(method)(timed))
+
+async def play_career(game, cases: int = 1) -> Dict[str, float]:
+    """Plays ``cases`` career cases through the console flow and returns per-phase wall times."""
+    timings: Dict[str, float] = {}
+    _time_phases(game, timings)
+    game.state.player_reputation = 0
+    game.state.unlocked_cases = 1
+    start = time.perf_counter()
+    try:
+        for _ in range(cases):
+            await game.next_case()
+    except SystemExit:
+        pass  # next_case exits once every case template has been played
+    finally:
+        game.prefetcher.discard()
+    timings["total"] = time.perf_counter() - start
+    return {name: round(seconds, 4) for name, seconds in timings.items()}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record or replay a console game session.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("path", help="Recording file (gzip-compressed JSON)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed when recording (default: random)")
+    parser.add_argument("--cases", type=int, default=1, help="Number of cases to record")
+    args = parser.parse_args(argv)
+
+    from game_logic import Game
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    if args.mode == "record":
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+        session = SessionRecorder(seed, args.cases)
+        random.seed(seed)
+        game = Game(config)
+        game.session = session
+        game.ai_manager.ai_manager.recorder = session
+    else:
+        session = SessionReplayer.load(args.path)
+        # Replies come from the recording; a warm disk cache would hide the work being measured.
+        config = dict(config, ai_cache=dict(config.get("ai_cache", {}), path=None))
+        random.seed(session.seed)
+        game = Game(config)
+        session.install(game)
+
+    async def run() -> Dict[str, float]:
+        try:
+            return await play_career(game, session.cases)
+        finally:
+            await game.ai_manager.close()
+
+    timings = asyncio.run(run())
+    if args.mode == "record":
+        session.save(args.path)
+        print(f"Recorded {len(session.inputs)} inputs and {len(session.responses)} responses to {args.path}")
+    else:
+        backend = game.ai_manager.ai_manager.backend
+        print(f"Replayed {session.position}/{len(session.inputs)} inputs; "
+              f"{backend.hits} recorded replies served, {backend.misses} misses")
+    print(json.dumps({"phase_seconds": timings, "ai_calls": metrics.snapshot()["prompt_types"]}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# single_flight.py
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+__all__ = ['SingleFlight']
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one underlying task.
+
+    Every caller awaits the shared task through ``asyncio.shield``, so a caller
+    being cancelled (e.g. a closed window) never cancels the work the other
+    callers are still waiting for.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Counter = Counter()
+        self.started = 0
+        self.coalesced = 0
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Returns the shared task for ``key``, starting it if nothing is in flight."""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(factory())
+            self._calls[key] = task
+            task.add_done_callback(partial(self._forget, key))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.start(key, factory)
+        with self.waiting(key):
+            return await asyncio.shield(task)
+
+    @contextmanager
+    def waiting(self, key: Hashable):
+        """Counts the caller as waiting on ``key`` (for callers that follow the task other than by awaiting it)."""
+        self._waiters[key] += 1
+        try:
+            yield
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] <= 0:
+                del self._waiters[key]
+
+    def cancel_unwaited(self, key: Hashable) -> bool:
+        """Cancels the task for ``key`` only if no caller is awaiting it (e.g. an unused prefetch)."""
+        task = self._calls.get(key)
+        if task is None or task.done() or self._waiters.get(key, 0) > 0:
+            return False
+        task.cancel()
+        return True
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter was cancelled.
+            task.exception()
+
+    def pending(self, key: Hashable) -> bool:
+        task = self._calls.get(key)
+        return task is not None and not task.done()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict:
+        return {"started": self.started, "coalesced": self.coalesced, "in_flight": self.in_flight()}
@@ -2,9 +2,14 @@
 from enum import Enum, auto
 from abc import ABC, abstractmethod
 import json
-from typing import Dict, List, Optional, Any
+import threading
+import uuid
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 from collections import OrderedDict, deque
 from game_objects import Case, Evidence, Witness, CaseType
+from data_management import atomic_write
+import save_codec
 
 class GamePhase(Enum):
     MAIN_MENU = auto()
@@ -37,9 +42,47 @@ class EventManager:
             for listener in self.listeners[event.name]:
                 listener(event)
 
+class ChangeSet:
+    """What one state update touched, so observers can patch just the affected views.
+
+    Evidence is identified by its index in the case's evidence list, jurors by
+    id and witnesses by name. ``case_changed`` means a new or reloaded case:
+    every view is stale. Change-sets merge, so bursts of updates can be
+    applied once.
+    """
+
+    def __init__(self, case_changed: bool = False, evidence_added: Optional[Set[int]] = None,
+                 evidence_updated: Optional[Set[int]] = None, juror_sentiment: Optional[Dict[int, float]] = None,
+                 witness_stress: Optional[Dict[str, int]] = None):
+        self.case_changed = case_changed
+        self.evidence_added: Set[int] = set(evidence_added or ())
+        self.evidence_updated: Set[int] = set(evidence_updated or ())
+        self.juror_sentiment: Dict[int, float] = dict(juror_sentiment or {})  # juror id -> sentiment delta
+        self.witness_stress: Dict[str, int] = dict(witness_stress or {})  # witness name -> new stress
+
+    def __bool__(self) -> bool:
+        return bool(self.case_changed or self.evidence_added or self.evidence_updated
+                    or self.juror_sentiment or self.witness_stress)
+
+    def merge(self, other: Optional["ChangeSet"]) -> "ChangeSet":
+        if other is None:
+            return self
+        self.case_changed = self.case_changed or other.case_changed
+        self.evidence_added |= other.evidence_added
+        self.evidence_updated |= other.evidence_updated
+        for juror_id, delta in other.juror_sentiment.items():
+            self.juror_sentiment[juror_id] = self.juror_sentiment.get(juror_id, 0) + delta
+        self.witness_stress.update(other.witness_stress)
+        return self
+
+    def __repr__(self) -> str:
+        return (f"ChangeSet(case_changed={self.case_changed}, evidence_added={sorted(self.evidence_added)}, "
+                f"evidence_updated={sorted(self.evidence_updated)}, juror_sentiment={self.juror_sentiment}, "
+                f"witness_stress={self.witness_stress})")
+
 class GameStateObserver(ABC):
     @abstractmethod
-    def on_state_change(self, new_state: GamePhase, context: Optional[Dict]):
+    def on_state_change(self, new_state: GamePhase, context: Optional[Dict], changes: Optional[ChangeSet] = None):
         pass
 
 class GameState:
@@ -57,18 +100,90 @@ class GameState:
     def add_observer(self, observer: GameStateObserver):
         self.observers.append(observer)
 
-    def transition_to(self, new_phase: GamePhase, context: Optional[Dict] = None):
+    def transition_to(self, new_phase: GamePhase, context: Optional[Dict] = None,
+                      changes: Optional[ChangeSet] = None):
         self.history.append(self.current_phase)
         self.current_phase = new_phase
-        self.event_manager.emit(Event("state_changed", {"new_phase": new_phase, "context": context}))
+        self._notify(context, changes)
+        self.event_manager.emit(Event("phase_changed", {"new_phase": new_phase, "context": context}))
+
+    def publish(self, changes: ChangeSet):
+        """Announces a change to the game's data that does not move it to another phase."""
+        if changes:
+            self._notify(None, changes)
 
     def undo(self):
         if self.history:
             self.current_phase = self.history.pop()
-            self.event_manager.emit(Event("state_changed", {"new_phase": self.current_phase, "context": None}))
+            self._notify(None, None)
+
+    def _notify(self, context: Optional[Dict], changes: Optional[ChangeSet]):
+        for observer in self.observers:
+            observer.on_state_change(self.current_phase, context, changes)
+        self.event_manager.emit(Event("state_changed", {"new_phase": self.current_phase, "context": context,
+                                                        "changes": changes}))
+
+class LazyCase:
+    """Stands in for a completed case loaded from a save until something needs the real ``Case``.
+
+    ``source`` is the case's snapshot dict, or a callable that reads it (save
+    slots keep one file per case). ``case_id``, ``title`` and ``case_type``
+    come from the snapshot; any other attribute restores the case with
+    ``restore(snapshot)`` and is read from it from then on.
+    """
+
+    def __init__(self, source: Union[Dict, Callable[[], Dict]], restore: Callable[[Dict], Case],
+                 case_id: Optional[str] = None):
+        self._source = source
+        self._restore = restore
+        self._case: Optional[Case] = None
+        self._lock = threading.Lock()
+        if case_id is None:
+            case_id = source.get('case_id') if isinstance(source, dict) else getattr(source, 'case_id', None)
+        self.case_id = case_id or uuid.uuid4().hex[:12]  # Old saves have no ids
+
+    @property
+    def snapshot(self) -> Dict:
+        with self._lock:
+            if callable(self._source):
+                self._source = self._source()
+            self._source['case_id'] = self.case_id
+            return self._source
+
+    @property
+    def materialized(self) -> bool:
+        return self._case is not None
+
+    def materialize(self) -> Case:
+        if self._case is None:
+            case = self._restore(self.snapshot)
+            with self._lock:
+                if self._case is None:
+                    self._case = case
+        return self._case
+
+    @property
+    def title(self) -> str:
+        return self._case.title if self._case is not None else self.snapshot['title']
+
+    @property
+    def case_type(self) -> CaseType:
+        return self._case.case_type if self._case is not None else CaseType(self.snapshot['case_type'])
+
+    def __getattr__(self, name: str):
+        if name.startswith('__') or name in ('_source', '_restore', '_case', '_lock'):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __repr__(self) -> str:
+        return f"LazyCase({self.case_id!r}, materialized={self.materialized})"
 
 class GameSerializer:
+    def __init__(self, compression: Optional[str] = None):
+        self.compression = compression  # For binary saves: None, "zlib" or "lzma"
+
     def save_game_state(self, game_state: GameState, filename: str):
+        """Writes JSON, or the compact binary format (``save_codec``) when ``filename`` ends in ``.sav``."""
         state_dict = {
             'phase': game_state.current_phase.name,
             'reputation': game_state.player_reputation,
@@ -76,24 +191,27 @@ class GameSerializer:
             'current_case': self._serialize_case(game_state.active_case) if game_state.active_case else None,
             'unlocked_cases': game_state.unlocked_cases
         }
-        with open(filename, 'w') as f:
-            json.dump(state_dict, f)
+        if filename.endswith(save_codec.SAVE_EXTENSION):
+            save_codec.dump(state_dict, filename, self.compression)
+        else:
+            atomic_write(filename, json.dumps(state_dict).encode("utf-8"))
 
     def load_game_state(self, filename: str, case_factory, witness_factory, evidence_factory, 
                        relationship_network, backstory_generator) -> GameState:
-        with open(filename, 'r') as f:
-            state_dict = json.load(f)
-        
+        state_dict = save_codec.load(filename)  # Either format
+        return self.restore_game_state(state_dict, case_factory, witness_factory, evidence_factory,
+                                       relationship_network, backstory_generator)
+
+    def restore_game_state(self, state_dict: Dict, case_factory, witness_factory, evidence_factory,
+                           relationship_network, backstory_generator) -> GameState:
         game_state = GameState(EventManager())
         game_state.current_phase = GamePhase[state_dict['phase']]
         game_state.player_reputation = state_dict['reputation']
-        game_state.completed_cases = [
-            self._deserialize_case(
-                case_dict, case_factory, witness_factory, evidence_factory,
-                relationship_network, backstory_generator, case_factory.config
-            )
-            for case_dict in state_dict['completed_cases']
-        ]
+        # Completed cases are rarely looked at again: restore each one only when it is first used.
+        restore = partial(self._deserialize_case, case_factory=case_factory, witness_factory=witness_factory,
+                          evidence_factory=evidence_factory, relationship_network=relationship_network,
+                          backstory_generator=backstory_generator, config=case_factory.config)
+        game_state.completed_cases = [LazyCase(source, restore) for source in state_dict['completed_cases']]
         
         if state_dict['current_case']:
             game_state.active_case = self._deserialize_case(
@@ -106,7 +224,10 @@ class GameSerializer:
         return game_state
 
     def _serialize_case(self, case: Case) -> Dict:
+        if isinstance(case, LazyCase) and not case.materialized:
+            return case.snapshot  # Unchanged since it was loaded
         return {
+            'case_id': case.case_id,
             'title': case.title,
             'summary': case.summary,
             'case_type': case.case_type.value,
@@ -121,6 +242,7 @@ class GameSerializer:
 
     def _deserialize_case(self, case_dict: Dict, case_factory, witness_factory, evidence_factory,
                          relationship_network, backstory_generator, config: Dict) -> Case:
+        """Rebuilds a case from its snapshot; nothing is generated and witness personas are prepared on first use."""
         case = Case(
             title=case_dict['title'],
             summary=case_dict['summary'],
@@ -133,7 +255,9 @@ class GameSerializer:
             witness_factory=witness_factory,
             relationship_network=relationship_network,
             backstory_generator=backstory_generator,
-            case_context=case_dict.get('case_context', {})
+            case_context=case_dict.get('case_context', {}),
+            case_id=case_dict.get('case_id'),
+            generate=False
         )
         case.evidence_list = [self._deserialize_evidence(e_dict) for e_dict in case_dict['evidence_list']]
         case.witnesses = [self._deserialize_witness(w_dict, config) for w_dict in case_dict['witnesses']]
@@ -162,6 +286,8 @@ class GameSerializer:
             "backstory": witness.backstory,
             "stress": witness.stress,
             "testimony": list(witness.testimony.items()),
+            "testimony_summary": witness.context.to_dict(),
+            "testimony_index": witness.index.to_dict(),
             "memory": list(witness.memory),
             "base_stress": witness.base_stress,
             "hidden_motive": witness.hidden_motive
@@ -180,5 +306,8 @@ class GameSerializer:
         )
         witness.stress = witness_dict["stress"]
         witness.testimony = OrderedDict(witness_dict["testimony"])
+        summary = witness_dict.get("testimony_summary", {})
+        witness.context.load(witness.testimony.items(), summary.get("summary", ""), summary.get("summarized", 0))
         witness.memory = deque(witness_dict["memory"], maxlen=20)
+        witness.restore_index(witness_dict.get("testimony_index"))
         return witness
\ No newline at end of file
@@ -0,0 +1,19 @@
+import json
+import tempfile
+import data_management
+
+# Event logs of test games; removed when the test process exits.
+_scratch = tempfile.TemporaryDirectory(prefix="courtroom-tests-")
+
+def offline_config(**overrides):
+    """config.json as ``data_management.offline_config`` sets it up, e.g. ``offline_config(autosave={...})``."""
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    return data_management.offline_config(config, _scratch.name, **overrides)
+
+def offline_game(config):
+    """A ``Game`` built from ``config`` that does not append to the game log."""
+    from game_logic import Game
+    game = Game(config)
+    game.logger.log_event = lambda event_type, details, case=None: None
+    return game
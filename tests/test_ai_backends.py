@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+import time
+from aiohttp import web
+import json
+from ai_backends import GeminiBackend, GeminiAPIError
+from ai_module import AIResponseManager
+
+class FakeGeminiServer:
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.requests = []
+        self.app = web.Application()
+        self.app.router.add_post("/models/{model_method}", self.handle)
+
+    async def handle(self, request):
+        if request.match_info["model_method"].endswith(":streamGenerateContent"):
+            return await self.handle_stream(request)
+        body = await request.json()
+        self.requests.append(body)
+        if request.headers.get("x-goog-api-key") != "dummy_key":
+            return web.Response(status=403, text="bad key")
+        await asyncio.sleep(self.delay)
+        text = body["contents"][-1]["parts"][0]["text"]
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": f" echo: {text} "}]}}]})
+
+    async def handle_stream(self, request):
+        body = await request.json()
+        self.requests.append(body)
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for word in [" Ladies", " and", " gentlemen."]:
+            payload = {"candidates": [{"content": {"parts": [{"text": word}]}}]}
+            await resp.write(f"data: {json.dumps(payload)}\r\n\r\n".encode())
+            await asyncio.sleep(self.delay)
+        await resp.write_eof()
+        return resp
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+class TestGeminiBackend(unittest.TestCase):
+    def test_normalize_contents(self):
+        messages = [{"role": "user", "parts": ["plain", {"text": "dict"}, [{"role": "user", "parts": [{"text": "nested"}]}]]}]
+        contents = GeminiBackend.normalize_contents(messages)
+        self.assertEqual(contents, [{"role": "user", "parts": [{"text": "plain"}, {"text": "dict"}, {"text": "nested"}]}])
+
+    def test_system_message_becomes_system_instruction(self):
+        messages = [{"role": "system", "parts": [{"text": "You are a witness."}]},
+                    {"role": "user", "parts": [{"text": "Where were you?"}]},
+                    {"role": "model", "parts": [{"text": "At home."}]},
+                    {"role": "user", "parts": ["And then?"]}]
+        body = GeminiBackend.request_body(messages, {"temperature": 0.7})
+        self.assertEqual(body["systemInstruction"], {"parts": [{"text": "You are a witness."}]})
+        self.assertEqual([content["role"] for content in body["contents"]], ["user", "model", "user"])
+        self.assertNotIn("systemInstruction", GeminiBackend.request_body(messages[1:], {}))
+
+    def test_concurrent_requests_overlap(self):
+        async def run_test():
+            server = FakeGeminiServer(delay=0.2)
+            base_url = await server.start()
+            backend = GeminiBackend("dummy_key", base_url=base_url)
+            try:
+                start = time.perf_counter()
+                results = await asyncio.gather(*[
+                    backend.generate([{"role": "user", "parts": [{"text": f"q{i}"}]}], {"temperature": 0.7})
+                    for i in range(4)
+                ])
+                elapsed = time.perf_counter() - start
+            finally:
+                await backend.close()
+                await server.stop()
+            self.assertEqual(results, [f" echo: q{i} " for i in range(4)])
+            self.assertLess(elapsed, 0.6)
+            self.assertEqual(server.requests[0]["generationConfig"], {"temperature": 0.7})
+
+        asyncio.run(run_test())
+
+    def test_error_status_raises(self):
+        async def run_test():
+            server = FakeGeminiServer(delay=0)
+            base_url = await server.start()
+            backend = GeminiBackend("wrong_key", base_url=base_url)
+            try:
+                with self.assertRaises(GeminiAPIError) as ctx:
+                    await backend.generate([{"role": "user", "parts": ["hi"]}], {})
+            finally:
+                await backend.close()
+                await server.stop()
+            self.assertEqual(ctx.exception.status, 403)
+
+        asyncio.run(run_test())
+
+    def test_stream_yields_chunks_and_caches_final_text(self):
+        async def run_test():
+            server = FakeGeminiServer(delay=0.01)
+            base_url = await server.start()
+            manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+            manager.backend = GeminiBackend("dummy_key", base_url=base_url)
+            messages = [{"role": "user", "parts": [{"text": "opening"}]}]
+            try:
+                streamed = [chunk async for chunk in manager.stream_response(messages)]
+                replayed = [chunk async for chunk in manager.stream_response(messages)]
+            finally:
+                await manager.close()
+                await server.stop()
+            return streamed, replayed, len(server.requests)
+
+        streamed, replayed, request_count = asyncio.run(run_test())
+        self.assertEqual(streamed, ["Ladies", " and", " gentlemen."])
+        self.assertEqual(replayed, ["Ladies and gentlemen."])
+        self.assertEqual(request_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from ai_backends import GeminiAPIError, LLMBackend, OfflineBackend
+from ai_metrics import AIMetrics, LatencyHistogram, metrics
+from ai_module import AIResponseManager
+from ai_resilience import ResilientBackend, RetryPolicy
+
+class FlakyBackend(LLMBackend):
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    async def generate(self, messages, generation_config):
+        if self.failures:
+            self.failures -= 1
+            raise GeminiAPIError(503, "unavailable")
+        return "Overruled."
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_keep_relative_precision(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(0.5), 0.5, delta=0.5 * 0.02)
+        self.assertAlmostEqual(histogram.percentile(0.99), 0.99, delta=0.99 * 0.02)
+        self.assertEqual(histogram.percentile(1.0), 1.0)
+        self.assertAlmostEqual(histogram.count_at_or_below(0.1), 100, delta=2)
+        self.assertLess(len(histogram.counts), 1000)
+
+class TestAIMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.manager = AIResponseManager({"ai_backend": "offline", "ai_cache": {"path": None}})
+        self.manager.backend = OfflineBackend(latency_ms=5, chunk_words=2)
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_calls_are_tagged_by_prompt_type_and_tier(self):
+        messages = [{"role": "user", "parts": [{"text": "opening statement please"}]}]
+
+        async def run_test():
+            await self.manager.generate_response(messages, prompt_type="opening_statement")
+            await self.manager.generate_response(messages, prompt_type="opening_statement")
+            other = [{"role": "user", "parts": [{"text": "stream this"}]}]
+            return [chunk async for chunk in self.manager.stream_response(other, prompt_type="closing_statement")]
+
+        asyncio.run(run_test())
+        snapshot = metrics.snapshot()["prompt_types"]
+        opening = snapshot["opening_statement"]
+        self.assertEqual(opening["calls"], 2)
+        self.assertEqual(opening["tiers"], {"backend": 1, "memory": 1})
+        self.assertGreaterEqual(opening["latency_seconds"]["max"], 0.005)
+        self.assertGreater(opening["prompt_tokens_estimated"], 0)
+        closing = snapshot["closing_statement"]
+        self.assertLessEqual(closing["first_token_seconds"]["max"], closing["latency_seconds"]["max"])
+
+    def test_retries_and_fallbacks_are_counted(self):
+        self.manager.backend = ResilientBackend(FlakyBackend(failures=1), retry=RetryPolicy(base_delay=0))
+        messages = [{"role": "user", "parts": [{"text": "rule"}]}]
+        asyncio.run(self.manager.generate_response(messages, prompt_type="judge_ruling"))
+        self.manager.backend = ResilientBackend(FlakyBackend(failures=10), retry=RetryPolicy(max_attempts=1))
+        other = [{"role": "user", "parts": [{"text": "rule again"}]}]
+        reply = asyncio.run(self.manager.generate_response(other, prompt_type="judge_ruling"))
+        self.assertEqual(reply, self.manager.fallbacks["judge_ruling"])
+        ruling = metrics.snapshot()["prompt_types"]["judge_ruling"]
+        self.assertEqual(ruling["retries"], 1)
+        self.assertEqual(ruling["tiers"], {"backend": 1, "fallback": 1})
+
+    def test_snapshots_in_json_and_prometheus_formats(self):
+        asyncio.run(self.manager.generate_response([{"role": "user", "parts": ["hi"]}], prompt_type="witness_testimony"))
+        directory = tempfile.mkdtemp()
+        json_path = metrics.write_snapshot(os.path.join(directory, "metrics.json"))
+        with open(json_path) as f:
+            self.assertIn("witness_testimony", json.load(f)["prompt_types"])
+        prom_path = metrics.write_snapshot(os.path.join(directory, "metrics.prom"), "prometheus")
+        with open(prom_path) as f:
+            text = f.read()
+        self.assertIn('ai_calls_total{prompt_type="witness_testimony",tier="backend"} 1', text)
+        self.assertIn('ai_call_latency_seconds_bucket{prompt_type="witness_testimony",le="+Inf"} 1', text)
+
+    def test_snapshot_signal_does_not_wait_for_the_lock(self):
+        signalled = AIMetrics()
+        signalled.snapshot_path = os.path.join(tempfile.mkdtemp(), "metrics.json")
+        with signalled._lock:  # as if the signal arrived inside record_call
+            writer = signalled._on_snapshot_signal(None, None)
+            self.assertFalse(os.path.exists(signalled.snapshot_path))
+        writer.join(5)
+        self.assertTrue(os.path.exists(signalled.snapshot_path))
+
+if __name__ == '__main__':
+    unittest.main()
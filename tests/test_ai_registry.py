@@ -0,0 +1,36 @@
+import unittest
+from ai_registry import registry, get_chat_client, get_prompt_manager
+from game_objects import Witness
+
+class TestAIRegistry(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = {
+            "gemini_api_key": "dummy_key",
+            "template_paths": {
+                "prompt_templates": "templates/prompt_templates.json"
+            }
+        }
+
+    def tearDown(self):
+        registry.clear()
+
+    def make_witness(self, name: str) -> Witness:
+        return Witness(name=name, occupation="Accountant", personalities=["Calm"], relationship="Colleague",
+                       backstory="Works at TechCorp.", base_stress=3, hidden_motive="None", config=self.config)
+
+    def test_witnesses_share_client_and_prompt_manager(self):
+        first = self.make_witness("Alex Martinez")
+        second = self.make_witness("Sam Lee")
+        self.assertIs(first.ai_manager, second.ai_manager)
+        self.assertIs(first.ai_manager.ai_manager.cache, second.ai_manager.ai_manager.cache)
+        self.assertIs(first.prompt_manager, second.prompt_manager)
+        self.assertIs(first.ai_manager, get_chat_client(dict(self.config)))
+
+    def test_different_config_gets_separate_client(self):
+        other = dict(self.config, max_tokens=100)
+        self.assertIsNot(get_chat_client(self.config), get_chat_client(other))
+        self.assertIs(get_prompt_manager(self.config), get_prompt_manager(other))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import time
+from ai_backends import GeminiAPIError
+from ai_resilience import (TokenBucket, CircuitBreaker, CircuitOpenError, RetryPolicy, ResilientBackend,
+                           FALLBACK_RESPONSES)
+from ai_module import AIResponseManager
+
+class FlakyBackend:
+    def __init__(self, failures: int, status: int = 429):
+        self.failures = failures
+        self.status = status
+        self.calls = 0
+
+    async def generate(self, messages, generation_config):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise GeminiAPIError(self.status, "quota exceeded")
+        return "ok"
+
+    async def stream(self, messages, generation_config):
+        yield await self.generate(messages, generation_config)
+
+    async def close(self):
+        pass
+
+def fast_retry(max_attempts: int = 4) -> RetryPolicy:
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.002)
+
+class TestResilientBackend(unittest.TestCase):
+    def test_retries_retryable_errors(self):
+        backend = ResilientBackend(FlakyBackend(failures=2), retry=fast_retry())
+        self.assertEqual(asyncio.run(backend.generate([], {})), "ok")
+        self.assertEqual(backend.stats()["retries"], 2)
+        self.assertEqual(backend.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_does_not_retry_client_errors(self):
+        flaky = FlakyBackend(failures=1, status=400)
+        backend = ResilientBackend(flaky, retry=fast_retry())
+        with self.assertRaises(GeminiAPIError):
+            asyncio.run(backend.generate([], {}))
+        self.assertEqual(flaky.calls, 1)
+
+    def test_breaker_opens_and_fails_fast(self):
+        flaky = FlakyBackend(failures=100, status=503)
+        backend = ResilientBackend(flaky, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+                                   retry=fast_retry(max_attempts=10))
+        with self.assertRaises(GeminiAPIError):
+            asyncio.run(backend.generate([], {}))
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(backend.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(backend.generate([], {}))
+        self.assertEqual(flaky.calls, 3)
+        self.assertFalse(backend.has_capacity())
+
+    def test_deadline_stops_slow_requests(self):
+        class SlowBackend(FlakyBackend):
+            async def generate(self, messages, generation_config):
+                await asyncio.sleep(1)
+
+        backend = ResilientBackend(SlowBackend(0), retry=fast_retry(max_attempts=1), deadline=0.05)
+        start = time.perf_counter()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(backend.generate([], {}))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_token_bucket_paces_requests(self):
+        bucket = TokenBucket(requests_per_minute=600, burst=2)  # 10 per second
+
+        async def run_test():
+            start = time.perf_counter()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run_test())
+        self.assertGreater(elapsed, 0.15)
+        self.assertLess(elapsed, 0.5)
+
+    def test_half_open_breaker_lets_one_probe_through(self):
+        class SlowRecovery(FlakyBackend):
+            async def generate(self, messages, generation_config):
+                await asyncio.sleep(0.05)
+                return await super().generate(messages, generation_config)
+
+        def tripped(failures):
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+            breaker.record_failure()
+            time.sleep(0.02)
+            slow = SlowRecovery(failures=failures, status=503)
+            return slow, ResilientBackend(slow, breaker=breaker, retry=fast_retry(max_attempts=1))
+
+        async def backlog(backend):
+            return await asyncio.gather(*(backend.generate([], {}) for _ in range(5)), return_exceptions=True)
+
+        recovered, backend = tripped(failures=0)
+        results = asyncio.run(backlog(backend))
+        self.assertEqual(results.count("ok"), 1)
+        self.assertTrue(all(isinstance(result, CircuitOpenError) for result in results if result != "ok"))
+        self.assertEqual(recovered.calls, 1)
+        self.assertEqual(backend.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(asyncio.run(backlog(backend)), ["ok"] * 5)
+
+        failing, backend = tripped(failures=100)
+        results = asyncio.run(backlog(backend))
+        self.assertEqual(failing.calls, 1)
+        self.assertEqual(sum(isinstance(result, GeminiAPIError) for result in results), 1)
+        self.assertEqual(backend.breaker.state, CircuitBreaker.OPEN)
+
+    def test_rate_limit_wait_respects_the_deadline(self):
+        bucket = TokenBucket(requests_per_minute=60, burst=1)  # one per second
+        backend = ResilientBackend(FlakyBackend(0), limiter=bucket, retry=fast_retry(), deadline=0.1)
+        self.assertEqual(asyncio.run(backend.generate([], {})), "ok")
+        start = time.perf_counter()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(backend.generate([], {}))
+        self.assertLess(time.perf_counter() - start, 0.05)  # failed at once instead of sleeping past it
+        self.assertGreater(bucket.available(), -0.5)  # the reservation was given back
+
+class TestManagerFallbacks(unittest.TestCase):
+    def test_failures_use_fallback_and_are_not_cached(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = FlakyBackend(failures=1, status=400)
+        messages = [{"role": "user", "parts": [{"text": "Where were you?"}]}]
+
+        async def run_test():
+            first = await manager.generate_response(messages, prompt_type="witness_testimony")
+            second = await manager.generate_response(messages, prompt_type="witness_testimony")
+            return first, second
+
+        first, second = asyncio.run(run_test())
+        self.assertEqual(first, FALLBACK_RESPONSES["witness_testimony"])
+        self.assertEqual(second, "ok")
+        self.assertEqual(manager.cache.stats()["stores"], 1)
+
+    def test_unknown_prompt_type_reports_error_without_caching(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = FlakyBackend(failures=1, status=400)
+        response = asyncio.run(manager.generate_response([{"role": "user", "parts": ["x"]}]))
+        self.assertTrue(response.startswith("[Error generating response"))
+        self.assertEqual(manager.cache.stats()["stores"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import threading
+import time
+from async_bridge import AsyncBridge
+
+class FakeWidget:
+    """Stands in for a Tk widget: records its <Destroy> binding so the test can fire it."""
+
+    def __init__(self):
+        self.on_destroy = None
+
+    def bind(self, sequence, handler, add=None):
+        self.on_destroy = handler
+
+    def destroy(self):
+        self.on_destroy(type("Event", (), {"widget": self})())
+
+class TestAsyncBridge(unittest.TestCase):
+    def setUp(self):
+        self.bridge = AsyncBridge()
+
+    def tearDown(self):
+        self.bridge.stop()
+
+    def pump(self, condition, timeout: float = 2.0):
+        """Plays the Tk mainloop: drains UI callbacks until ``condition()`` holds."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out waiting for the background loop")
+            self.bridge.drain()
+            time.sleep(0.005)
+
+    def test_results_are_delivered_on_the_calling_thread(self):
+        results = []
+
+        async def answer():
+            await asyncio.sleep(0.01)
+            return threading.current_thread().name
+
+        self.bridge.submit(answer(), on_done=lambda future: results.append(
+            (future.result(), threading.current_thread() is threading.main_thread())))
+        self.pump(lambda: results)
+        self.assertEqual(results, [("async-bridge", True)])
+
+    def test_one_loop_is_reused_across_requests(self):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = self.bridge.submit(current_loop()).result(2)
+        second = self.bridge.submit(current_loop()).result(2)
+        self.assertIs(first, second)
+        self.assertIs(first, self.bridge.loop)
+
+    def test_requests_run_concurrently(self):
+        async def slow():
+            await asyncio.sleep(0.1)
+
+        start = time.perf_counter()
+        futures = [self.bridge.submit(slow()) for _ in range(5)]
+        for future in futures:
+            future.result(2)
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(self.bridge.stats()["completed"], 5)
+
+    def test_streamed_chunks_are_marshalled_to_the_ui_thread(self):
+        chunks = []
+        on_chunk = self.bridge.ui_callback(lambda chunk: chunks.append((chunk, threading.current_thread().name)))
+
+        async def stream():
+            for chunk in ["The ", "witness ", "hesitates."]:
+                on_chunk(chunk)
+                await asyncio.sleep(0)
+
+        self.bridge.submit(stream()).result(2)
+        self.assertEqual(chunks, [])  # nothing touches the UI until the mainloop drains
+        self.pump(lambda: len(chunks) == 3)
+        self.assertEqual("".join(chunk for chunk, _ in chunks), "The witness hesitates.")
+        self.assertTrue(all(name == threading.current_thread().name for _, name in chunks))
+
+    def test_destroying_the_owner_cancels_its_requests(self):
+        window = FakeWidget()
+        other_window = FakeWidget()
+        cancelled = threading.Event()
+        finished = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def quick():
+            await asyncio.sleep(0.05)
+            return "Overruled"
+
+        future = self.bridge.submit(slow(), on_done=finished.append, owner=window)
+        other = self.bridge.submit(quick(), owner=other_window)
+        self.assertEqual(self.bridge.pending(window), 1)
+        window.destroy()
+        self.assertTrue(cancelled.wait(2))
+        self.pump(lambda: finished)
+        self.assertTrue(future.cancelled())
+        self.assertEqual(other.result(2), "Overruled")
+        self.assertEqual(self.bridge.pending(window), 0)
+        self.assertEqual(self.bridge.stats()["cancelled"], 1)
+
+    def test_failures_reach_the_done_callback(self):
+        errors = []
+
+        async def broken():
+            raise RuntimeError("backend unavailable")
+
+        self.bridge.submit(broken(), on_done=lambda future: errors.append(future.exception()))
+        self.pump(lambda: errors)
+        self.assertIsInstance(errors[0], RuntimeError)
+        self.assertEqual(self.bridge.stats()["failed"], 1)
+
+    def test_stop_cancels_pending_work(self):
+        future = self.bridge.submit(asyncio.sleep(10))
+        self.bridge.stop(timeout=2)
+        self.assertTrue(future.cancelled())
+        self.assertIsNone(self.bridge.loop)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from ai_registry import registry
+from tests import offline_config, offline_game
+from state_management import GamePhase
+
+class TestAutosave(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = offline_config(witness_context={"summarize": False},
+                                     autosave={"directory": self.tmp.name, "slot": "autosave"})
+        self.game = offline_game(self.config)
+        self.autosave = self.game.autosave
+
+    def tearDown(self):
+        self.autosave.close()
+        registry.clear()
+        self.tmp.cleanup()
+
+    def play_case(self):
+        """Starts a case, questions a witness and completes it, like ``next_case``."""
+        game = self.game
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+        game.state.transition_to(GamePhase.CASE_PREPARATION)
+        witness = game.current_case.witnesses[0]
+        witness.testimony["Where were you?"] = "At the office."
+        game.state.transition_to(GamePhase.COURTROOM_PROCEEDINGS)
+        game.state.completed_cases.append(game.current_case)
+        game.state.unlocked_cases += 1
+        return game.current_case
+
+    def slot_file(self, *parts):
+        return os.path.join(self.tmp.name, "autosave", *parts)
+
+    def test_phase_transitions_autosave_in_the_background(self):
+        case = self.play_case()
+        self.assertTrue(self.autosave.flush(5))
+        with open(self.slot_file("state.json")) as f:
+            header = json.load(f)
+        self.assertEqual(header["phase"], "COURTROOM_PROCEEDINGS")
+        self.assertEqual(header["current_case"], case.case_id)
+        with open(self.slot_file(f"active-{case.case_id}.json")) as f:
+            self.assertEqual(json.load(f)["witnesses"][0]["testimony"], [["Where were you?", "At the office."]])
+        self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(self.slot_file())))
+
+    def test_completed_cases_are_written_once(self):
+        first = self.play_case()
+        second = self.play_case()
+        self.game.state.transition_to(GamePhase.DELIBERATION)
+        self.autosave.flush(5)
+        path = self.slot_file("cases", f"{first.case_id}.json")
+        written_at = os.stat(path).st_mtime_ns
+        first.title = "Changed after completion"  # never re-encoded, so this never reaches the file
+        self.game.state.transition_to(GamePhase.VERDICT)
+        self.autosave.flush(5)
+        self.assertEqual(os.stat(path).st_mtime_ns, written_at)
+        self.assertEqual(sorted(os.listdir(self.slot_file("cases"))),
+                         sorted([f"{first.case_id}.json", f"{second.case_id}.json"]))
+        # Only the header changed (the phase); the active case was skipped.
+        self.assertGreater(self.autosave.stats()["sections_skipped"], 0)
+        self.assertEqual(os.listdir(self.slot_file()).count(f"active-{second.case_id}.json"), 1)
+        self.assertEqual(len([name for name in os.listdir(self.slot_file()) if name.startswith("active-")]), 1)
+
+    def test_manual_save_is_written_off_the_calling_thread(self):
+        self.play_case()
+        saved = []
+        self.game.save_game("manual", on_saved=lambda ok: saved.append((ok, threading.current_thread().name)))
+        self.assertTrue(self.autosave.flush(5))
+        self.assertEqual(saved, [(True, "autosave")])
+        self.assertIn("manual", self.autosave.slots())
+
+    def test_save_slots_round_trip(self):
+        case = self.play_case()
+        self.game.save_game("slot1")
+        self.play_case()
+        self.game.save_game("slot2")
+        self.assertEqual(self.autosave.slots(), ["autosave", "slot1", "slot2"])
+
+        loaded = offline_game(self.config)
+        loaded.load_game("slot1")
+        self.assertEqual([c.case_id for c in loaded.state.completed_cases], [case.case_id])
+        self.assertEqual(loaded.current_case.case_id, case.case_id)
+        self.assertEqual(loaded.current_case.witnesses[0].testimony["Where were you?"], "At the office.")
+        self.assertEqual(loaded.state.unlocked_cases, 2)
+        loaded.autosave.close()
+
+if __name__ == '__main__':
+    unittest.main()
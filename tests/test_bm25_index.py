@@ -0,0 +1,70 @@
+import unittest
+import json
+import time
+from bm25_index import BM25Index
+from witness_context import WitnessContextBudget
+
+EXCHANGES = [
+    ("Where were you on the night of the robbery?", "I was at home watching television with my sister."),
+    ("Did you see the defendant at the warehouse?", "No, I never went near the warehouse that week."),
+    ("Who handled the payroll accounts?", "Mr. Smith approved every payroll transfer himself."),
+    ("What time did you leave the office?", "Around six, the same as every evening."),
+    ("Did anyone else have the vault code?", "Only the manager and the night guard knew the code."),
+]
+
+class TestBM25Index(unittest.TestCase):
+    def build(self) -> BM25Index:
+        index = BM25Index()
+        index.extend(EXCHANGES)
+        return index
+
+    def test_most_relevant_exchange_ranks_first(self):
+        index = self.build()
+        self.assertEqual(index.search("Tell me about the warehouse and the defendant", k=1)[0][1], 1)
+        self.assertEqual(index.search("payroll transfers", k=1)[0][1], 2)
+        self.assertEqual(index.search("astronomy", k=3), [])
+
+    def test_serialization_round_trip_needs_no_reindexing(self):
+        index = self.build()
+        saved = json.loads(json.dumps(index.to_dict()))
+        self.assertNotIn("docs", saved)  # the exchanges are saved once, as the witness's testimony
+        restored = BM25Index.from_dict(saved, index.docs)
+        self.assertEqual(restored.docs, index.docs)
+        self.assertEqual(restored.postings, index.postings)
+        self.assertEqual(restored.search("vault code", k=2), index.search("vault code", k=2))
+        restored.add("Is the vault alarmed?", "Yes, the vault alarm rings at the guard post.")
+        self.assertEqual(restored.search("vault alarm", k=1)[0][1], 5)
+
+    def test_saved_index_does_not_change_with_later_exchanges(self):
+        index = self.build()
+        saved = index.to_dict()  # e.g. an autosave snapshot, encoded later on the writer thread
+        index.add("Is the vault alarmed?", "Yes, the vault alarm rings at the guard post.")
+        self.assertEqual(len(saved["lengths"]), len(EXCHANGES))
+        self.assertNotIn("alarm", saved["postings"])
+        BM25Index.from_dict(saved, EXCHANGES)
+
+    def test_restoring_with_other_exchanges_is_rejected(self):
+        saved = self.build().to_dict()
+        with self.assertRaises(ValueError):
+            BM25Index.from_dict(saved, EXCHANGES[:-1])
+
+    def test_lookup_is_fast(self):
+        index = BM25Index()
+        for i in range(200):
+            index.add(f"Question {i} about the ledger entry {i}?", f"Answer {i}: the ledger showed {i} transfers.")
+        start = time.perf_counter()
+        for _ in range(1000):
+            index.search("which ledger entry showed transfers", k=3)
+        self.assertLess((time.perf_counter() - start) / 1000, 0.005)
+
+    def test_context_quotes_relevant_older_exchanges(self):
+        context = WitnessContextBudget(recent_exchanges=2, index=BM25Index(), retrieve_k=1)
+        for question, answer in EXCHANGES:
+            context.add(question, answer)
+        rendered = context.render("Who else knew about the warehouse?")
+        self.assertIn("Earlier answers relevant to this question", rendered)
+        self.assertIn("never went near the warehouse", rendered)
+        self.assertEqual(context.relevant("vault code"), [])  # Already quoted verbatim as a recent answer.
+
+if __name__ == '__main__':
+    unittest.main()
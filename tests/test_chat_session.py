@@ -0,0 +1,64 @@
+import unittest
+import asyncio
+import json
+from unittest.mock import patch
+from ai_registry import registry
+from chat_session import ChatSession
+from tests import offline_config, offline_game
+
+class CapturingRecorder:
+    def __init__(self):
+        self.requests = {}
+
+    def record_response(self, messages, response):
+        self.requests[json.dumps(messages, sort_keys=True)] = messages
+
+class TestChatSession(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = offline_config(semantic_cache={"enabled": False},
+                                     witness_context={"recent_exchanges": 2, "summarize": False})
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_turns_are_bounded(self):
+        session = ChatSession("You are a witness.", max_turns=2)
+        for i in range(5):
+            session.add_exchange(f"q{i}", f"a{i}")
+        messages = session.messages("q5")
+        self.assertIs(messages[0], session.system)
+        self.assertEqual([m["parts"][0]["text"] for m in messages[1:]], ["q3", "a3", "q4", "a4", "q5"])
+        self.assertEqual([m["role"] for m in messages], ["system", "user", "model", "user", "model", "user"])
+
+    def test_witness_reuses_persona_prefix(self):
+        game = offline_game(self.config)
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+        witness = game.current_case.witnesses[0]
+        self.assertIsNotNone(witness.chat)
+        recorder = CapturingRecorder()
+        witness.ai_manager.ai_manager.recorder = recorder
+        questions = ["Where were you that night?", "Who did you see?", "Why did you leave early?",
+                     "Did you speak to the defendant?"]
+
+        async def run_test():
+            for question in questions:
+                await witness.respond(question, "Neutral", game)
+
+        with patch.object(witness.prompt_manager, "format_prompt", wraps=witness.prompt_manager.format_prompt) as fmt:
+            asyncio.run(run_test())
+        formatted = [call.args[0] for call in fmt.call_args_list]
+        self.assertNotIn("witness_persona", formatted)
+        self.assertEqual(formatted.count("witness_turn"), len(questions))
+
+        self.assertEqual(len(recorder.requests), len(questions))
+        requests = list(recorder.requests.values())
+        self.assertTrue(all(messages[0] is witness.chat.system for messages in requests))
+        last = requests[-1]
+        self.assertEqual(len(last), 1 + 2 * 2 + 1)  # persona, two recent exchanges, new turn
+        self.assertIn(questions[-1], last[-1]["parts"][0]["text"])
+        self.assertEqual(last[1]["parts"][0]["text"], questions[-3])
+        self.assertTrue(all("offline reply" not in answer for answer in witness.testimony.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import json
+import os
+import tempfile
+from data_management import EventLogWriter, JsonLinesLog, Logger, line_offsets, migrate_legacy_log
+
+def entry(i):
+    return {"type": "Witness Response", "details": f"Q: question {i} | A: answer {i}",
+            "timestamp": "2026-01-01 12:00:00", "case": "The Embezzlement Case"}
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "game_log.jsonl")
+        self.writer = EventLogWriter(flush_interval=0.05, fsync_interval=0.1)
+
+    def tearDown(self):
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def read_lines(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_appends_are_batched_in_the_background(self):
+        log = JsonLinesLog(self.path, self.writer)
+        for i in range(500):
+            log.append(entry(i))
+        self.assertEqual(len(log), 500)  # visible immediately, before the writer catches up
+        self.assertTrue(self.writer.flush(5))
+        self.assertEqual(self.read_lines(self.path), [entry(i) for i in range(500)])
+        self.assertEqual(self.writer.lines_written, 500)
+
+    def test_reopened_log_reads_entries_lazily(self):
+        log = JsonLinesLog(self.path, self.writer)
+        for i in range(100):
+            log.append(entry(i))
+        self.writer.flush(5)
+
+        reopened = JsonLinesLog(self.path, self.writer)
+        self.assertIsNone(reopened._offsets)  # opening only stats the files
+        self.assertEqual(len(reopened), 100)
+        self.assertEqual(reopened[42], entry(42))
+        self.assertEqual(reopened[-1], entry(99))
+        self.assertEqual(reopened[10:13], [entry(10), entry(11), entry(12)])
+        reopened.append(entry(100))
+        self.assertEqual(reopened[99:], [entry(99), entry(100)])
+        self.assertEqual(list(reopened), [entry(i) for i in range(101)])
+
+    def test_rotation_keeps_history_readable(self):
+        self.writer.max_bytes = 2000
+        self.writer.backups = 2
+        log = JsonLinesLog(self.path, self.writer)
+        for i in range(60):
+            log.append(entry(i))
+        self.writer.flush(5)
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertLessEqual(os.path.getsize(self.path), 2000)
+
+        reopened = JsonLinesLog(self.path, self.writer)
+        stored = reopened.stored
+        self.assertLess(stored, 60)  # the oldest segments were rotated out
+        self.assertEqual(reopened[stored - 1], entry(59))
+        self.assertEqual(list(reopened), [entry(i) for i in range(60 - stored, 60)])
+
+        # Rotating again while a reader is open: it follows its segments to the renamed files.
+        for i in range(60, 70):
+            log.append(entry(i))
+        self.writer.flush(5)
+        self.assertGreater(self.writer.rotations[self.path], 0)
+        self.assertEqual(reopened[stored - 1], entry(59))
+
+    def test_error_log_goes_through_the_writer(self):
+        config = {"event_log": {"path": self.path, "legacy_path": os.path.join(self.tmp.name, "none.json"),
+                                "error_log": os.path.join(self.tmp.name, "errors.txt")}}
+        logger = Logger(config)
+        logger.writer = self.writer
+        logger.log_error("Backend unavailable")
+        logger.log_error("Still unavailable")
+        self.writer.flush(5)
+        with open(os.path.join(self.tmp.name, "errors.txt")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith("ERROR: Still unavailable"))
+
+    def test_legacy_array_is_migrated_once(self):
+        legacy = os.path.join(self.tmp.name, "game_log.json")
+        with open(legacy, "w") as f:
+            json.dump([entry(0), {"type": "Witness Order", "details": ["Ann", "Bob"], "timestamp": "2024-01-01"}],
+                      f, indent=4)
+        self.assertEqual(migrate_legacy_log(legacy, self.path), 2)
+        self.assertEqual(migrate_legacy_log(legacy, self.path), 0)
+        log = JsonLinesLog(self.path, self.writer)
+        self.assertEqual(log[1]["details"], ["Ann", "Bob"])
+        self.assertTrue(os.path.exists(legacy))  # kept as a backup
+
+    def test_offsets_ignore_trailing_newline(self):
+        with open(self.path, "wb") as f:
+            f.write(b'{"a": 1}\n{"a": 2}\n')
+        self.assertEqual(list(line_offsets(self.path, os.path.getsize(self.path))), [0, 9])
+        self.assertEqual(list(line_offsets(self.path, 9)), [0])
+
+if __name__ == '__main__':
+    unittest.main()
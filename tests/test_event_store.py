@@ -0,0 +1,133 @@
+import unittest
+import gc
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+import event_store
+from event_store import EventStore, main, parse_time
+from game_objects import CaseType
+
+class FakeCase:
+    def __init__(self, case_id, title, case_type):
+        self.case_id = case_id
+        self.title = title
+        self.case_type = case_type
+
+EMBEZZLEMENT = FakeCase("c1", "The Embezzlement Case", CaseType.WHITE_COLLAR)
+MUSEUM = FakeCase("c2", "The Museum Theft", CaseType.THEFT)
+DAY = 86400
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "events.sqlite3")
+        self.store = EventStore(self.path, batch_size=8)
+        self.now = time.time()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def fill(self):
+        self.store.record("Objection Ruling", "Sustained", EMBEZZLEMENT, "Defense", ts=self.now - 3 * DAY)
+        self.store.record("Objection Ruling", "Overruled", EMBEZZLEMENT, "Defense", ts=self.now - 40 * DAY)
+        self.store.record("Objection Ruling", "Sustained", MUSEUM, "Prosecution", ts=self.now - 2 * DAY)
+        self.store.record("Witness Order Selection", [2, 1], EMBEZZLEMENT, "Defense", ts=self.now - DAY)
+        self.store.record("Verdict", "Guilty", MUSEUM, "Prosecution", ts=self.now)
+
+    def test_typed_filters_and_time_ranges(self):
+        self.fill()
+        rulings = self.store.query(event_type="Objection Ruling", case_type="white_collar", since="30d")
+        self.assertEqual([event["details"] for event in rulings], ["Sustained"])
+        self.assertEqual(rulings[0]["case_id"], "c1")
+        self.assertEqual(rulings[0]["role"], "Defense")
+        self.assertEqual(self.store.count(event_type="Objection Ruling"), 3)
+        self.assertEqual(self.store.count(role="Prosecution", until=self.now - DAY / 2), 1)
+        self.assertEqual(self.store.count(case_id="c1", text="Overruled"), 1)
+
+    def test_structured_details_round_trip(self):
+        self.fill()
+        order = self.store.query(event_type="Witness Order Selection")[0]
+        self.assertEqual(order["details"], [2, 1])
+
+    def test_counts_by_group(self):
+        self.fill()
+        self.assertEqual(self.store.count_by("case_type", event_type="Objection Ruling"),
+                         {"white_collar": 2, "theft": 1})
+        with self.assertRaises(ValueError):
+            self.store.count_by("details")
+        with self.assertRaises(ValueError):
+            self.store.query(witness="Ann")
+
+    def test_buffered_events_are_visible_to_queries(self):
+        self.store.record("Verdict", "Not Guilty", MUSEUM, "Defense")
+        self.assertEqual(self.store.recorded, 0)  # still buffered
+        self.assertEqual(self.store.count(), 1)
+        reopened = EventStore(self.path)
+        self.assertEqual(reopened.count(event_type="Verdict"), 1)
+        reopened.close()
+
+    def test_import_from_event_log(self):
+        entries = [{"type": "Verdict", "details": "Guilty", "timestamp": "2025-03-01 10:00:00",
+                    "case": "The Museum Theft"},
+                   {"type": "Witness Order Selection", "details": [1, 2], "timestamp": "2025-03-01 09:00:00"},
+                   {"type": "Broken", "details": "no timestamp"}]
+        self.assertEqual(self.store.import_log(entries), 2)
+        events = self.store.query(newest_first=False)
+        self.assertEqual([event["type"] for event in events], ["Witness Order Selection", "Verdict"])
+        self.assertEqual(events[1]["case"], "The Museum Theft")
+        self.assertEqual(events[1]["timestamp"], "2025-03-01 10:00:00")
+
+    def test_closed_and_dropped_stores_are_not_kept_for_exit(self):
+        extra = EventStore(os.path.join(self.tmp.name, "extra.sqlite3"))
+        self.assertIn(extra, event_store._open_stores)
+        extra.close()
+        self.assertNotIn(extra, event_store._open_stores)
+
+        dropped_path = os.path.join(self.tmp.name, "dropped.sqlite3")
+        dropped = EventStore(dropped_path)
+        dropped.record("Verdict", "Guilty", MUSEUM, "Prosecution")
+        del dropped
+        gc.collect()
+        self.assertEqual(len([store for store in event_store._open_stores if store.path == dropped_path]), 0)
+        reopened = EventStore(dropped_path)
+        self.assertEqual(reopened.count(event_type="Verdict"), 1)  # buffered event written when it was dropped
+        reopened.close()
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time("2d", now=1000000.0), 1000000.0 - 2 * DAY)
+        self.assertEqual(parse_time("2026-01-02"), datetime(2026, 1, 2).timestamp())
+        self.assertEqual(parse_time(123.0), 123.0)
+        self.assertIsNone(parse_time(None))
+
+    def test_cli(self):
+        self.fill()
+        self.store.close()
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["--db", self.path, "query", "--type", "Objection Ruling", "--case-type", "white_collar",
+                  "--since", "30d", "--count"])
+        self.assertEqual(out.getvalue().strip(), "1")
+
+    def test_indexed_queries_stay_fast(self):
+        store = EventStore(os.path.join(self.tmp.name, "big.sqlite3"), batch_size=50_000)
+        types = ["Witness Response", "Objection Ruling", "Evidence Presented", "Player Objection"]
+        cases = [FakeCase(f"c{i}", f"Case {i}", CaseType.WHITE_COLLAR if i % 2 else CaseType.THEFT)
+                 for i in range(200)]
+        for i in range(50_000):
+            store.record(types[i % 4], "Sustained", cases[i % 200], "Defense", ts=self.now - i * 60)
+        store.flush()
+        start = time.perf_counter()
+        recent = store.count(event_type="Objection Ruling", case_type="white_collar", since="30d")
+        page = store.query(case_id="c7", limit=20)
+        elapsed = time.perf_counter() - start
+        store.close()
+        self.assertEqual(len(page), 20)
+        self.assertGreater(recent, 0)
+        self.assertLess(elapsed, 0.25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,15 @@
 import unittest
-from state_management import GameState, GamePhase, EventManager
+import asyncio
+from ai_registry import registry
+from state_management import GameState, GamePhase, EventManager, GameStateObserver, ChangeSet
+from tests import offline_config, offline_game
+
+class RecordingObserver(GameStateObserver):
+    def __init__(self):
+        self.calls = []
+
+    def on_state_change(self, new_state, context, changes=None):
+        self.calls.append((new_state, changes))
 
 class TestGameState(unittest.TestCase):
     def setUp(self):
@@ -25,5 +35,61 @@ class TestGameState(unittest.TestCase):
         self.state.undo()
         self.assertEqual(self.state.current_phase, GamePhase.CASE_PREPARATION)
 
+    def test_observers_receive_change_sets(self):
+        observer = RecordingObserver()
+        self.state.add_observer(observer)
+        events = []
+        self.event_manager.subscribe("state_changed", events.append)
+        self.state.transition_to(GamePhase.CASE_PREPARATION, changes=ChangeSet(case_changed=True))
+        self.state.publish(ChangeSet(juror_sentiment={2: 1.5}))
+        self.state.publish(ChangeSet())  # nothing changed, nothing to announce
+        self.assertEqual([phase for phase, _ in observer.calls], [GamePhase.CASE_PREPARATION] * 2)
+        self.assertTrue(observer.calls[0][1].case_changed)
+        self.assertEqual(observer.calls[1][1].juror_sentiment, {2: 1.5})
+        self.assertIs(events[1].data["changes"], observer.calls[1][1])
+
+    def test_change_sets_merge(self):
+        changes = ChangeSet(evidence_updated={0}, juror_sentiment={1: 1, 2: -1}, witness_stress={"Ann": 4})
+        changes.merge(ChangeSet(evidence_added={3}, juror_sentiment={1: 0.5}, witness_stress={"Ann": 6}))
+        changes.merge(None)
+        self.assertFalse(changes.case_changed)
+        self.assertEqual(changes.evidence_added, {3})
+        self.assertEqual(changes.evidence_updated, {0})
+        self.assertEqual(changes.juror_sentiment, {1: 1.5, 2: -1})
+        self.assertEqual(changes.witness_stress, {"Ann": 6})
+        self.assertFalse(ChangeSet())
+
+class TestGameChangeSets(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.game = offline_game(offline_config(witness_context={"summarize": False}))
+        self.game.current_case = self.game.case_factory.generate_case(player_level=1, previous_cases=[])
+        self.observer = RecordingObserver()
+        self.game.state.add_observer(self.observer)
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_jury_adjustments_carry_sentiment_deltas(self):
+        self.game.adjust_jury(-1)
+        changes = self.observer.calls[-1][1]
+        self.assertEqual(changes.juror_sentiment, {juror.id: -1 for juror in self.game.jury.jurors})
+
+    def test_presented_evidence_is_marked_in_the_change_set(self):
+        evidence = self.game.current_case.evidence_list[-1]
+        self.game.present_evidence(evidence)
+        changes = self.observer.calls[-1][1]
+        self.assertEqual(changes.evidence_updated, {len(self.game.current_case.evidence_list) - 1})
+        self.assertEqual(changes.juror_sentiment, {
+            juror.id: juror.sentiment for juror in self.game.jury.jurors if juror.sentiment})
+
+    def test_questioning_publishes_witness_stress(self):
+        witness = self.game.current_case.witnesses[0]
+        witness.stress = 5
+        asyncio.run(self.game.question_witness(witness, "Where were you that night?", "Aggressive"))
+        changes = self.observer.calls[-1][1]
+        self.assertEqual(changes.witness_stress, {witness.name: witness.stress})
+        self.assertGreater(witness.stress, 5)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+from ai_backends import LLMBackend
+from ai_module import AIResponseManager, parse_json_reply
+from ai_registry import registry
+from tests import offline_config, offline_game
+
+class CapturingBackend(LLMBackend):
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.configs = []
+
+    async def generate(self, messages, generation_config):
+        self.configs.append(generation_config)
+        return self.reply
+
+class TestGenerationProfiles(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = offline_config()
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_profiles_map_to_generation_configs(self):
+        manager = AIResponseManager(self.config)
+        ruling = manager.generation_config_for("judge_ruling")
+        self.assertEqual(ruling["maxOutputTokens"], 64)
+        self.assertEqual(ruling["temperature"], 0.0)
+        self.assertEqual(ruling["responseMimeType"], "application/json")
+        self.assertIn("ruling", ruling["responseSchema"]["properties"])
+        self.assertIn("stopSequences", manager.generation_config_for("witness_testimony"))
+        self.assertEqual(manager.generation_config_for(None),
+                         {"maxOutputTokens": self.config["max_tokens"], "temperature": 0.7})
+
+    def test_parse_json_reply(self):
+        self.assertEqual(parse_json_reply('{"ruling": "Sustained"}'), {"ruling": "Sustained"})
+        self.assertEqual(parse_json_reply('```json\n{"ruling": "Overruled"}\n```'), {"ruling": "Overruled"})
+        self.assertIsNone(parse_json_reply("Overruled. The court will allow the question for now."))
+        self.assertIsNone(parse_json_reply('["Sustained"]'))
+
+    def test_judge_ruling_uses_structured_profile(self):
+        game = offline_game(self.config)
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+        backend = CapturingBackend('{"ruling": "Sustained", "reason": "Plainly hearsay."}')
+        game.ai_manager.ai_manager.backend = backend
+        self.assertEqual(asyncio.run(game.llm_ruling("Hearsay", "What did your neighbour say?")), "Sustained")
+        self.assertEqual(backend.configs[0]["responseMimeType"], "application/json")
+        self.assertEqual(backend.configs[0]["maxOutputTokens"], 64)
+
+        backend.reply = "I am inclined to say this objection is overruled."
+        self.assertEqual(asyncio.run(game.llm_ruling("Leading", "You were there, weren't you?")), "Overruled")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import logging
+import os
+import tempfile
+import time
+import log_pipeline
+from log_pipeline import PayloadSampler, configure_logging, log_payload, payload_sampler, stop_logging
+
+class TestPayloadSampler(unittest.TestCase):
+    def test_keeps_every_nth_payload_per_kind(self):
+        sampler = PayloadSampler(sample_every=3, per_minute=100)
+        kept = [sampler.allow("prompt") for _ in range(7)]
+        self.assertEqual(kept, [True, False, False, True, False, False, True])
+        self.assertTrue(sampler.allow("messages"))  # counted separately
+
+    def test_rate_limit_per_minute(self):
+        sampler = PayloadSampler(sample_every=1, per_minute=2)
+        self.assertEqual([sampler.allow("prompt") for _ in range(4)], [True, True, False, False])
+        self.assertEqual((sampler.logged, sampler.skipped), (2, 2))
+
+    def test_clip(self):
+        sampler = PayloadSampler(max_chars=5)
+        self.assertEqual(sampler.clip("short"), "short")
+        self.assertEqual(sampler.clip("much longer"), "much … [6 more chars]")
+
+class TestLogPipeline(unittest.TestCase):
+    def setUp(self):
+        stop_logging()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "courtroom.log")
+        self.config = {"log_level": "WARNING",
+                       "logging": {"file": self.path, "payloads": {"sample_every": 2, "per_minute": 100,
+                                                                     "max_chars": 20}}}
+
+    def tearDown(self):
+        stop_logging()
+        payload_sampler.configure({"sample_every": 10, "per_minute": 30, "max_chars": 2000})
+        self.tmp.cleanup()
+
+    def read_log(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_records_reach_the_file_through_the_queue(self):
+        handler = configure_logging(self.config)
+        self.assertIs(configure_logging(self.config), handler)  # idempotent
+        logging.getLogger("courtroom").debug("debug goes to the file only")
+        for i in range(4):
+            log_payload("response", "Ann", f"answer {i} " + "x" * 50)
+        stop_logging()
+        text = self.read_log()
+        self.assertIn("debug goes to the file only", text)
+        self.assertIn("response Ann: answer 0", text)
+        self.assertIn("response Ann: answer 2", text)
+        self.assertNotIn("answer 1", text)
+        self.assertIn("more chars]", text)
+
+    def test_library_debug_records_are_not_queued(self):
+        configure_logging(self.config)  # console WARNING, file DEBUG
+        self.assertFalse(logging.getLogger("aiohttp.client").isEnabledFor(logging.DEBUG))
+        self.assertTrue(logging.getLogger("aiohttp.client").isEnabledFor(logging.INFO))
+        self.assertTrue(logging.getLogger(log_pipeline.PAYLOAD_LOGGER).isEnabledFor(logging.DEBUG))
+        logging.getLogger("asyncio").debug("library chatter")
+        logging.getLogger("asyncio").info("library news")
+        stop_logging()
+        text = self.read_log()
+        self.assertNotIn("library chatter", text)
+        self.assertIn("library news", text)
+        configure_logging(dict(self.config, log_level="DEBUG"))
+        self.assertTrue(logging.getLogger("aiohttp.client").isEnabledFor(logging.DEBUG))
+
+    def test_payloads_are_built_only_when_kept(self):
+        configure_logging(self.config)
+        built = []
+        for i in range(6):
+            log_payload("context", "opening", lambda i=i: built.append(i) or {"turn": i})
+        self.assertEqual(built, [0, 2, 4])
+
+    def test_skipped_payloads_are_cheap(self):
+        configure_logging(dict(self.config, logging=dict(self.config["logging"],
+                                                         payloads={"sample_every": 1000, "per_minute": 1})))
+        messages = [{"role": "user", "content": "x" * 10000}] * 10
+        start = time.perf_counter()
+        for _ in range(10000):
+            log_payload("messages", "Ann", messages)
+        self.assertLess((time.perf_counter() - start) / 10000, 50e-6)
+        self.assertIsNotNone(log_pipeline._listener)
+
+if __name__ == '__main__':
+    unittest.main()
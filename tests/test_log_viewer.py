@@ -0,0 +1,87 @@
+import unittest
+import time
+from log_viewer import LogView, format_entry
+
+TYPES = ["Witness Response", "Player Objection", "Objection Ruling", "Evidence Presented"]
+CASES = ["The Embezzlement Case", "The Museum Theft"]
+
+def make_logs(count):
+    return [{"type": TYPES[i % len(TYPES)], "details": f"entry {i} about the {'ledger' if i % 10 == 0 else 'alibi'}",
+             "timestamp": "2026-01-01 12:00:00", "case": CASES[i % len(CASES)]} for i in range(count)]
+
+class TestLogView(unittest.TestCase):
+    def test_unfiltered_window_slices_the_store(self):
+        view = LogView(make_logs(50))
+        self.assertEqual(len(view), 50)
+        self.assertEqual([entry["details"] for entry in view.window(48, 10)],
+                         ["entry 48 about the alibi", "entry 49 about the alibi"])
+
+    def test_filters_combine(self):
+        logs = make_logs(200)
+        view = LogView(logs)
+        view.set_filter(event_type="Witness Response", case="The Embezzlement Case", text="LEDGER")
+        expected = [entry for entry in logs if entry["type"] == "Witness Response"
+                    and entry["case"] == "The Embezzlement Case" and "ledger" in entry["details"]]
+        self.assertEqual(len(view), len(expected))
+        self.assertEqual(view.window(0, 100), expected)
+        view.set_filter()
+        self.assertEqual(len(view), 200)
+        self.assertFalse(view.filtered)
+
+    def test_text_filter_matches_structured_details(self):
+        logs = make_logs(10) + [{"type": "Witness Order Selection", "details": [2, 1], "case": CASES[0]},
+                                {"type": "Verdict", "details": None, "case": CASES[0]}]
+        view = LogView(logs)
+        self.assertEqual(view.set_filter(text="[2, 1]"), 1)
+        self.assertEqual(view.set_filter(text="entry"), 10)
+        self.assertEqual(view.set_filter(text="verdict"), 1)
+
+    def test_typing_narrows_previous_matches(self):
+        logs = make_logs(1000)
+        view = LogView(logs)
+        view.set_filter(text="entry 1")
+        broad = len(view)
+        view.set_filter(text="entry 12")
+        self.assertLess(len(view), broad)
+        self.assertEqual(len(view), sum(1 for entry in logs if "entry 12" in entry["details"]))
+        view.set_filter(text="entry 1")  # deleting characters rescans
+        self.assertEqual(len(view), broad)
+
+    def test_refresh_picks_up_appended_entries(self):
+        logs = make_logs(10)
+        view = LogView(logs)
+        view.set_filter(event_type="Player Objection")
+        before = len(view)
+        logs.extend(make_logs(8))
+        self.assertEqual(view.refresh(), 8)
+        self.assertEqual(len(view), before + 2)
+        self.assertEqual(view.total, 18)
+        self.assertEqual(view.refresh(), 0)
+
+    def test_facets_and_legacy_entries(self):
+        logs = make_logs(8) + [{"type": "Verdict", "details": "Guilty", "timestamp": "2024-01-01 00:00:00"}]
+        view = LogView(logs)
+        self.assertEqual(view.event_types(), sorted(TYPES + ["Verdict"]))
+        self.assertEqual(view.cases(), sorted(CASES))
+        view.set_filter(case="The Museum Theft")
+        self.assertEqual(len(view), 4)
+
+    def test_rows_are_single_line_and_bounded(self):
+        row = format_entry({"type": "Opening Statement", "details": "Ladies and gentlemen\n" * 100,
+                            "timestamp": "2026-01-01 12:00:00"})
+        self.assertNotIn("\n", row)
+        self.assertLessEqual(len(row), 240)
+
+    def test_large_log_stays_interactive(self):
+        view = LogView(make_logs(300_000))
+        start = time.perf_counter()
+        page = view.window(150_000, 40)
+        view.set_filter(text="ledger")
+        view.set_filter(text="ledger", event_type="Witness Response")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(page), 40)
+        self.assertEqual(len(view), 15_000)
+        self.assertLess(elapsed, 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
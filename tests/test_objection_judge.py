@@ -0,0 +1,68 @@
+import unittest
+import asyncio
+from ai_registry import registry
+from objection_judge import LocalObjectionJudge, ObjectionJudge
+from tests import offline_config, offline_game
+
+class TestObjectionJudge(unittest.TestCase):
+    def setUp(self):
+        self.local = LocalObjectionJudge()
+        self.keywords = {"techcorp", "embezzling", "funds", "ledger", "executive"}
+
+    def test_clear_cases_are_decided_locally(self):
+        cases = [
+            ("Leading", "Isn't it true you were at the warehouse?", "Sustained"),
+            ("Leading", "You saw the defendant leave, didn't you?", "Sustained"),
+            ("Leading", "Where were you that night?", "Overruled"),
+            ("Hearsay", "What did your neighbour tell you about the money?", "Sustained"),
+            ("Hearsay", "Did you see the transfer yourself?", "Overruled"),
+            ("Speculation", "Why do you think he moved the funds?", "Sustained"),
+            ("Relevance", "Who approved the TechCorp ledger entries for those funds?", "Overruled"),
+        ]
+        for objection_type, question, expected in cases:
+            with self.subTest(objection_type=objection_type, question=question):
+                ruling, confidence = self.local.assess(objection_type, question, self.keywords)
+                self.assertEqual(ruling, expected)
+                self.assertGreaterEqual(confidence, 0.8)
+
+    def test_ambiguous_cases_escalate_and_are_counted(self):
+        escalated = []
+
+        async def escalate(objection_type, question):
+            escalated.append((objection_type, question))
+            return "Sustained"
+
+        judge = ObjectionJudge(escalate, confidence_threshold=0.8)
+
+        async def run_test():
+            return [
+                await judge.rule("Leading", "Where were you that night?"),
+                await judge.rule("Relevance", "Do you like football?"),
+            ]
+
+        self.assertEqual(asyncio.run(run_test()), ["Overruled", "Sustained"])
+        self.assertEqual(escalated, [("Relevance", "Do you like football?")])
+        stats = judge.stats()
+        self.assertEqual((stats["local"], stats["llm"]), (1, 1))
+        self.assertEqual(stats["local_share"], 0.5)
+        self.assertTrue(judge.needs_escalation("Relevance", "Do you like football?"))
+        self.assertFalse(ObjectionJudge(None).needs_escalation("Relevance", "Do you like football?"))
+
+    def test_game_prefetches_only_ambiguous_rulings(self):
+        registry.clear()
+        game = offline_game(offline_config())
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+
+        async def run_test():
+            game.prefetch_rulings("q1", "Isn't it true you heard from someone that the ledger was altered?")
+            scheduled = game.prefetcher.scheduled
+            game.prefetcher.discard()
+            return scheduled
+
+        try:
+            self.assertLess(asyncio.run(run_test()), 4)
+        finally:
+            registry.clear()
+
+if __name__ == '__main__':
+    unittest.main()
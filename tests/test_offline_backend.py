@@ -0,0 +1,102 @@
+import unittest
+import asyncio
+import json
+import time
+from unittest.mock import patch
+from ai_backends import OfflineBackend, create_backend, register_backend, LLMBackend
+from ai_registry import registry
+from prompt_manager import GamePromptManager
+from tests import offline_config, offline_game
+
+class TestOfflineBackend(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = offline_config()
+        self.prompts = GamePromptManager(self.config)
+
+    def tearDown(self):
+        registry.clear()
+
+    def judge_messages(self, question: str):
+        return self.prompts.generate_prompt("judge_ruling", {
+            "case_type": "theft", "objection_type": "Hearsay", "question": question
+        })
+
+    def test_selected_from_config_without_api_key(self):
+        backend = create_backend(self.config)
+        self.assertIsInstance(backend, OfflineBackend)
+        with self.assertRaises(ValueError):
+            create_backend(dict(self.config, ai_backend="gemini"))
+
+    def test_classifies_prompt_and_fills_template(self):
+        backend = create_backend(self.config)
+        messages = self.judge_messages("Did your neighbour tell you he saw it?")
+        prompt_type, fields = backend.classify(OfflineBackend.prompt_text(messages))
+        self.assertEqual(prompt_type, "judge_ruling")
+        self.assertEqual(fields["objection_type"], "Hearsay")
+        reply = json.loads(asyncio.run(backend.generate(messages, {})))
+        self.assertIn("Hearsay", reply["reason"])
+        self.assertIn(reply["ruling"], ("Sustained", "Overruled"))
+
+    def test_replies_are_deterministic(self):
+        first = create_backend(self.config)
+        second = create_backend(self.config)
+        messages = self.judge_messages("Where were you?")
+        self.assertEqual(asyncio.run(first.generate(messages, {})), asyncio.run(second.generate(messages, {})))
+
+    def test_stream_matches_generate_and_respects_latency(self):
+        backend = OfflineBackend(latency_ms=50, chunk_words=2)
+        messages = [{"role": "user", "parts": [{"text": "unknown prompt"}]}]
+
+        async def run_test():
+            start = time.perf_counter()
+            chunks = [chunk async for chunk in backend.stream(messages, {})]
+            return chunks, time.perf_counter() - start
+
+        chunks, elapsed = asyncio.run(run_test())
+        self.assertEqual("".join(chunks), asyncio.run(backend.generate(messages, {})))
+        self.assertGreaterEqual(elapsed, 0.045)
+
+    def test_register_custom_backend(self):
+        class EchoBackend(LLMBackend):
+            async def generate(self, messages, generation_config):
+                return "echo"
+
+        register_backend("echo", lambda config: EchoBackend())
+        self.assertEqual(asyncio.run(create_backend({"ai_backend": "echo"}).generate([], {})), "echo")
+
+    def test_examination_runs_offline(self):
+        game = offline_game(self.config)
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+        game.role = "Prosecution"
+        game.selected_witness_order = [0]
+        inputs = iter(["2", "Where were you that night?", "no", "Who did you see?", "no", "Why?", "no"])
+
+        async def run_test():
+            with patch("builtins.input", side_effect=lambda prompt="": next(inputs)):
+                await game.opening_statements()
+                await game.examine_witnesses()
+
+        asyncio.run(run_test())
+        witness = game.current_case.witnesses[0]
+        self.assertEqual(len(witness.testimony), 3)
+        self.assertTrue(all("offline reply" not in answer for answer in witness.testimony.values()))
+
+    def test_continued_case_prefetches_opening_statement(self):
+        game = offline_game(self.config)
+        game.current_case = game.case_factory.generate_case(player_level=1, previous_cases=[])
+
+        async def run_test():
+            with patch("builtins.input", side_effect=lambda prompt="": "1"), \
+                    patch.object(game, "case_preparation"), \
+                    patch.object(game, "courtroom_proceedings", side_effect=game.opening_statements), \
+                    patch.object(game, "deliberation_and_verdict"):
+                await game.continue_case()
+
+        asyncio.run(run_test())
+        self.assertEqual(game.role, "Prosecution")
+        stats = game.prefetcher.stats()
+        self.assertEqual((stats["scheduled"], stats["claimed"]), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+from ai_module import AIResponseManager
+from prefetch import PrefetchScheduler
+
+class SlowBackend:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, messages, generation_config):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "Sustained. The question is leading."
+
+def ruling_messages(objection_type):
+    return [{"role": "user", "parts": [{"text": f"Rule on {objection_type}"}]}]
+
+class TestPrefetchScheduler(unittest.TestCase):
+    def setUp(self):
+        self.manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        self.manager.backend = SlowBackend()
+
+    def test_claimed_prefetch_is_reused(self):
+        scheduler = PrefetchScheduler(self.manager)
+
+        async def run_test():
+            self.assertTrue(scheduler.prefetch("q1", ruling_messages("Leading")))
+            await asyncio.sleep(0.08)  # the player is thinking
+            scheduler.claim(ruling_messages("Leading"))
+            return await self.manager.generate_response(ruling_messages("Leading"))
+
+        self.assertTrue(asyncio.run(run_test()).startswith("Sustained"))
+        self.assertEqual(self.manager.backend.calls, 1)
+        stats = scheduler.stats()
+        self.assertEqual(stats["claimed"], 1)
+        self.assertGreater(stats["saved_seconds"], 0.03)
+
+    def test_unclaimed_prefetches_are_cancelled_and_counted(self):
+        scheduler = PrefetchScheduler(self.manager)
+
+        async def run_test():
+            for objection_type in ["Relevance", "Hearsay"]:
+                scheduler.prefetch("q1", ruling_messages(objection_type))
+            await asyncio.sleep(0.01)
+            scheduler.discard("q1")
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run_test())
+        stats = scheduler.stats()
+        self.assertEqual(stats["cancelled"], 2)
+        self.assertGreater(stats["wasted_tokens"], 0)
+        self.assertEqual(self.manager.backend.cancelled, 2)
+
+    def test_budget_limits_prefetching(self):
+        scheduler = PrefetchScheduler(self.manager, max_in_flight=1)
+
+        async def run_test():
+            first = scheduler.prefetch("q1", ruling_messages("Relevance"))
+            second = scheduler.prefetch("q1", ruling_messages("Hearsay"))
+            scheduler.discard()
+            return first, second
+
+        self.assertEqual(asyncio.run(run_test()), (True, False))
+        self.assertEqual(scheduler.stats()["skipped"], 1)
+
+        exhausted = PrefetchScheduler(self.manager, max_wasted_tokens=0)
+
+        async def run_exhausted():
+            return exhausted.prefetch("q1", ruling_messages("Speculation"))
+
+        self.assertFalse(asyncio.run(run_exhausted()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import tempfile
+import time
+from response_cache import AIResponseCache, template_version
+
+class TestAIResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_survives_restart(self):
+        cache = AIResponseCache(path=self.path, namespace="v1")
+        key = cache.make_key("prompt")
+        cache.set(key, "answer")
+        cache.close()
+
+        reopened = AIResponseCache(path=self.path, namespace="v1")
+        self.assertEqual(reopened.get(key), "answer")
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+        reopened.close()
+
+    def test_namespace_changes_key(self):
+        old = AIResponseCache(namespace="v1")
+        new = AIResponseCache(namespace="v2")
+        self.assertNotEqual(old.make_key("prompt"), new.make_key("prompt"))
+
+    def test_lru_eviction_in_memory(self):
+        cache = AIResponseCache(max_entries=2, memory_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_lru_eviction_on_disk(self):
+        cache = AIResponseCache(path=self.path, max_entries=3, memory_entries=1)
+        for i in range(5):
+            cache.set(f"k{i}", str(i))
+            time.sleep(0.001)
+        cache.trim()
+        self.assertEqual(len(cache), 3)
+        self.assertNotIn("k0", cache)
+        self.assertIn("k4", cache)
+        self.assertEqual(cache.stats()["evictions"], 2)
+        cache.close()
+
+    def test_ttl_expiry(self):
+        cache = AIResponseCache(path=self.path, ttl_seconds=0.01)
+        cache.set("k", "v")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+        stats = cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertGreaterEqual(stats["expirations"], 1)
+        cache.close()
+
+    def test_expired_entries_are_not_contained(self):
+        cache = AIResponseCache(path=self.path, ttl_seconds=0.01)
+        cache.set("k", "v")
+        self.assertIn("k", cache)
+        time.sleep(0.02)
+        self.assertNotIn("k", cache)  # so prefetch asks again
+        cache.close()
+
+    def test_contains_survives_a_broken_database(self):
+        cache = AIResponseCache(path=self.path)
+        cache.set("k", "v")
+        cache._memory.clear()
+        cache._conn.close()  # any query now raises sqlite3.ProgrammingError
+        self.assertNotIn("k", cache)
+
+    def test_template_version_tracks_content(self):
+        template = os.path.join(self.tmpdir.name, "prompts.json")
+        with open(template, "w") as f:
+            f.write('{"prompts": {}}')
+        first = template_version(template)
+        with open(template, "w") as f:
+            f.write('{"prompts": {"judge_ruling": "x"}}')
+        self.assertNotEqual(first, template_version(template))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import json
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from save_codec import SaveFormatError, _synthetic_career, benchmark, convert, decode, encode, load
+
+SAMPLE = {
+    "phase": "COURTROOM_PROCEEDINGS",
+    "reputation": -5,
+    "unlocked_cases": 3,
+    "big": 2 ** 70,
+    "ratio": 0.85,
+    "flags": [True, False, None],
+    "empty": {"list": [], "dict": {}, "text": ""},
+    "unicode": "Témoin — “I never saw it” 🕵",
+    "testimony": [["Where were you?", "At home."], ["Alone?", "Yes."]],
+    "postings": {"home": [[0, 1], [3, 2]], "alone": [[1, 1]]},
+    "mixed": [1, "two", [3], {"four": 4.0}],
+}
+
+class TestSaveCodec(unittest.TestCase):
+    def test_round_trip_matches_json(self):
+        for compression in (None, "zlib", "lzma"):
+            with self.subTest(compression=compression):
+                self.assertEqual(decode(encode(SAMPLE, compression)), json.loads(json.dumps(SAMPLE)))
+
+    def test_containers_are_written_like_json(self):
+        data = {"pair": ("q", "a"), "ordered": OrderedDict([("b", 1), ("a", 2)]), 1: "int key"}
+        self.assertEqual(decode(encode(data)), json.loads(json.dumps(data)))
+        with self.assertRaises(TypeError):
+            encode({"witness": object()})
+
+    def test_repeated_strings_are_stored_once(self):
+        backstory = "Worked at the museum for twenty years and knows every guard by name. " * 20
+        cases = [{"summary": backstory, "memory": [backstory] * 5} for _ in range(50)]
+        data = encode(cases)
+        self.assertLess(len(data), len(backstory.encode()) + 3000)  # one copy, plus 4-byte tokens
+        self.assertLess(len(data) * 20, len(json.dumps(cases)))
+
+    def test_rejects_newer_versions_and_corrupt_files(self):
+        data = encode(SAMPLE)
+        newer = data[:4] + struct.pack("<H", 99) + data[6:]
+        with self.assertRaises(SaveFormatError):
+            decode(newer)
+        with self.assertRaises(SaveFormatError):
+            decode(data[:-4])
+        with self.assertRaises(SaveFormatError):
+            decode(b'{"phase": "MAIN_MENU"}')
+
+    def test_converter_and_loader_handle_both_formats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "save_game.json")
+            with open(source, "w") as f:
+                json.dump(SAMPLE, f)
+            binary = os.path.join(tmp, "save_game.sav")
+            convert(source, binary, "zlib")
+            back = os.path.join(tmp, "back.json")
+            convert(binary, back)
+            self.assertEqual(load(binary), load(source))
+            with open(back) as f:
+                self.assertEqual(json.load(f), load(source))
+
+    def test_synthetic_career_is_shaped_like_game_saves(self):
+        state = _synthetic_career(1)
+        witness = state["completed_cases"][0]["witnesses"][0]
+        self.assertEqual(len(witness["memory"]), len(witness["testimony"]))
+        self.assertTrue(all(set(entry) == {"question", "response"} for entry in witness["memory"]))
+        self.assertEqual(decode(encode(state, "zlib")), json.loads(json.dumps(state)))
+
+    def test_benchmark_reports_every_format(self):
+        results = benchmark({"completed_cases": [SAMPLE] * 20}, repeat=1)
+        self.assertEqual(set(results), {"json", "json/zlib", "binary/none", "binary/zlib", "binary/lzma"})
+        self.assertLess(results["binary/zlib"]["bytes"], results["json"]["bytes"])
+
+if __name__ == '__main__':
+    unittest.main()
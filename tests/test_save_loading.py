@@ -0,0 +1,90 @@
+import unittest
+import os
+import random
+import tempfile
+import time
+from unittest import mock
+from ai_registry import registry
+from game_objects import Case, CaseType
+from state_management import LazyCase
+from tests import offline_config, offline_game
+
+class TestSaveLoading(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = offline_config(
+            witness_context={"summarize": False}, autosave={"enabled": False, "directory": self.tmp.name},
+            save_file={"path": os.path.join(self.tmp.name, "save_game.sav"), "compression": "zlib"})
+        self.game = self.new_game()
+
+    def tearDown(self):
+        registry.clear()
+        self.tmp.cleanup()
+
+    def new_game(self):
+        return offline_game(self.config)
+
+    def play_career(self, cases):
+        for number in range(cases):
+            case = self.game.case_factory.generate_case(player_level=1, previous_cases=[])
+            case.witnesses[0].testimony[f"Question {number}?"] = f"Answer {number}."
+            self.game.state.completed_cases.append(case)
+        self.game.current_case = self.game.case_factory.generate_case(player_level=1, previous_cases=[])
+        return self.game.state.completed_cases
+
+    def test_loading_restores_without_generating(self):
+        played = self.play_career(3)
+        self.game.save_game()
+        loaded = self.new_game()
+        with mock.patch.object(Case, "generate_case", side_effect=AssertionError("case regenerated")):
+            state_before = random.getstate()
+            loaded.load_game()
+            self.assertEqual(random.getstate(), state_before)  # no dice rolled for the saved cases
+            completed = loaded.state.completed_cases
+            self.assertTrue(all(isinstance(case, LazyCase) and not case.materialized for case in completed))
+            self.assertEqual([case.case_id for case in completed], [case.case_id for case in played])
+            self.assertEqual(completed[1].title, played[1].title)
+            self.assertIsInstance(completed[1].case_type, CaseType)
+            self.assertFalse(completed[1].materialized)
+
+            witness = completed[2].witnesses[0]  # first real use restores the case
+            self.assertTrue(completed[2].materialized)
+            self.assertEqual(witness.testimony["Question 2?"], "Answer 2.")
+            self.assertIsNone(witness.chat)  # persona is prepared when the witness is next questioned
+            self.assertEqual(loaded.current_case.case_id, self.game.current_case.case_id)
+            self.assertEqual(len(loaded.current_case.witnesses), len(self.game.current_case.witnesses))
+
+    def test_saving_a_loaded_career_keeps_unmaterialized_cases_as_they_were(self):
+        self.play_career(2)
+        self.game.save_game()
+        loaded = self.new_game()
+        loaded.load_game()
+        snapshot = loaded.serializer._serialize_case(loaded.state.completed_cases[0])
+        self.assertIs(snapshot, loaded.state.completed_cases[0].snapshot)
+        loaded.save_game()
+        again = self.new_game()
+        again.load_game()
+        self.assertEqual(again.state.completed_cases[1].witnesses[0].testimony["Question 1?"], "Answer 1.")
+
+    def test_slots_read_completed_cases_on_first_use(self):
+        self.play_career(2)
+        self.game.save_game("career")
+        loaded = self.new_game()
+        loaded.load_game("career")
+        first = loaded.state.completed_cases[0]
+        self.assertTrue(callable(first._source))  # only the slot header has been read
+        self.assertEqual(first.witnesses[0].testimony["Question 0?"], "Answer 0.")
+
+    def test_load_time_does_not_scale_with_completed_cases(self):
+        self.play_career(40)
+        self.game.save_game("career")
+        loaded = self.new_game()
+        start = time.perf_counter()
+        loaded.load_game("career")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(loaded.state.completed_cases), 40)
+        self.assertLess(elapsed, 0.25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import asyncio
+from semantic_cache import SemanticResponseCache, normalize_question, stress_band
+from ai_module import AIResponseManager
+
+class CountingBackend:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, messages, generation_config):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+class TestSemanticCache(unittest.TestCase):
+    def test_normalize_question(self):
+        self.assertEqual(normalize_question("Where were you on the night?"), ["where", "were", "you", "night"])
+
+    def test_near_duplicate_hits(self):
+        cache = SemanticResponseCache(threshold=0.85)
+        cache.store("alex|low", "Where were you on the night of the robbery?", "At home.")
+        self.assertEqual(cache.lookup("alex|low", "where were you that night?"), "At home.")
+        self.assertIsNone(cache.lookup("alex|low", "Did you take the money?"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["lookups"], 2)
+
+    def test_scopes_are_isolated(self):
+        cache = SemanticResponseCache()
+        cache.store("alex|low", "Where were you that night?", "At home.")
+        self.assertIsNone(cache.lookup("alex|high", "Where were you that night?"))
+        self.assertIsNone(cache.lookup("sam|low", "Where were you that night?"))
+
+    def test_threshold_is_configurable(self):
+        strict = SemanticResponseCache(threshold=0.99)
+        strict.store("s", "Where were you on the night of the robbery?", "At home.")
+        self.assertIsNone(strict.lookup("s", "where were you that night?"))
+
+    def test_stress_band(self):
+        self.assertEqual([stress_band(s) for s in (2, 5, 8)], ["low", "medium", "high"])
+
+    def test_manager_skips_backend_for_near_duplicate(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = CountingBackend()
+
+        async def run_test():
+            first = await manager.generate_response([{"role": "user", "parts": [{"text": "prompt one"}]}],
+                                                    semantic_scope="alex|low", semantic_query="Where were you that night?")
+            second = await manager.generate_response([{"role": "user", "parts": [{"text": "prompt two"}]}],
+                                                     semantic_scope="alex|low", semantic_query="where were you on the night")
+            return first, second
+
+        first, second = asyncio.run(run_test())
+        self.assertEqual(first, second)
+        self.assertEqual(manager.backend.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import asyncio
+import os
+import random
+import tempfile
+from unittest.mock import patch
+from ai_registry import registry
+from session_recording import SessionRecorder, SessionReplayer, ReplayBackend, ReplayMissError, play_career
+from tests import offline_config, offline_game
+
+class TestSessionRecording(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = offline_config(offline_backend={"latency_ms": 0, "jitter_ms": 0, "chunk_delay_ms": 0})
+        self.path = os.path.join(tempfile.mkdtemp(), "session.rec.gz")
+
+    def tearDown(self):
+        registry.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def new_game(self, seed: int):
+        random.seed(seed)
+        return offline_game(self.config)
+
+    def player(self, game):
+        questions = iter(["Where were you that night?", "Who did you see?", "Why did you leave?"] * 10)
+
+        def answer(prompt=""):
+            if prompt.startswith("Choose the order"):
+                return ",".join(str(i + 1) for i in range(len(game.current_case.witnesses)))
+            if prompt.startswith("Select up to two"):
+                return "none"
+            if prompt.startswith("Enter your question"):
+                return next(questions)
+            if prompt.startswith("Do you want to raise"):
+                return "no"
+            return "1"
+        return answer
+
+    def collect_testimony(self, game):
+        return [dict(witness.testimony) for witness in game.current_case.witnesses]
+
+    def test_replay_reproduces_recorded_session(self):
+        game = self.new_game(seed=7)
+        recorder = SessionRecorder(seed=7)
+        game.session = recorder
+        game.ai_manager.ai_manager.recorder = recorder
+        with patch("builtins.input", side_effect=self.player(game)):
+            asyncio.run(play_career(game))
+        recorder.save(self.path)
+        recorded_testimony = self.collect_testimony(game)
+        self.assertTrue(recorder.responses)
+        registry.clear()
+
+        replayer = SessionReplayer.load(self.path)
+        replay = self.new_game(seed=replayer.seed)
+        replayer.install(replay)
+        with patch("builtins.input", side_effect=AssertionError("replay must not read stdin")):
+            timings = asyncio.run(play_career(replay))
+
+        backend = replay.ai_manager.ai_manager.backend
+        self.assertEqual(self.collect_testimony(replay), recorded_testimony)
+        self.assertEqual(replayer.position, len(replayer.inputs))
+        self.assertGreater(backend.hits, 0)
+        self.assertEqual(backend.misses, 0)
+        self.assertIn("examine_witnesses", timings)
+
+    def test_replay_backend_rejects_unknown_prompt(self):
+        backend = ReplayBackend({})
+        with self.assertRaises(ReplayMissError):
+            asyncio.run(backend.generate([{"role": "user", "parts": ["hi"]}], {}))
+        self.assertEqual(backend.misses, 1)
+
+    def test_replayer_raises_eof_when_inputs_run_out(self):
+        replayer = SessionReplayer({"version": 1, "seed": 0, "inputs": [["Enter your choice: ", "1"]],
+                                    "responses": {}})
+        self.assertEqual(replayer.read_input("Enter your choice: "), "1")
+        with self.assertRaises(EOFError):
+            replayer.read_input("Enter your choice: ")
+
+if __name__ == '__main__':
+    unittest.main()
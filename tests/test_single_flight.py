@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+from single_flight import SingleFlight
+from ai_module import AIResponseManager
+
+class SlowBackend:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, messages, generation_config):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "shared answer"
+
+class SlowStreamBackend(SlowBackend):
+    def __init__(self, delay: float = 0.02):
+        super().__init__(delay)
+        self.streams = 0
+
+    async def stream(self, messages, generation_config):
+        self.streams += 1
+        for chunk in ["shared", " streamed", " answer"]:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+class TestSingleFlight(unittest.TestCase):
+    def test_identical_requests_share_one_call(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = SlowBackend()
+        messages = [{"role": "user", "parts": [{"text": "same prompt"}]}]
+
+        async def run_test():
+            return await asyncio.gather(*[manager.generate_response(messages) for _ in range(5)])
+
+        results = asyncio.run(run_test())
+        self.assertEqual(results, ["shared answer"] * 5)
+        self.assertEqual(manager.backend.calls, 1)
+        self.assertEqual(manager.inflight.stats()["coalesced"], 4)
+
+    def test_streams_share_one_upstream_call(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = SlowStreamBackend()
+        messages = [{"role": "user", "parts": [{"text": "witness question"}]}]
+
+        async def collect():
+            return [chunk async for chunk in manager.stream_response(messages)]
+
+        async def run_test():
+            first = asyncio.ensure_future(collect())
+            await asyncio.sleep(0.03)  # the stream is under way
+            prefetched = manager.prefetch(messages)
+            return await asyncio.gather(first, collect(), manager.generate_response(messages)), prefetched
+
+        (first, second, full), prefetched = asyncio.run(run_test())
+        self.assertEqual(first, ["shared", " streamed", " answer"])
+        self.assertEqual(second, first)  # the late joiner replays the chunks it missed
+        self.assertEqual(full, "shared streamed answer")
+        self.assertEqual(prefetched.result(), full)  # the prefetch joined instead of asking again
+        self.assertEqual((manager.backend.streams, manager.backend.calls), (1, 0))
+        self.assertEqual(manager.streams, {})
+
+    def test_abandoned_stream_stops_unless_followed(self):
+        manager = AIResponseManager({"gemini_api_key": "dummy_key"})
+        manager.backend = SlowStreamBackend()
+        messages = [{"role": "user", "parts": [{"text": "closed window"}]}]
+
+        async def run_test():
+            stream = manager.stream_response(messages)
+            await stream.__anext__()
+            await stream.aclose()
+            await asyncio.sleep(0.01)
+            self.assertEqual(manager.inflight.in_flight(), 0)  # nobody followed it: cancelled
+
+            stream = manager.stream_response(messages)
+            await stream.__anext__()
+            follower = asyncio.ensure_future(manager.generate_response(messages))
+            await asyncio.sleep(0)
+            await stream.aclose()  # the follower still waits, so the stream goes on
+            return await follower
+
+        self.assertEqual(asyncio.run(run_test()), "shared streamed answer")
+        self.assertEqual((manager.backend.streams, manager.backend.calls), (2, 0))
+
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run_test():
+            first = asyncio.ensure_future(flight.do("key", work))
+            second = asyncio.ensure_future(flight.do("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            result = await second
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return result
+
+        self.assertEqual(asyncio.run(run_test()), "done")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_failure_propagates_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota")
+
+        async def run_test():
+            return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+        results = asyncio.run(run_test())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(flight.stats()["started"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
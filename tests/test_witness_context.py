@@ -0,0 +1,64 @@
+import unittest
+import asyncio
+import time
+from ai_module import estimate_tokens
+from ai_registry import registry, get_chat_client, get_prompt_manager
+from witness_context import WitnessContextBudget
+from tests import offline_config
+
+class TestWitnessContextBudget(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+        self.config = offline_config(offline_backend={"latency_ms": 50})
+
+    def tearDown(self):
+        registry.clear()
+
+    def exchange(self, i: int):
+        return f"Where were you at {i} o'clock?", f"I was at the office at {i}. " + "I remember it clearly. " * 20
+
+    def test_render_stays_within_budget(self):
+        context = WitnessContextBudget(recent_exchanges=3, max_tokens=400, summary_tokens=120)
+        self.assertEqual(context.render(), "No previous testimony.")
+        sizes = []
+        for i in range(1, 41):
+            context.add(*self.exchange(i))
+            sizes.append(estimate_tokens(context.render()))
+        rendered = context.render()
+        self.assertLessEqual(max(sizes), 400)
+        self.assertIn("Question 40:", rendered)
+        self.assertNotIn("Question 1:", rendered)
+        self.assertIn("Summary of earlier testimony", rendered)
+        self.assertEqual(len(context.recent), 3)
+
+    def test_summary_refreshes_in_background(self):
+        context = WitnessContextBudget(get_chat_client(self.config), get_prompt_manager(self.config), "Jane Doe",
+                                   recent_exchanges=2, summary_batch=2)
+
+        async def run_test():
+            start = time.perf_counter()
+            for i in range(1, 6):
+                context.add(*self.exchange(i))
+            added_in = time.perf_counter() - start
+            await context.wait_for_refresh()
+            return added_in
+
+        added_in = asyncio.run(run_test())
+        self.assertLess(added_in, 0.05)  # Never waits on the 50 ms model call.
+        self.assertGreaterEqual(context.refreshes, 1)
+        self.assertIn("Jane Doe", context.summary)
+        self.assertIn(context.summary, context.render())
+        self.assertTrue(all(number > context.summarized for number, _, _ in context.folded))
+
+    def test_load_restores_saved_summary(self):
+        context = WitnessContextBudget(recent_exchanges=2)
+        exchanges = [self.exchange(i) for i in range(1, 6)]
+        context.load(exchanges, summary="The witness was at the office.", summarized=2)
+        self.assertEqual(context.count, 5)
+        self.assertEqual([number for number, _, _ in context.folded], [3])
+        rendered = context.render()
+        self.assertIn("The witness was at the office.", rendered)
+        self.assertIn("Question 5:", rendered)
+
+if __name__ == '__main__':
+    unittest.main()
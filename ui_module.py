@@ -1,22 +1,26 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog
-from game_logic import Game, GamePhase
+from tkinter import messagebox, simpledialog, ttk
+from game_logic import Game, GamePhase, MANUAL_SAVE_SLOT
 from game_objects import Witness, Evidence
 from data_management import Logger
-from state_management import GameStateObserver, Event
-import asyncio
-from typing import Dict, List, Optional
+from state_management import GameStateObserver, ChangeSet
+from async_bridge import bridge
+from log_viewer import LogViewer
+from log_pipeline import log_payload
+import random
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Dict, List, Optional
+
+FRAME_MS = 16  # Change-sets arriving within one frame are applied in a single repaint
 
 class UIObserver(GameStateObserver):
     def __init__(self, ui: "GameUI"):
         self.ui = ui
 
-    def on_state_change(self, new_state: GamePhase, context: Optional[Dict]):
-        if new_state == GamePhase.CASE_PREPARATION:
-            self.ui.update_evidence_board()
-            self.ui.update_witness_stand()
-        elif new_state == GamePhase.DELIBERATION:
-            self.ui.update_jury_box()
+    def on_state_change(self, new_state: GamePhase, context: Optional[Dict], changes: Optional[ChangeSet] = None):
+        # Changes can happen on the background loop; widgets are only touched from the Tk thread.
+        if changes:
+            bridge.call_soon_ui(self.ui.schedule_refresh, changes)
 
 class MainMenu:
     def __init__(self, master, config: Dict):
@@ -38,28 +42,23 @@ class MainMenu:
         self.exit_button.pack(pady=10)
 
     def start_career(self):
-        """Start career mode and handle async operations properly"""
-        async def init_game(game_ui):
-            await game_ui.game.start_career_mode()  # Initialize the first case
-
+        """Start career mode; the first case is set up on the background loop while the window opens"""
         self.master.destroy()
         root = tk.Tk()
         game_ui = GameUI(root, self.config)
-
-        # Run the async initialization
-        asyncio.run(init_game(game_ui))
+        game_ui.run_async(game_ui.game.start_career_mode(), game_ui.player_desk)
 
         # Start the Tkinter main loop
         root.mainloop()
 
     def load_game(self):
         game = Game(self.config)
-        game.load_game()
+        game.load_game(MANUAL_SAVE_SLOT if MANUAL_SAVE_SLOT in game.autosave.slots() else None)
         if game.state.current_phase != GamePhase.MAIN_MENU:
             self.master.destroy()
             root = tk.Tk()
             game_ui = GameUI(root, self.config, existing_game=game)
-            asyncio.run(game_ui.game.start_game())
+            game_ui.run_async(game_ui.game.start_game(), game_ui.player_desk)
             root.mainloop()
         else:
             messagebox.showinfo("Load Game", "No saved game found or error loading game.")
@@ -75,18 +74,27 @@ class GameUI:
             self.game = existing_game
         else:
             self.game = Game(config)
+        bridge.attach(master)
+        master.protocol("WM_DELETE_WINDOW", self.close)
         self.ui_observer = UIObserver(self)
         self.game.state.add_observer(self.ui_observer)
-        self.game.state.event_manager.subscribe("state_changed", self.on_state_change)
+        self._pending_changes: Optional[ChangeSet] = None
+        self.presented_evidence = set()
 
         self.evidence_board = tk.Frame(master, bd=2, relief=tk.RIDGE)
         self.evidence_board.place(x=10, y=10, width=240, height=580)
+        tk.Label(self.evidence_board, text="Evidence Board", font=("Helvetica", 12, "bold")).pack(pady=5)
+        self.evidence_buttons: List[tk.Button] = []
 
         self.witness_stand = tk.Frame(master, bd=2, relief=tk.RIDGE)
         self.witness_stand.place(x=260, y=10, width=240, height=580)
+        tk.Label(self.witness_stand, text="Witness Stand", font=("Helvetica", 12, "bold")).pack(pady=5)
+        self.witness_buttons: List[tk.Button] = []
 
         self.jury_box = tk.Frame(master, bd=2, relief=tk.RIDGE)
         self.jury_box.place(x=510, y=10, width=240, height=580)
+        tk.Label(self.jury_box, text="Jury Box", font=("Helvetica", 12, "bold")).pack(pady=5)
+        self.juror_labels: List[tk.Label] = []
 
         self.player_desk = tk.Frame(master, bd=2, relief=tk.RIDGE)
         self.player_desk.place(x=760, y=10, width=230, height=580)
@@ -96,51 +104,122 @@ class GameUI:
         self.populate_jury_box()
         self.populate_player_desk()
 
-    def on_state_change(self, event: Event):
-        new_state = event.data["new_phase"]
-        if new_state == GamePhase.CASE_PREPARATION:
-            self.update_evidence_board()
-            self.update_witness_stand()
-        elif new_state == GamePhase.DELIBERATION:
-            self.update_jury_box()
+    def schedule_refresh(self, changes: ChangeSet):
+        """Queues ``changes`` for the next frame; everything queued by then is applied in one repaint."""
+        if self._pending_changes is None:
+            self._pending_changes = ChangeSet()
+            self.master.after(FRAME_MS, self.apply_changes)
+        self._pending_changes.merge(changes)
+
+    def apply_changes(self):
+        changes, self._pending_changes = self._pending_changes, None
+        if not changes:
+            return
+        if changes.case_changed:
+            self.presented_evidence.clear()
+            self.populate_evidence_board()
+            self.populate_witness_stand()
+            self.populate_jury_box()
+            return
+        if changes.evidence_added:
+            self.populate_evidence_board()
+        for index in changes.evidence_updated - changes.evidence_added:
+            self.update_evidence_button(index)
+        for juror_id in changes.juror_sentiment:
+            self.update_juror_label(juror_id)
+        for name in changes.witness_stress:
+            self.update_witness_button(name)
+
+    def run_async(self, coro: Coroutine, owner: tk.Misc, on_done: Optional[Callable] = None,
+                  busy_widgets: List[tk.Widget] = ()) -> Future:
+        """Runs ``coro`` on the background loop with a progress bar in ``owner``.
+
+        ``busy_widgets`` are disabled until it finishes; ``on_done(result)`` then
+        runs on the Tk thread. Destroying ``owner`` cancels the request.
+        """
+        progress = ttk.Progressbar(owner, mode="indeterminate", length=200)
+        progress.pack(pady=5)
+        progress.start(12)
+        for widget in busy_widgets:
+            widget.config(state="disabled")
+
+        def finish(future: Future):
+            if progress.winfo_exists():
+                progress.destroy()
+            for widget in busy_widgets:
+                if widget.winfo_exists():
+                    widget.config(state="normal")
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                messagebox.showerror("Error", f"An error occurred: {error}")
+                self.game.logger.log_error(f"Error in background request: {error}")
+            elif on_done is not None:
+                on_done(future.result())
+
+        return bridge.submit(coro, on_done=finish, owner=owner)
+
+    def close(self):
+        """Cancels pending requests and closes the AI client on its own loop before the window goes."""
+        try:
+            bridge.run(self.game.ai_manager.close(), timeout=bridge.shutdown_timeout)
+        except Exception as e:
+            self.game.logger.log_error(f"Error closing AI client: {e}")
+        bridge.log_stats()
+        bridge.stop()
+        self.game.autosave.flush(bridge.shutdown_timeout)  # Let a save in progress finish
+        self.master.destroy()
+
+    @staticmethod
+    def _resize(widgets: List[tk.Widget], count: int, create: Callable[[int], tk.Widget]):
+        """Grows or shrinks a panel's widget list to ``count``, keeping the widgets already there."""
+        while len(widgets) < count:
+            widget = create(len(widgets))
+            widget.pack(pady=2, fill='x')
+            widgets.append(widget)
+        while len(widgets) > count:
+            widgets.pop().destroy()
 
     def populate_evidence_board(self):
-        for widget in self.evidence_board.winfo_children():
-            widget.destroy()
-        tk.Label(self.evidence_board, text="Evidence Board", font=("Helvetica", 12, "bold")).pack(pady=5)
-        self.evidence_buttons = []
-        if self.game.current_case:
-          for evidence in self.game.current_case.evidence_list:
-              status = "✅" if evidence.authenticated else "❌"
-              btn_text = f"{evidence.description} ({evidence.type}) {status}"
-              btn = tk.Button(self.evidence_board, text=btn_text, wraplength=220, justify="left",
-                              command=lambda e=evidence: self.present_evidence(e))
-              btn.pack(pady=2, fill='x')
-              self.evidence_buttons.append(btn)
+        evidence_list = self.game.current_case.evidence_list if self.game.current_case else []
+        self._resize(self.evidence_buttons, len(evidence_list), lambda index: tk.Button(
+            self.evidence_board, wraplength=220, justify="left",
+            command=lambda: self.present_evidence(self.game.current_case.evidence_list[index])))
+        for index in range(len(evidence_list)):
+            self.update_evidence_button(index)
+
+    def update_evidence_button(self, index: int):
+        evidence = self.game.current_case.evidence_list[index]
+        button = self.evidence_buttons[index]
+        status = "✅" if evidence.authenticated else "❌"
+        button.config(text=f"{evidence.description} ({evidence.type}) {status}",
+                      bg="lightgreen" if index in self.presented_evidence else button.configure("background")[3])
 
     def populate_witness_stand(self):
-        for widget in self.witness_stand.winfo_children():
-            widget.destroy()
-        tk.Label(self.witness_stand, text="Witness Stand", font=("Helvetica", 12, "bold")).pack(pady=5)
-        self.witness_buttons = []
-        if self.game.current_case:
-          for witness in self.game.current_case.witnesses:
-              btn = tk.Button(self.witness_stand, text=witness.name, wraplength=220, justify="left",
-                              command=lambda w=witness: self.examine_witness(w))
-              btn.pack(pady=2, fill='x')
-              self.witness_buttons.append(btn)
+        witnesses = self.game.current_case.witnesses if self.game.current_case else []
+        self._resize(self.witness_buttons, len(witnesses), lambda index: tk.Button(
+            self.witness_stand, wraplength=220, justify="left",
+            command=lambda: self.examine_witness(self.game.current_case.witnesses[index])))
+        for index, witness in enumerate(witnesses):
+            self.witness_buttons[index].config(text=f"{witness.name} (Stress: {witness.stress}/10)")
+
+    def update_witness_button(self, name: str):
+        for index, witness in enumerate(self.game.current_case.witnesses):
+            if witness.name == name:
+                self.witness_buttons[index].config(text=f"{witness.name} (Stress: {witness.stress}/10)")
 
     def populate_jury_box(self):
-        for widget in self.jury_box.winfo_children():
-            widget.destroy()
-        tk.Label(self.jury_box, text="Jury Box", font=("Helvetica", 12, "bold")).pack(pady=5)
-        self.juror_labels = []
+        self._resize(self.juror_labels, len(self.game.jury.jurors), lambda index: tk.Label(
+            self.jury_box, bd=1, relief=tk.SOLID, anchor="w"))
         for juror in self.game.jury.jurors:
-            sentiment_label = self.game.jury.get_sentiment_label(juror.sentiment)
-            label_text = f"Juror #{juror.id}: {sentiment_label} ({juror.sentiment})"
-            label = tk.Label(self.jury_box, text=label_text, bd=1, relief=tk.SOLID, anchor="w")
-            label.pack(pady=2, fill='x')
-            self.juror_labels.append(label)
+            self.update_juror_label(juror.id)
+
+    def update_juror_label(self, juror_id: int):
+        for index, juror in enumerate(self.game.jury.jurors):
+            if juror.id == juror_id:
+                sentiment_label = self.game.jury.get_sentiment_label(juror.sentiment)
+                self.juror_labels[index].config(text=f"Juror #{juror.id}: {sentiment_label} ({juror.sentiment})")
 
     def populate_player_desk(self):
         for widget in self.player_desk.winfo_children():
@@ -155,20 +234,28 @@ class GameUI:
         self.log_btn = tk.Button(self.player_desk, text="View Logs", width=25, command=self.view_logs)
         self.log_btn.pack(pady=10)
 
-        self.save_button = tk.Button(self.player_desk, text="Save Game", width=25, command=self.game.save_game)
+        self.save_button = tk.Button(self.player_desk, text="Save Game", width=25, command=self.save_game)
         self.save_button.pack(pady=10)
 
+    def save_game(self):
+        """Snapshots the game here; the save slot is written on the autosave thread."""
+        self.save_button.config(state=tk.DISABLED)
+
+        def saved(ok: bool):
+            self.save_button.config(state=tk.NORMAL)
+            if not ok:
+                messagebox.showerror("Save Game", "The game could not be saved. See the error log for details.")
+
+        self.game.save_game(MANUAL_SAVE_SLOT, on_saved=bridge.ui_callback(saved))
+
     def present_evidence(self, evidence: Evidence):
         if not evidence.authenticated:
             messagebox.showwarning("Evidence Authentication", "This evidence has not been authenticated.")
             return
         messagebox.showinfo("Present Evidence", f"You have presented {evidence.description}.")
         # self.game.jury.assess_case(evidence.metadata['impact_metric'])
-        self.game.jury.assess_case(evidence, self.game.current_case.case_context)
-        self.update_juror_sentiments()
-        self.game.log_event("Evidence Presented", evidence.description)
-        idx = self.game.current_case.evidence_list.index(evidence)
-        self.evidence_buttons[idx].config(bg="lightgreen")
+        self.presented_evidence.add(self.game.current_case.evidence_list.index(evidence))
+        self.game.present_evidence(evidence)  # The change-set repaints the button and the affected jurors
 
     def examine_witness(self, witness: Witness):
         exam_window = tk.Toplevel(self.master)
@@ -205,19 +292,20 @@ class GameUI:
                 messagebox.showwarning("Input Error", "Please enter a question.")
                 return
             strategy = approach_var.get()
-            context = self.game.get_context()
-            async def question_task():
-                response = await witness.respond(question, strategy, self.game)
-                print(f"Question: {question}\nResponse: {response}\n")
-                response_text.config(state='normal')
-                response_text.insert(tk.END, f"Q: {question}\nA: {response}\n\n")
-                response_text.config(state='disabled')
+            self.append_text(response_text, f"Q: {question}\nA: ")
+            on_chunk = bridge.ui_callback(lambda chunk: self.append_text(response_text, chunk))
+
+            def show_response(response: str):
+                log_payload("response", witness.name, response)
+                self.append_text(response_text, "\n\n")
                 stress_label.config(text=f"Stress Level: {witness.stress}/10")
                 question_entry.delete(0, tk.END)
                 # self.game.jury.assess_case(impact)
-                self.update_juror_sentiments()
                 self.game.log_event("Witness Response", f"Q: {question} | A: {response}")
-            asyncio.run(question_task())
+
+            # One question at a time per witness; other witness windows keep running.
+            self.run_async(self.game.question_witness(witness, question, strategy, on_chunk=on_chunk), exam_window,
+                           on_done=show_response, busy_widgets=[submit_btn])
 
         submit_btn = tk.Button(question_frame, text="Submit", command=submit_question)
         submit_btn.pack(side="left", padx=5)
@@ -235,19 +323,23 @@ class GameUI:
             for obj_type in objection_types:
                 tk.Radiobutton(objection_window, text=obj_type, variable=objection_var, value=obj_type).pack(anchor="w")
 
-            def confirm_objection():
-                selected_objection = objection_var.get()
-                self.game.log_event("Player Objection", selected_objection)
-                ruling = self.game.judge_ruling(selected_objection, question_entry.get()) # Pass the question to judge_ruling
+            def show_ruling(ruling: str):
                 messagebox.showinfo("Objection Ruling", f"Judge Ruling: {ruling}")
                 if ruling == "Sustained":
-                    self.game.jury.assess_case(1)
+                    self.game.adjust_jury(1)
                 else:
-                    self.game.jury.assess_case(-1)
-                self.update_juror_sentiments()
+                    self.game.adjust_jury(-1)
                 objection_window.destroy()
 
-            tk.Button(objection_window, text="Confirm", command=confirm_objection).pack(pady=5)
+            def confirm_objection():
+                selected_objection = objection_var.get()
+                self.game.log_event("Player Objection", selected_objection)
+                # Pass the question to judge_ruling
+                self.run_async(self.game.judge_ruling(selected_objection, question_entry.get()), objection_window,
+                               on_done=show_ruling, busy_widgets=[confirm_btn])
+
+            confirm_btn = tk.Button(objection_window, text="Confirm", command=confirm_objection)
+            confirm_btn.pack(pady=5)
 
         objection_btn = tk.Button(exam_window, text="Raise Objection", command=raise_objection)
         objection_btn.pack(pady=5)
@@ -278,25 +370,15 @@ class GameUI:
             context["case_type"] = self.game.current_case.case_type.value
 
 
-            async def generate_statement_task():
-                # Correctly pass "opening_statement" as the prompt type
-                messages = self.game.prompt_manager.generate_prompt("opening_statement", context)
-                statement = await self.game.ai_manager.get_response(messages)
-
-                # Update UI to show the generated statement
-                statement_window = tk.Toplevel(self.master)
-                statement_window.title("Opening Statement")
-                text_widget = tk.Text(statement_window, wrap='word', height=15, width=70)
-                text_widget.pack(expand=True, fill='both')
-                text_widget.insert(tk.END, statement)
-                text_widget.config(state='disabled')
+            # Correctly pass "opening_statement" as the prompt type
+            messages = self.game.prompt_manager.generate_prompt("opening_statement", context)
 
+            def statement_done(statement: str):
                 # Log and assess impact
                 self.game.log_event("Opening Statement", statement)
                 impact = random.randint(1, 2)
-                self.update_juror_sentiments()
 
-            asyncio.run(generate_statement_task())
+            self.stream_statement("Opening Statement", messages, "opening_statement", statement_done)
 
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
@@ -333,30 +415,52 @@ class GameUI:
         context["strategy"] = strategy
         context["statement_type"] = "closing"
 
-        async def generate_statement_task():
-            messages = [{"role": "user", "parts": [self.game.prompt_manager.generate_prompt("closing_statement", context)[0]["parts"][0]]}]
-            statement = await self.game.ai_manager.get_response(messages)
-
-            # Update UI to show the generated statement
-            statement_window = tk.Toplevel(self.master)
-            statement_window.title("Closing Statement")
-            text_widget = tk.Text(statement_window, wrap='word', height=15, width=70)
-            text_widget.pack(expand=True, fill='both')
-            text_widget.insert(tk.END, statement)
-            text_widget.config(state='disabled')
+        messages = [{"role": "user", "parts": [self.game.prompt_manager.generate_prompt("closing_statement", context)[0]["parts"][0]]}]
 
+        def statement_done(statement: str):
             # Log and assess impact
             self.game.log_event("Closing Statement", statement)
             impact = random.randint(1, 2)
             # self.game.jury.assess_case(impact) # Assess impact if needed
-            self.update_juror_sentiments()
 
-        asyncio.run(generate_statement_task())
+        self.stream_statement("Closing Statement", messages, "closing_statement", statement_done)
+
+    def stream_statement(self, title: str, messages: List[Dict], prompt_type: str,
+                         on_done: Callable[[str], None]) -> Future:
+        """Streams a statement into its own window; closing the window stops the request."""
+        # Show the statement window immediately and fill it as text streams in
+        text_widget = self.open_statement_window(title)
+        on_chunk = bridge.ui_callback(lambda chunk: self.append_text(text_widget, chunk))
+
+        async def generate_statement_task() -> str:
+            chunks = []
+            async for chunk in self.game.ai_manager.stream_response(messages, prompt_type=prompt_type):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            return "".join(chunks).strip()
+
+        return self.run_async(generate_statement_task(), text_widget.master, on_done=on_done)
+
+    def open_statement_window(self, title: str) -> tk.Text:
+        statement_window = tk.Toplevel(self.master)
+        statement_window.title(title)
+        text_widget = tk.Text(statement_window, wrap='word', height=15, width=70, state='disabled')
+        text_widget.pack(expand=True, fill='both')
+        return text_widget
+
+    def append_text(self, text_widget: tk.Text, chunk: str):
+        """Appends streamed text to a read-only Text widget and repaints it right away."""
+        text_widget.config(state='normal')
+        text_widget.insert(tk.END, chunk)
+        text_widget.see(tk.END)
+        text_widget.config(state='disabled')
+        text_widget.update_idletasks()
 
     def deliberation_and_verdict(self):
         messagebox.showinfo("Verdict", "Deliberation Phase is starting...")
+        before = self.game.jury.sentiments()
         self.game.jury.deliberate_phase()
-        self.update_juror_sentiments()
+        self.game.publish_jury_changes(before)
         verdict = self.game.jury.get_verdict()
         messagebox.showinfo("Verdict", f"The jury has reached a verdict: {verdict}")
         self.game.log_event("Verdict", verdict)
@@ -370,25 +474,9 @@ class GameUI:
             self.game.log_event("Case Outcome", "Defeat")
         self.game.next_case()
 
-    def update_juror_sentiments(self):
-        for idx, juror in enumerate(self.game.jury.jurors):
-            sentiment_label = self.game.jury.get_sentiment_label(juror.sentiment)
-            label_text = f"Juror #{juror.id}: {sentiment_label} ({juror.sentiment})"
-            self.juror_labels[idx].config(text=label_text)
-
     def view_logs(self):
-        logs = self.game.logger.logs
-        log_text = ""
-        for log in logs:
-            log_text += f"[{log['timestamp']}] {log['type']}: {log['details']}\n"
-        log_window = tk.Toplevel(self.master)
-        log_window.title("Game Logs")
-        log_window.geometry("600x400")
-        text_widget = tk.Text(log_window, wrap='word', state='disabled')
-        text_widget.pack(expand=True, fill='both')
-        text_widget.config(state='normal')
-        text_widget.insert(tk.END, log_text)
-        text_widget.config(state='disabled')
+        # Pages through the log store; only the rows on screen are ever formatted.
+        LogViewer(self.master, self.game.logger.logs)
 
     def update_evidence_board(self):
         self.populate_evidence_board()
@@ -0,0 +1,208 @@
+# witness_context.py
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ai_module import ERROR_PREFIX, estimate_tokens
+from bm25_index import BM25Index
+
+__all__ = ['WitnessContextBudget', 'clip_to_tokens']
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts ``text`` to roughly ``max_tokens`` (same estimate as ``estimate_tokens``), on a word boundary."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    clipped = text[:max_chars].rsplit(" ", 1)[0]
+    return clipped.rstrip(",;: ") + "..."
+
+class WitnessContextBudget:
+    """Keeps a witness's earlier testimony within a fixed prompt budget.
+
+    The last ``recent_exchanges`` Q/A pairs are kept verbatim; older ones are
+    folded into a running summary. With a ``BM25Index`` attached, the
+    ``retrieve_k`` older exchanges most relevant to the current question are
+    also quoted verbatim. Folding is local and instant (first sentence
+    of each answer); a model-written summary replaces the local digest when a
+    background refresh finishes, so the question being answered never waits on
+    summarization. The rendered context stays under ``max_tokens`` however long
+    the examination runs.
+    """
+
+    def __init__(self, ai_manager=None, prompt_manager=None, witness_name: str = "", recent_exchanges: int = 3,
+                 max_tokens: int = 600, summary_tokens: int = 200, summarize: bool = True, summary_batch: int = 2,
+                 index: Optional[BM25Index] = None, retrieve_k: int = 3):
+        self.ai_manager = ai_manager
+        self.prompt_manager = prompt_manager
+        self.witness_name = witness_name
+        self.recent_exchanges = max(1, recent_exchanges)
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize and ai_manager is not None and prompt_manager is not None
+        self.summary_batch = max(1, summary_batch)
+        self.index = index
+        self.retrieve_k = retrieve_k
+        self.recent: deque = deque()  # (number, question, answer)
+        self.folded: List[Tuple[int, str, str]] = []  # folded but not yet in the model summary
+        self.summary = ""
+        self.summarized = 0  # number of the last exchange covered by ``summary``
+        self.count = 0
+        self.refreshes = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config: Dict, ai_manager=None, prompt_manager=None, witness_name: str = "",
+                    index: Optional[BM25Index] = None) -> "WitnessContextBudget":
+        context_config = config.get("witness_context", {})
+        retrieval_config = context_config.get("retrieval", {})
+        return cls(
+            ai_manager,
+            prompt_manager,
+            witness_name=witness_name,
+            recent_exchanges=context_config.get("recent_exchanges", 3),
+            max_tokens=context_config.get("max_tokens", 600),
+            summary_tokens=context_config.get("summary_tokens", 200),
+            summarize=context_config.get("summarize", True),
+            summary_batch=context_config.get("summary_batch", 2),
+            index=index if retrieval_config.get("enabled", True) else None,
+            retrieve_k=retrieval_config.get("k", 3),
+        )
+
+    def add(self, question: str, answer: str):
+        self.count += 1
+        self.recent.append((self.count, question, answer))
+        if self.index is not None:
+            self.index.add(question, answer)
+        while len(self.recent) > self.recent_exchanges:
+            self.folded.append(self.recent.popleft())
+        if len(self.folded) >= self.summary_batch:
+            self._schedule_refresh()
+
+    def load(self, exchanges: Iterable[Tuple[str, str]], summary: str = "", summarized: int = 0):
+        """Rebuilds the context from saved testimony without asking the model for anything.
+
+        The index (if any) is restored separately and is not touched here.
+        """
+        self.recent.clear()
+        self.folded.clear()
+        self.count = 0
+        for question, answer in exchanges:
+            self.count += 1
+            self.recent.append((self.count, question, answer))
+            while len(self.recent) > self.recent_exchanges:
+                exchange = self.recent.popleft()
+                if exchange[0] > summarized:
+                    self.folded.append(exchange)
+        self.summary = summary
+        self.summarized = summarized if summary else 0
+
+    @staticmethod
+    def _digest(exchange: Tuple[int, str, str]) -> str:
+        number, question, answer = exchange
+        first_sentence = _SENTENCE_END.split(answer.strip(), 1)[0]
+        return f"Q{number} ({clip_to_tokens(question, 20)}): {clip_to_tokens(first_sentence, 30)}"
+
+    def _summary_text(self, extra: List[Tuple[int, str, str]]) -> str:
+        lines = [self.summary] if self.summary else []
+        lines.extend(self._digest(exchange) for exchange in self.folded + extra)
+        if not lines:
+            return ""
+        # Prefer the newest lines when the digest outgrows its budget.
+        text = "\n".join(lines)
+        while estimate_tokens(text) > self.summary_tokens and len(lines) > 1:
+            lines.pop(0)
+            text = "\n".join(lines)
+        return clip_to_tokens(text, self.summary_tokens)
+
+    @staticmethod
+    def _verbatim(exchange: Tuple[int, str, str]) -> str:
+        number, question, answer = exchange
+        return f"Question {number}: {question}\nAnswer {number}: {answer}\n"
+
+    def relevant(self, question: str) -> List[Tuple[str, str]]:
+        """The older exchanges most relevant to ``question``, best first (recent ones are already quoted)."""
+        if self.index is None or not question:
+            return []
+        recent = {(q, a) for _, q, a in self.recent}
+        hits = self.index.search(question, self.retrieve_k + len(recent))
+        exchanges = [self.index.docs[doc_id] for _, doc_id in hits]
+        return [exchange for exchange in exchanges if exchange not in recent][:self.retrieve_k]
+
+    def render(self, question: Optional[str] = None, include_recent: bool = True) -> str:
+        """Returns the previous-testimony text for the next prompt, within ``max_tokens``.
+
+        Chat sessions pass ``include_recent=False``: they already carry the recent
+        exchanges as conversation turns.
+        """
+        if not self.count:
+            return "No previous testimony."
+        recent = list(self.recent) if include_recent else []
+        relevant = self.relevant(question)
+        dropped: List[Tuple[int, str, str]] = []
+        while True:
+            summary = self._summary_text(dropped)
+            parts = [f"Summary of earlier testimony:\n{summary}\n"] if summary else []
+            if relevant:
+                parts.append("Earlier answers relevant to this question:\n")
+                parts.extend(f"Q: {q}\nA: {a}\n" for q, a in relevant)
+            parts.extend(self._verbatim(exchange) for exchange in recent)
+            text = "".join(parts)
+            if estimate_tokens(text) <= self.max_tokens or (not relevant and len(recent) <= 1):
+                break
+            # Give up the least relevant quote first, then the oldest verbatim answer.
+            if relevant:
+                relevant.pop()
+            else:
+                dropped.append(recent.pop(0))
+        return clip_to_tokens(text, self.max_tokens) or "Nothing beyond this conversation."
+
+    def _schedule_refresh(self):
+        if not self.summarize or (self._refresh_task is not None and not self._refresh_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop (e.g. loading a save); the local digest is used until the next fold.
+        backend = getattr(getattr(self.ai_manager, "ai_manager", self.ai_manager), "backend", None)
+        has_capacity = getattr(backend, "has_capacity", None)
+        if has_capacity is not None and not has_capacity():
+            return  # Leave the quota to questions the player is waiting on.
+        self._refresh_task = loop.create_task(self._refresh(list(self.folded)))
+
+    async def _refresh(self, batch: List[Tuple[int, str, str]]):
+        messages = self.prompt_manager.generate_prompt("testimony_summary", {
+            "witness_name": self.witness_name,
+            "summary": self.summary or "None yet.",
+            "exchanges": "".join(self._verbatim(exchange) for exchange in batch),
+            "max_words": self.summary_tokens * 3 // 4,
+        })
+        try:
+            summary = (await self.ai_manager.get_response(messages, prompt_type="testimony_summary")).strip()
+        except Exception as e:
+            logging.error(f"Error refreshing testimony summary: {e}")
+            return
+        if not summary or summary.startswith(ERROR_PREFIX):
+            return
+        self.summary = clip_to_tokens(summary, self.summary_tokens)
+        self.summarized = batch[-1][0]
+        self.folded = [exchange for exchange in self.folded if exchange[0] > self.summarized]
+        self.refreshes += 1
+        self._refresh_task = None
+        if len(self.folded) >= self.summary_batch:
+            self._schedule_refresh()
+
+    async def wait_for_refresh(self):
+        """Waits until no background refresh is pending (replays use this to stay deterministic)."""
+        while self._refresh_task is not None and not self._refresh_task.done():
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+
+    def to_dict(self) -> Dict:
+        return {"summary": self.summary, "summarized": self.summarized}
+
+    def stats(self) -> Dict:
+        return {"exchanges": self.count, "verbatim": len(self.recent), "pending_fold": len(self.folded),
+                "refreshes": self.refreshes, "rendered_tokens": estimate_tokens(self.render())}